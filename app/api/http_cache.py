@@ -0,0 +1,67 @@
+"""
+HTTP caching helpers: validators, conditional requests and Cache-Control.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Per-user data that changes often; browsers must check it is current
+PRIVATE_REVALIDATE = 'private, no-cache'
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from values that identify a representation."""
+    digest = hashlib.sha256('\x1f'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+def _as_utc(moment: datetime) -> datetime:
+    """Treat naive datetimes, as stored in the database, as UTC."""
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None, cache_control: str = 'no-cache') -> Dict[str, str]:
+    """Headers describing a cacheable representation."""
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+    if last_modified:
+        headers['Last-Modified'] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Check whether the client's cached copy is still current.
+
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = {tag.strip() for tag in if_none_match.split(',')}
+        # Weak comparison, which is what applies to If-None-Match
+        return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and last_modified:
+        try:
+            since = _as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole seconds
+        return _as_utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """A 304 response carrying the representation's validators."""
+    return Response(status_code=304, headers=headers)
+
+def cached_json(request: Request, content: Any, cache_control: str = PRIVATE_REVALIDATE) -> Response:
+    """JSON response with an ETag of its body, or 304 if the client has it.
+
+    This saves sending the body, not building it, so it suits responses that
+    are cheap to build but may be large.
+    """
+    body = json.dumps(jsonable_encoder(content), separators=(',', ':')).encode()
+    headers = cache_headers(f'"{hashlib.sha256(body).hexdigest()[:32]}"', cache_control=cache_control)
+    if is_not_modified(request, headers['ETag']):
+        return not_modified(headers)
+    return Response(body, media_type='application/json', headers=headers)
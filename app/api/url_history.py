@@ -2,12 +2,14 @@
 API endpoints for URL history management.
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlmodel import Session
 from pydantic import BaseModel, HttpUrl
 
-from app.database import get_db
+from app.api.http_cache import cached_json
+from app.db.database import get_db
 from app.services.url_history_service import URLHistoryService
+from app.services.url_typeahead import url_typeahead
 
 router = APIRouter()
 
@@ -27,6 +29,10 @@ class URLResponse(URLBase):
     class Config:
         orm_mode = True
 
+def _cached_urls(request: Request, urls: List[dict]):
+    """Serialize URLs as URLResponse would, with an ETag for revalidation."""
+    return cached_json(request, [URLResponse(**url) for url in urls])
+
 @router.post("/urls/", response_model=URLResponse)
 async def add_url(url_data: URLBase, db: Session = Depends(get_db)):
     """Add a new URL to history."""
@@ -36,19 +42,29 @@ async def add_url(url_data: URLBase, db: Session = Depends(get_db)):
         url_data.title,
         tags=url_data.tags
     )
-    return url_entry
+    return url_entry.to_dict()
+
+@router.post("/urls/bulk/")
+async def add_urls(urls: List[URLBase], db: Session = Depends(get_db)):
+    """Add many URLs to history at once, e.g. when the extension syncs."""
+    service = URLHistoryService(db)
+    count = service.add_urls([
+        {'url': str(url_data.url), 'title': url_data.title, 'tags': url_data.tags}
+        for url_data in urls
+    ])
+    return {"count": count}
 
 @router.get("/urls/recent/", response_model=List[URLResponse])
-async def get_recent_urls(limit: int = 10, db: Session = Depends(get_db)):
+async def get_recent_urls(request: Request, limit: int = 10, db: Session = Depends(get_db)):
     """Get recently accessed URLs."""
     service = URLHistoryService(db)
-    return service.get_recent_urls(limit)
+    return _cached_urls(request, service.get_recent_url_dicts(limit))
 
 @router.get("/urls/favorites/", response_model=List[URLResponse])
-async def get_favorite_urls(db: Session = Depends(get_db)):
+async def get_favorite_urls(request: Request, db: Session = Depends(get_db)):
     """Get favorite URLs."""
     service = URLHistoryService(db)
-    return service.get_favorite_urls()
+    return _cached_urls(request, service.get_favorite_url_dicts())
 
 @router.post("/urls/{url_id}/favorite/")
 async def toggle_favorite(url_id: int, db: Session = Depends(get_db)):
@@ -76,13 +92,21 @@ async def remove_tag(url_id: int, tag_name: str, db: Session = Depends(get_db)):
     return {"status": "success"}
 
 @router.get("/urls/search/", response_model=List[URLResponse])
-async def search_urls(q: str, limit: int = 10, db: Session = Depends(get_db)):
+async def search_urls(request: Request, q: str, limit: int = 10, db: Session = Depends(get_db)):
     """Search URLs by title or URL string."""
     service = URLHistoryService(db)
-    return service.search_urls(q, limit)
+    return _cached_urls(request, service.search_url_dicts(q, limit))
 
 @router.get("/urls/suggestions/", response_model=List[URLResponse])
-async def get_url_suggestions(q: str, limit: int = 5, db: Session = Depends(get_db)):
+async def get_url_suggestions(request: Request, q: str, limit: int = 5, db: Session = Depends(get_db)):
     """Get URL suggestions based on partial input."""
+    # Answered from memory once the typeahead index has been built
+    if url_typeahead.ready:
+        return _cached_urls(request, url_typeahead.suggest(q, limit))
     service = URLHistoryService(db)
-    return service.get_url_suggestions(q, limit)
+    return _cached_urls(request, service.get_url_suggestion_dicts(q, limit))
+
+@router.get("/urls/suggestions/stats/")
+async def get_suggestion_stats():
+    """Get the size and memory use of the typeahead index."""
+    return url_typeahead.stats()
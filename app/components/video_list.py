@@ -2,12 +2,19 @@
 
 from typing import List, Optional
 from app.models.models import Video
+from app.services.fragment_cache import fragment_cache
 from fastapi import Request
+from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
 from sqlmodel import Session
 
 class VideoList:
-    """Component for rendering a list of videos."""
+    """Component for rendering a list of videos.
+
+    Each video card is rendered once and cached in ``fragment_cache``, so a
+    list is mostly built by joining cached cards.
+    """
     
     def __init__(self, templates: Jinja2Templates):
         """Initialize with a Jinja2Templates instance."""
@@ -15,10 +22,25 @@ class VideoList:
         
     async def render(self, request: Request, videos: List[Video]):
         """Render the video list template"""
-        return self.templates.TemplateResponse(
-            "video_list.html",
-            {"request": request, "videos": videos}
-        )
+        return HTMLResponse(self.render_page(videos))
+
+    def render_page(self, videos: List[Video], next_cursor: Optional[str] = None) -> Markup:
+        """Render a list of videos, continued from ``next_cursor`` if given."""
+        template = self.templates.get_template("video_list.html")
+        return Markup(template.render(cards=self.render_cards(videos), next_cursor=next_cursor))
+
+    def render_cards(self, videos: List[Video]) -> List[Markup]:
+        """Render the card of each video, using cached cards where possible."""
+        template = self.templates.get_template("video_card.html")
+        cards = []
+        for video in videos:
+            key = ('card', video.id, video.updated_at)
+            html = fragment_cache.get(key)
+            if html is None:
+                html = template.render(video=video)
+                fragment_cache.set(key, html)
+            cards.append(Markup(html))
+        return cards
     
     def _clean_description(self, description: str) -> str:
         """Clean up a video description."""
@@ -1 +1 @@
-
+from app.db.saved_urls import init_db, save_url, save_urls, get_saved_urls
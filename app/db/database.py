@@ -1,20 +1,158 @@
-"""Database connection and session management using SQLModel."""
+"""Database connection and session management using SQLModel.
+
+Every part of the app shares the engine defined here, so there is a single
+connection pool and every connection gets the same SQLite settings.
+"""
+import logging
+import os
 from pathlib import Path
+from sqlalchemy import event, inspect, text
 from sqlmodel import Session, SQLModel, create_engine
 from app.models.models import Channel, Video
+from app.models.url_history import URLHistory, Tag
+from app.db.search_index import create_search_indexes
+
+logger = logging.getLogger(__name__)
 
 # Get the base directory
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 # Create database URL
-DATABASE_URL = f"sqlite:///{BASE_DIR}/brevify.db"
+DATABASE_URL = os.getenv('BREVIFY_DATABASE_URL', f"sqlite:///{BASE_DIR}/brevify.db")
+
+# Where URL history and saved URLs were kept before everything moved to one database
+LEGACY_DATABASE_PATH = BASE_DIR / 'data' / 'brevify.db'
+
+# Copies rows from the attached legacy database that are not here yet. URL
+# history IDs are reassigned, so tag links are matched up by URL and tag name.
+IMPORT_LEGACY = {
+    'url_history': '''
+        INSERT INTO main.url_history
+            (url, title, created_at, last_accessed, access_count, is_favorite, source)
+        SELECT url, title, created_at, last_accessed, access_count, is_favorite, source
+        FROM legacy.url_history l
+        WHERE NOT EXISTS (SELECT 1 FROM main.url_history h WHERE h.url = l.url)
+    ''',
+    'tags': '''
+        INSERT OR IGNORE INTO main.tags (name) SELECT name FROM legacy.tags
+    ''',
+    'url_tags': '''
+        INSERT INTO main.url_tags (url_id, tag_id)
+        SELECT DISTINCT h.id, t.id
+        FROM legacy.url_tags lut
+        JOIN legacy.url_history lh ON lh.id = lut.url_id
+        JOIN legacy.tags lt ON lt.id = lut.tag_id
+        JOIN main.url_history h ON h.url = lh.url
+        JOIN main.tags t ON t.name = lt.name
+        WHERE NOT EXISTS (
+            SELECT 1 FROM main.url_tags ut WHERE ut.url_id = h.id AND ut.tag_id = t.id
+        )
+    ''',
+    'saved_urls': '''
+        INSERT OR IGNORE INTO main.saved_urls (url, created_at)
+        SELECT url, created_at FROM legacy.saved_urls
+    ''',
+    'channel_metadata': '''
+        INSERT OR IGNORE INTO main.channel_metadata
+            (url, channel_name, last_video_title, last_video_date, last_checked)
+        SELECT url, channel_name, last_video_title, last_video_date, last_checked
+        FROM legacy.channel_metadata
+    '''
+}
+
+# Connections kept open in the pool, and extra ones allowed under load
+POOL_SIZE = int(os.getenv('BREVIFY_DB_POOL_SIZE', '10'))
+POOL_OVERFLOW = int(os.getenv('BREVIFY_DB_POOL_OVERFLOW', '20'))
+
+# Prepared statements cached by each sqlite3 connection
+STATEMENT_CACHE_SIZE = 256
 
 # Create engine
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(
+    DATABASE_URL,
+    echo=os.getenv('BREVIFY_SQL_ECHO', '') == '1',
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_OVERFLOW,
+    connect_args={
+        "check_same_thread": False,  # Connections move between worker threads
+        "cached_statements": STATEMENT_CACHE_SIZE
+    }
+)
+
+@event.listens_for(engine, "connect")
+def _configure_sqlite(dbapi_connection, connection_record):
+    """Apply SQLite settings to each new connection."""
+    cursor = dbapi_connection.cursor()
+    # Readers do not block the writer and commits only append to the log
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # Safe with WAL; skips an fsync on every commit
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    # Wait for the write lock instead of failing straight away
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA cache_size=-16000")  # 16 MB
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
 
 def create_db_and_tables():
     """Create all database tables."""
     SQLModel.metadata.create_all(engine)
+    add_missing_columns()
+    with engine.begin() as conn:
+        create_search_indexes(conn)
+    import_legacy_database()
+
+def import_legacy_database(path: Path = LEGACY_DATABASE_PATH) -> bool:
+    """Copy URL history and saved URLs from the old ``data/brevify.db``, once.
+
+    Rows that already exist here are kept. The old file is renamed to
+    ``brevify.db.imported`` afterwards, so the import never runs again and
+    the file can be deleted once the data has been checked.
+    """
+    if not path.exists() or path.resolve() == Path(engine.url.database).resolve():
+        return False
+
+    # Imported here because saved_urls uses this module's engine
+    from app.db.saved_urls import init_db
+    init_db()
+
+    with engine.connect() as conn:
+        # ATTACH cannot run inside a transaction, so it is not in the one below
+        conn.exec_driver_sql("ATTACH DATABASE ? AS legacy", (str(path),))
+        try:
+            legacy_tables = set(conn.exec_driver_sql(
+                "SELECT name FROM legacy.sqlite_master WHERE type = 'table'"
+            ).scalars())
+            imported = {}
+            for table, statement in IMPORT_LEGACY.items():
+                if table in legacy_tables:
+                    imported[table] = conn.execute(text(statement)).rowcount
+            conn.commit()
+        finally:
+            conn.exec_driver_sql("DETACH DATABASE legacy")
+
+    path.rename(path.with_name(path.name + '.imported'))
+    logger.info(f"Imported {imported} rows from {path}")
+    return True
+
+def add_missing_columns():
+    """Add model columns and indexes that are missing from existing tables.
+
+    create_all() never alters a table that already exists, so columns added to
+    the models later are added here. New columns must be nullable.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
 
 def get_db():
     """Get database session."""
@@ -0,0 +1,79 @@
+"""Database module for storing URLs.
+
+Statements are built once at import time. SQLAlchemy then reuses their
+compiled form, and each pooled sqlite3 connection reuses its prepared
+statement, instead of preparing the SQL again on every call.
+"""
+import logging
+from typing import Iterable
+from sqlalchemy import text
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+INSERT_URL = text('INSERT OR IGNORE INTO saved_urls (url) VALUES (:url)')
+
+SELECT_URLS = text('SELECT url FROM saved_urls ORDER BY created_at DESC')
+
+UPSERT_CHANNEL_METADATA = text('''
+    INSERT OR REPLACE INTO channel_metadata
+    (url, channel_name, last_video_title, last_video_date, last_checked)
+    VALUES (:url, :channel_name, :last_video_title, :last_video_date, :last_checked)
+''')
+
+def init_db():
+    """Initialize the saved URL tables."""
+    with engine.begin() as conn:
+        # Create table for storing URLs
+        conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS saved_urls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        '''))
+
+        # Create table for channel metadata
+        conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS channel_metadata (
+                url TEXT PRIMARY KEY,
+                channel_name TEXT,
+                last_video_title TEXT,
+                last_video_date TEXT,
+                last_checked TEXT,
+                FOREIGN KEY (url) REFERENCES saved_urls(url)
+            )
+        '''))
+
+def save_url(url: str) -> bool:
+    """Save a URL to the database."""
+    try:
+        with engine.begin() as conn:
+            conn.execute(INSERT_URL, {'url': url})
+        return True
+    except Exception as e:
+        logger.error(f"Error saving URL: {e}")
+        return False
+
+def save_urls(urls: Iterable[str]) -> int:
+    """Save many URLs in a single transaction.
+
+    Returns the number of URLs that were not already saved.
+    """
+    params = [{'url': url} for url in dict.fromkeys(urls)]
+    if not params:
+        return 0
+
+    with engine.begin() as conn:
+        result = conn.execute(INSERT_URL, params)
+    return result.rowcount
+
+def get_saved_urls() -> list:
+    """Get all saved URLs, ordered by most recent first."""
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(SELECT_URLS)
+            return [row[0] for row in result]
+    except Exception as e:
+        logger.error(f"Error getting URLs: {e}")
+        return []
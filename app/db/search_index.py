@@ -0,0 +1,216 @@
+"""Full-text search indexes kept in SQLite FTS5 tables.
+
+URL history uses the trigram tokenizer, so any substring of three or more
+characters is an index lookup instead of a ``LIKE '%...%'`` table scan. Videos
+and transcripts are indexed by word, with stemming.
+
+The indexes are kept in sync with their source tables by triggers, so
+nothing in the application has to remember to update them. Transcripts are
+indexed through the ``transcriptchunk`` table, which the transcript store
+fills when it stores a transcript.
+"""
+import logging
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# Trigram matching needs at least this many characters
+MIN_QUERY_LENGTH = 3
+
+# Names of the indexes that exist; queries that need a missing one fall back
+# to LIKE or return nothing
+available_indexes = set()
+
+# Space separated names of every tag on a URL
+_URL_TAG_NAMES = '''
+    (SELECT group_concat(t.name, ' ') FROM url_tags ut
+     JOIN tags t ON t.id = ut.tag_id WHERE ut.url_id = {url_id})
+'''
+
+URL_HISTORY_FTS = [
+    '''
+    CREATE VIRTUAL TABLE url_history_fts USING fts5(
+        url, title, tags, tokenize = 'trigram'
+    )
+    ''',
+    '''
+    CREATE TRIGGER url_history_fts_insert AFTER INSERT ON url_history BEGIN
+        INSERT INTO url_history_fts (rowid, url, title, tags)
+        VALUES (new.id, new.url, coalesce(new.title, ''), '');
+    END
+    ''',
+    '''
+    CREATE TRIGGER url_history_fts_update AFTER UPDATE OF url, title ON url_history BEGIN
+        UPDATE url_history_fts SET url = new.url, title = coalesce(new.title, '')
+        WHERE rowid = new.id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER url_history_fts_delete AFTER DELETE ON url_history BEGIN
+        DELETE FROM url_history_fts WHERE rowid = old.id;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER url_tags_fts_insert AFTER INSERT ON url_tags BEGIN
+        UPDATE url_history_fts SET tags = coalesce({_URL_TAG_NAMES.format(url_id='new.url_id')}, '')
+        WHERE rowid = new.url_id;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER url_tags_fts_delete AFTER DELETE ON url_tags BEGIN
+        UPDATE url_history_fts SET tags = coalesce({_URL_TAG_NAMES.format(url_id='old.url_id')}, '')
+        WHERE rowid = old.url_id;
+    END
+    ''',
+    # Index the rows that existed before the table was created
+    f'''
+    INSERT INTO url_history_fts (rowid, url, title, tags)
+    SELECT h.id, h.url, coalesce(h.title, ''), coalesce({_URL_TAG_NAMES.format(url_id='h.id')}, '')
+    FROM url_history h
+    '''
+]
+
+_WORD_TOKENIZER = "porter unicode61 remove_diacritics 2"
+
+VIDEO_FTS = [
+    f'''
+    CREATE VIRTUAL TABLE video_fts USING fts5(
+        video_id UNINDEXED, title, description, tokenize = '{_WORD_TOKENIZER}'
+    )
+    ''',
+    '''
+    CREATE TRIGGER video_fts_insert AFTER INSERT ON video BEGIN
+        INSERT INTO video_fts (video_id, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    ''',
+    # Videos are rarely edited or deleted, so scanning for the old row is fine
+    '''
+    CREATE TRIGGER video_fts_update AFTER UPDATE OF title, description ON video BEGIN
+        UPDATE video_fts SET title = new.title, description = new.description
+        WHERE video_id = new.id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER video_fts_delete AFTER DELETE ON video BEGIN
+        DELETE FROM video_fts WHERE video_id = old.id;
+    END
+    ''',
+    '''
+    INSERT INTO video_fts (video_id, title, description)
+    SELECT id, title, description FROM video
+    '''
+]
+
+# Indexes transcriptchunk without storing the text a second time
+TRANSCRIPT_FTS = [
+    f'''
+    CREATE VIRTUAL TABLE transcript_fts USING fts5(
+        text, content = 'transcriptchunk', content_rowid = 'id',
+        tokenize = '{_WORD_TOKENIZER}'
+    )
+    ''',
+    '''
+    CREATE TRIGGER transcript_fts_insert AFTER INSERT ON transcriptchunk BEGIN
+        INSERT INTO transcript_fts (rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER transcript_fts_delete AFTER DELETE ON transcriptchunk BEGIN
+        INSERT INTO transcript_fts (transcript_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    ''',
+    # Transcripts cached in the video table before the transcript store
+    # existed have no timings, so each becomes a single chunk
+    '''
+    INSERT INTO transcriptchunk (video_id, language, start_ms, text)
+    SELECT id, 'en', NULL, transcript FROM video
+    WHERE transcript IS NOT NULL AND transcript != ''
+    '''
+]
+
+# Bracket matched terms in snippets. Control characters never occur in
+# titles or transcripts, so they survive HTML escaping of the snippet text
+# and can then be replaced by tags.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+SEARCH_INDEXES = {
+    'url_history_fts': URL_HISTORY_FTS,
+    'video_fts': VIDEO_FTS,
+    'transcript_fts': TRANSCRIPT_FTS
+}
+
+# Ids of matching URLs, best match first
+SEARCH_URL_HISTORY = text('''
+    SELECT rowid FROM url_history_fts
+    WHERE url_history_fts MATCH :query
+    ORDER BY rank
+    LIMIT :limit
+''')
+
+# Videos whose title or description match, best match first; titles weigh more
+SEARCH_VIDEOS = text('''
+    SELECT video_id,
+           snippet(video_fts, -1, char(2), char(3), '…', 16) AS snippet,
+           bm25(video_fts, 0.0, 10.0, 1.0) AS score
+    FROM video_fts
+    WHERE video_fts MATCH :query
+    ORDER BY score
+    LIMIT :limit
+''')
+
+# Transcript passages that match, best match first
+SEARCH_TRANSCRIPTS = text('''
+    SELECT c.video_id, c.start_ms, hits.snippet, hits.score
+    FROM (
+        SELECT rowid,
+               snippet(transcript_fts, 0, char(2), char(3), '…', 16) AS snippet,
+               rank AS score
+        FROM transcript_fts
+        WHERE transcript_fts MATCH :query
+        ORDER BY rank
+        LIMIT :limit
+    ) AS hits
+    JOIN transcriptchunk c ON c.id = hits.rowid
+    ORDER BY hits.score
+''')
+
+def _has_table(conn, name: str) -> bool:
+    """Check whether a table exists."""
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+        {'name': name}
+    ).first() is not None
+
+def create_search_indexes(conn) -> set:
+    """Create the search indexes that do not exist yet and fill them.
+
+    Each index is created on its own, so a SQLite build without the trigram
+    tokenizer still gets the word indexes for videos and transcripts. Returns
+    the names of the indexes that exist. Without ``url_history_fts``, URL
+    history falls back to ``LIKE`` queries; without the others, video search
+    is unavailable.
+    """
+    available_indexes.clear()
+    for name, statements in SEARCH_INDEXES.items():
+        try:
+            with conn.begin_nested():
+                if not _has_table(conn, name):
+                    for statement in statements:
+                        conn.execute(text(statement))
+            available_indexes.add(name)
+        except OperationalError as e:
+            logger.warning(f"Full-text index {name} unavailable: {e}")
+    return available_indexes
+
+def match_phrase(query: str, column: str = None) -> str:
+    """Build an FTS5 query matching ``query`` as a literal substring."""
+    phrase = '"' + query.replace('"', '""') + '"'
+    return f'{column} : {phrase}' if column else phrase
+
+def match_words(query: str) -> str:
+    """Build an FTS5 query matching every word of ``query``, in any order."""
+    return ' '.join(match_phrase(word) for word in query.split())
@@ -1,6 +1,7 @@
 """SQLModel models for the application."""
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 class VideoBase(SQLModel):
@@ -14,6 +15,11 @@ class VideoBase(SQLModel):
 
 class Video(VideoBase, table=True):
     """Video model with database fields."""
+    __table_args__ = (
+        # Keyset pagination of the feed, newest first
+        Index('ix_video_published_at_id', 'published_at', 'id'),
+    )
+
     id: str = Field(primary_key=True)  # YouTube video ID
     transcript: Optional[str] = None
     transcript_fetched: Optional[datetime] = None
@@ -31,6 +37,44 @@ class Channel(SQLModel, table=True):
     thumbnail_url: str
     url: str
     last_fetched: datetime = Field(default_factory=datetime.utcnow)
+    uploads_playlist_id: Optional[str] = None
+    etag: Optional[str] = None
+    uploads_etag: Optional[str] = None
+    uploads_checked: Optional[datetime] = None
+    poll_interval: Optional[int] = None  # Seconds between background refreshes
+    next_poll_at: Optional[datetime] = Field(default=None, index=True)
     
     # Relationship
     videos: list[Video] = Relationship(back_populates="channel")
+
+class ChannelAlias(SQLModel, table=True):
+    """Channel ID that a handle or custom channel URL resolved to."""
+    alias: str = Field(primary_key=True)  # e.g. "handle:mkbhd" or "c:name"
+    channel_id: Optional[str] = None  # None if no channel was found
+    resolved_at: datetime = Field(default_factory=datetime.utcnow)
+
+class Transcript(SQLModel, table=True):
+    """Cached transcript of any video, in one language."""
+    video_id: str = Field(primary_key=True)  # YouTube video ID
+    language: str = Field(primary_key=True)  # Language code, e.g. "en"
+    source: str  # "manual" or "generated"
+    segments: bytes  # Compressed segments, see app.services.transcript_codec
+    size: int  # Size of the stored segments and response bodies in bytes
+    fetched_at: datetime = Field(default_factory=datetime.utcnow)
+    last_accessed: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+class TranscriptBody(SQLModel, table=True):
+    """A transcript response body, rendered and compressed once when first served."""
+    video_id: str = Field(primary_key=True)  # YouTube video ID
+    language: str = Field(primary_key=True)  # Language code of the transcript
+    format: str = Field(primary_key=True)  # "text" or "segments"
+    encoding: str = Field(primary_key=True)  # Content-Encoding, e.g. "gzip" or "identity"
+    body: bytes
+
+class TranscriptChunk(SQLModel, table=True):
+    """A few consecutive segments of a cached transcript, for full-text search."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    video_id: str = Field(index=True)  # YouTube video ID
+    language: str  # Language code of the transcript
+    start_ms: Optional[int] = None  # None for transcripts stored without timings
+    text: str
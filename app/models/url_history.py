@@ -2,23 +2,49 @@
 URL History models for storing and managing user's video and channel URLs.
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index, Table
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
+from sqlmodel import SQLModel
 
-Base = declarative_base()
+# Shares metadata with the SQLModel models so all tables are created together
+Base = declarative_base(metadata=SQLModel.metadata)
 
 # Association table for URL tags
 url_tags = Table(
     'url_tags',
     Base.metadata,
     Column('url_id', Integer, ForeignKey('url_history.id')),
-    Column('tag_id', Integer, ForeignKey('tags.id'))
+    Column('tag_id', Integer, ForeignKey('tags.id')),
+    # Finds a URL's tags and checks for an existing link without a scan
+    Index('ix_url_tags_url_id_tag_id', 'url_id', 'tag_id')
 )
 
+def url_history_dict(entry, tags):
+    """Convert a URL history entry and its tag names to a dictionary.
+
+    ``entry`` is either a ``URLHistory`` or a plain row of its columns, so
+    lists can be serialized without building ORM objects.
+    """
+    return {
+        'id': entry.id,
+        'url': entry.url,
+        'title': entry.title,
+        'created_at': entry.created_at.isoformat(),
+        'last_accessed': entry.last_accessed.isoformat(),
+        'access_count': entry.access_count,
+        'is_favorite': entry.is_favorite,
+        'source': entry.source,
+        'tags': tags
+    }
+
 class URLHistory(Base):
     """Model for storing URL history entries."""
     __tablename__ = 'url_history'
+    __table_args__ = (
+        # Finds expired entries for cleanup without scanning the table
+        Index('ix_url_history_is_favorite_last_accessed', 'is_favorite', 'last_accessed'),
+    )
 
     id = Column(Integer, primary_key=True)
     url = Column(String, nullable=False, index=True)
@@ -37,17 +63,7 @@ class URLHistory(Base):
 
     def to_dict(self):
         """Convert the model to a dictionary."""
-        return {
-            'id': self.id,
-            'url': self.url,
-            'title': self.title,
-            'created_at': self.created_at.isoformat(),
-            'last_accessed': self.last_accessed.isoformat(),
-            'access_count': self.access_count,
-            'is_favorite': self.is_favorite,
-            'source': self.source,
-            'tags': [tag.name for tag in self.tags]
-        }
+        return url_history_dict(self, [tag.name for tag in self.tags])
 
 class Tag(Base):
     """Model for URL tags."""
@@ -3,10 +3,13 @@
 This module handles interactions with various AI services for processing YouTube transcripts.
 """
 
-from typing import Dict, List, Optional
+import os
+from typing import AsyncIterator, Dict, List, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from app.services.llm_engine import LLMEngine, TokenUsage, estimate_tokens, llm_engine, truncate_to_tokens
+
 class AIServiceType(Enum):
     """Supported AI service types."""
     OPENAI = "openai"
@@ -29,6 +32,28 @@ class AIServiceConfig:
     model: str
     max_tokens: int
     temperature: float
+    base_url: Optional[str] = None  # Overrides the provider's API URL, e.g. for a mock server
+    max_concurrency: int = 4  # Requests to the provider in flight at once
+    max_input_tokens: int = 100000  # Longer prompts are cut to fit
+
+# Per service; the model, base URL and token limits can be set in the environment
+DEFAULT_CONFIGS = {
+    service_type: AIServiceConfig(
+        service_type=service_type,
+        api_key_env=api_key_env,
+        model=os.getenv(f'BREVIFY_{service_type.name}_MODEL', model),
+        max_tokens=int(os.getenv('BREVIFY_AI_MAX_TOKENS', '1024')),
+        temperature=0.3,
+        base_url=os.getenv(f'BREVIFY_{service_type.name}_BASE_URL'),
+        max_concurrency=int(os.getenv('BREVIFY_AI_MAX_CONCURRENCY', '4')),
+        max_input_tokens=int(os.getenv('BREVIFY_AI_MAX_INPUT_TOKENS', '100000'))
+    )
+    for service_type, api_key_env, model in (
+        (AIServiceType.OPENAI, 'OPENAI_API_KEY', 'gpt-4o-mini'),
+        (AIServiceType.ANTHROPIC, 'ANTHROPIC_API_KEY', 'claude-3-5-sonnet-latest'),
+        (AIServiceType.GOOGLE, 'GOOGLE_API_KEY', 'gemini-1.5-flash')
+    )
+}
 
 class AIService:
     """Main class for AI service integration."""
@@ -54,9 +79,10 @@ class AIService:
         )
     }
 
-    def __init__(self, config: AIServiceConfig):
+    def __init__(self, config: AIServiceConfig, engine: LLMEngine = llm_engine):
         """Initialize the AI service with configuration."""
         self.config = config
+        self.engine = engine
         self.templates = self.DEFAULT_TEMPLATES.copy()
 
     def add_template(self, template: PromptTemplate) -> None:
@@ -83,13 +109,28 @@ class AIService:
         
         return template.template.format(**params)
 
-    async def process_transcript(self, template_name: str, transcript: str, **kwargs) -> str:
-        """Process a transcript using the specified template and AI service."""
+    async def process_transcript(self, template_name: str, transcript: str,
+                                 usage: Optional[TokenUsage] = None, **kwargs) -> str:
+        """Process a transcript using the specified template and AI service.
+
+        Raises LLMError if the service fails.
+        """
+        return ''.join([
+            text async for text in self.stream_transcript(template_name, transcript, usage, **kwargs)
+        ])
+
+    def stream_transcript(self, template_name: str, transcript: str,
+                          usage: Optional[TokenUsage] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream the response to a transcript as it is generated.
+
+        Transcripts too long for ``config.max_input_tokens`` are cut, keeping
+        the template's instructions. The tokens used are added to ``usage``
+        if given.
+        """
+        instructions = estimate_tokens(self.format_prompt(template_name, transcript='', **kwargs))
+        transcript = truncate_to_tokens(transcript, self.config.max_input_tokens - instructions)
         prompt = self.format_prompt(template_name, transcript=transcript, **kwargs)
-        
-        # TODO: Implement actual AI service calls based on self.config.service_type
-        # This will be implemented in the next iteration
-        return f"Processed with {self.config.service_type.value}: {prompt[:100]}..."
+        return self.engine.stream(self.config, prompt, usage)
 
     def get_launch_url(self, template_name: str, transcript: str) -> str:
         """Get a URL to launch the AI service in a new tab with context."""
@@ -0,0 +1,139 @@
+"""Bulk import of channel subscriptions."""
+import asyncio
+import csv
+import io
+import logging
+import os
+import re
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from xml.etree import ElementTree
+
+from sqlmodel import Session
+
+from app.db.database import engine
+from app.services.youtube_client import YouTubeClient, get_youtube_client
+from app.services.youtube_service import YouTubeService, parse_channel_url
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of channels resolved at the same time; matches the
+# channels().list batch size so a full batch can form
+IMPORT_CONCURRENCY = int(os.getenv('BREVIFY_IMPORT_CONCURRENCY', '50'))
+
+def parse_channel_urls(text: str) -> List[str]:
+    """Split pasted text into channel URLs, one per line or comma separated."""
+    return [url.strip() for url in re.split(r'[\s,]+', text) if url.strip()]
+
+def parse_subscriptions_file(content: bytes) -> List[str]:
+    """Read channel URLs from a subscriptions export.
+
+    Supports OPML files, Google Takeout's subscriptions.csv, and plain lists
+    of URLs.
+    """
+    text = content.decode('utf-8-sig', errors='replace')
+    stripped = text.lstrip()
+
+    # OPML, as exported from YouTube and feed readers
+    if stripped.startswith('<'):
+        urls = []
+        for outline in ElementTree.fromstring(stripped).iter('outline'):
+            feed_url = outline.get('xmlUrl')
+            if not feed_url:
+                continue
+            channel_ids = parse_qs(urlparse(feed_url).query).get('channel_id')
+            if channel_ids:
+                urls.append(f"https://www.youtube.com/channel/{channel_ids[0]}")
+        return urls
+
+    # Google Takeout subscriptions.csv
+    header = stripped.split('\n', 1)[0]
+    if 'Channel Id' in header:
+        reader = csv.DictReader(io.StringIO(stripped))
+        return [
+            f"https://www.youtube.com/channel/{row['Channel Id'].strip()}"
+            for row in reader
+            if row.get('Channel Id', '').strip()
+        ]
+
+    return parse_channel_urls(text)
+
+def normalize_channel_urls(urls: List[str]) -> Tuple[List[str], List[str]]:
+    """Drop duplicate channels, keeping the first URL for each.
+
+    Returns the unique URLs and the URLs that are not channel URLs at all.
+    """
+    unique: Dict[Tuple[str, str], str] = {}
+    invalid = []
+    for url in urls:
+        try:
+            kind, name = parse_channel_url(url)
+        except ValueError:
+            invalid.append(url)
+            continue
+        # Channel IDs are case-sensitive, handles and custom names are not
+        key = (kind, name if kind == 'channel' else name.lower())
+        unique.setdefault(key, url)
+    return list(unique.values()), invalid
+
+class ChannelImporter:
+    """Resolves and stores many channels at once.
+
+    Channels are resolved concurrently, so their channels().list lookups are
+    batched together. A channel reached through several URLs is stored once
+    and the later URLs are reported as duplicates. Their videos are left to
+    the refresh scheduler.
+    """
+
+    def __init__(self, client: Optional[YouTubeClient] = None, concurrency: int = IMPORT_CONCURRENCY):
+        """Initialize the importer."""
+        self.client = client or get_youtube_client()
+        self.concurrency = concurrency
+
+    async def run(self, urls: List[str]) -> AsyncIterator[dict]:
+        """Import channels, yielding a progress update as each one finishes."""
+        unique, invalid = normalize_channel_urls(urls)
+        total = len(unique) + len(invalid)
+        done = 0
+
+        for url in invalid:
+            done += 1
+            yield {'done': done, 'total': total, 'url': url, 'status': 'error',
+                   'error': "Invalid YouTube channel URL format"}
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # Different URLs can name the same channel, e.g. a handle and its /channel/ URL
+        seen = set()
+
+        async def resolve(url: str) -> dict:
+            # Each channel gets its own session, since a shared one would mix
+            # the unfinished writes of channels waiting on the API
+            async with semaphore:
+                with Session(engine) as db:
+                    service = YouTubeService(db, self.client)
+                    try:
+                        channel_id = await service.resolve_channel_id(url)
+                        if channel_id in seen:
+                            return {'url': url, 'status': 'duplicate', 'channel_id': channel_id}
+                        seen.add(channel_id)
+                        channel = await service.get_channel(channel_id)
+                    except Exception as e:
+                        # Includes API errors such as an exhausted quota
+                        logger.error(f"Error importing channel {url}: {e}")
+                        return {'url': url, 'status': 'error', 'error': str(e)}
+                    if not channel:
+                        return {'url': url, 'status': 'error', 'error': "Could not fetch channel info"}
+                    return {'url': url, 'status': 'added', 'channel_id': channel.id, 'title': channel.title}
+
+        tasks = [asyncio.create_task(resolve(url)) for url in unique]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                done += 1
+                yield {'done': done, 'total': total, **result}
+        finally:
+            # The client may have gone away before the import finished
+            for task in tasks:
+                task.cancel()
+
+        logger.info(f"Imported {total} channels")
@@ -0,0 +1,50 @@
+"""Cache of rendered HTML fragments for the video lists."""
+import os
+from typing import Dict, Hashable, Optional
+
+from app.services.lru_cache import LRUCache
+
+# Rendered fragments kept in memory, one per video card and one per page
+FRAGMENT_CACHE_SIZE = int(os.getenv('BREVIFY_FRAGMENT_CACHE_SIZE', '5000'))
+
+class FragmentCache:
+    """LRU cache of rendered HTML that is invalidated when videos are saved.
+
+    Page keys include a version for each channel and one for the feed of all
+    channels. Saving new videos for a channel moves both on, so stale pages
+    are never looked up again and age out of the cache.
+    """
+
+    def __init__(self, maxsize: int = FRAGMENT_CACHE_SIZE):
+        """Initialize an empty cache."""
+        self._fragments = LRUCache(maxsize=maxsize)
+        self._feed_version = 0
+        self._channel_versions: Dict[str, int] = {}
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Get a rendered fragment, or None if it is not cached."""
+        return self._fragments.get(key)
+
+    def set(self, key: Hashable, html: str):
+        """Store a rendered fragment."""
+        self._fragments.set(key, html)
+
+    def feed_key(self, cursor: Optional[str]) -> tuple:
+        """Key of a page of the feed of all channels."""
+        return ('feed', self._feed_version, cursor)
+
+    def channel_key(self, channel_id: str, latest_update) -> tuple:
+        """Key of the video list of one channel."""
+        return ('channel', channel_id, self._channel_versions.get(channel_id, 0), latest_update)
+
+    def invalidate(self, channel_id: str):
+        """Stop serving pages that may be missing a channel's new videos."""
+        self._channel_versions[channel_id] = self._channel_versions.get(channel_id, 0) + 1
+        self._feed_version += 1
+
+    def clear(self):
+        """Remove every fragment."""
+        self._fragments.clear()
+
+# Shared by every request
+fragment_cache = FragmentCache()
@@ -0,0 +1,81 @@
+"""Background job that removes old URL history entries."""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.services.url_history_service import CLEANUP_BATCH_SIZE, delete_old_entries_batch
+from app.services.url_typeahead import url_typeahead
+
+logger = logging.getLogger(__name__)
+
+# Days after which non-favorite history entries are removed; 0 keeps everything
+HISTORY_RETENTION_DAYS = int(os.getenv('BREVIFY_HISTORY_RETENTION_DAYS', '0'))
+
+# Seconds between cleanups
+RETENTION_INTERVAL = float(os.getenv('BREVIFY_RETENTION_INTERVAL', str(6 * 60 * 60)))
+
+# Seconds to wait between batches, so other writers get the lock in between
+RETENTION_BATCH_PAUSE = 0.1
+
+async def purge_old_entries(
+    days: int,
+    batch_size: int = CLEANUP_BATCH_SIZE,
+    pause: float = RETENTION_BATCH_PAUSE
+) -> int:
+    """Remove non-favorite entries older than ``days`` without blocking.
+
+    Each batch is deleted in a worker thread in its own transaction, and the
+    event loop is free between batches. Returns the number of entries removed.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = 0
+    while True:
+        ids = await asyncio.to_thread(delete_old_entries_batch, cutoff, batch_size)
+        for url_id in ids:
+            url_typeahead.remove(url_id)
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            return deleted
+        await asyncio.sleep(pause)
+
+class HistoryRetention:
+    """Periodically removes URL history entries older than ``days``.
+
+    Favorites are always kept.
+    """
+
+    def __init__(self, days: int = HISTORY_RETENTION_DAYS, interval: float = RETENTION_INTERVAL):
+        """Initialize the job."""
+        self.days = days
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start removing old entries in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"URL history retention started, keeping {self.days} days")
+
+    async def stop(self):
+        """Stop the job and wait for the current batch to be cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("URL history retention stopped")
+
+    async def _run(self):
+        """Remove old entries every ``interval`` seconds until cancelled."""
+        while True:
+            try:
+                deleted = await purge_old_entries(self.days)
+                if deleted:
+                    logger.info(f"Removed {deleted} old URL history entries")
+            except Exception as e:
+                logger.error(f"Error removing old URL history entries: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,287 @@
+"""Streaming calls to LLM providers.
+
+Each provider turns a prompt into an HTTP request and turns the events of
+its server-sent event stream into text deltas and token counts. The engine
+keeps one pooled ``httpx.AsyncClient`` per provider and base URL, limits how
+many requests each provider has in flight, and tracks token usage.
+
+Base URLs can be overridden, which is how the engine is pointed at a local
+mock server, and the engine can be given an httpx transport to send every
+request through, such as an ``httpx.MockTransport`` in tests.
+"""
+import json
+import logging
+import math
+import os
+from asyncio import Semaphore
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+
+if TYPE_CHECKING:
+    from app.services.ai_service import AIServiceConfig
+
+logger = logging.getLogger(__name__)
+
+# Time to wait for a provider to connect, and then between streamed events
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = float(os.getenv('BREVIFY_AI_READ_TIMEOUT', '120'))
+
+# Rough characters per token, for providers that do not report usage
+CHARS_PER_TOKEN = 4
+
+class LLMError(Exception):
+    """A provider rejected a request or failed while streaming."""
+
+@dataclass
+class TokenUsage:
+    """Tokens used by requests, as reported by the provider or estimated."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    def add(self, other: 'TokenUsage'):
+        """Add another request's usage to this one."""
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+
+@dataclass
+class StreamDelta:
+    """What one streamed event carried; token counts are None if absent."""
+    text: str = ''
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+class LLMProvider:
+    """Translates between the engine and one provider's streaming API."""
+
+    name = ''
+    default_base_url = ''
+
+    def request(self, config: 'AIServiceConfig', prompt: str, api_key: str) -> Tuple[str, Dict, Dict]:
+        """Build the path, headers and JSON body of a streaming request."""
+        raise NotImplementedError
+
+    def parse(self, event: str, data: Dict) -> StreamDelta:
+        """Read one server-sent event. Raises LLMError for error events."""
+        raise NotImplementedError
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions."""
+
+    name = 'openai'
+    default_base_url = 'https://api.openai.com/v1'
+
+    def request(self, config, prompt, api_key):
+        return '/chat/completions', {'Authorization': f'Bearer {api_key}'}, {
+            'model': config.model,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': config.max_tokens,
+            'temperature': config.temperature,
+            'stream': True,
+            'stream_options': {'include_usage': True}
+        }
+
+    def parse(self, event, data):
+        if 'error' in data:
+            raise LLMError(f"openai: {data['error'].get('message', data['error'])}")
+        delta = StreamDelta()
+        for choice in data.get('choices') or []:
+            delta.text += (choice.get('delta') or {}).get('content') or ''
+        usage = data.get('usage')
+        if usage:
+            delta.input_tokens = usage.get('prompt_tokens')
+            delta.output_tokens = usage.get('completion_tokens')
+        return delta
+
+class AnthropicProvider(LLMProvider):
+    """Anthropic messages."""
+
+    name = 'anthropic'
+    default_base_url = 'https://api.anthropic.com/v1'
+
+    def request(self, config, prompt, api_key):
+        return '/messages', {'x-api-key': api_key, 'anthropic-version': '2023-06-01'}, {
+            'model': config.model,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': config.max_tokens,
+            'temperature': config.temperature,
+            'stream': True
+        }
+
+    def parse(self, event, data):
+        event = event or data.get('type', '')
+        if event == 'error':
+            raise LLMError(f"anthropic: {data.get('error', {}).get('message', data)}")
+        delta = StreamDelta()
+        if event == 'content_block_delta':
+            delta.text = data.get('delta', {}).get('text', '')
+        elif event == 'message_start':
+            usage = data.get('message', {}).get('usage', {})
+            delta.input_tokens = usage.get('input_tokens')
+            delta.output_tokens = usage.get('output_tokens')
+        elif event == 'message_delta':
+            delta.output_tokens = data.get('usage', {}).get('output_tokens')
+        return delta
+
+class GoogleProvider(LLMProvider):
+    """Google Gemini generateContent."""
+
+    name = 'google'
+    default_base_url = 'https://generativelanguage.googleapis.com/v1beta'
+
+    def request(self, config, prompt, api_key):
+        return f'/models/{config.model}:streamGenerateContent?alt=sse', {'x-goog-api-key': api_key}, {
+            'contents': [{'role': 'user', 'parts': [{'text': prompt}]}],
+            'generationConfig': {
+                'maxOutputTokens': config.max_tokens,
+                'temperature': config.temperature
+            }
+        }
+
+    def parse(self, event, data):
+        if 'error' in data:
+            raise LLMError(f"google: {data['error'].get('message', data['error'])}")
+        delta = StreamDelta()
+        for candidate in data.get('candidates') or []:
+            for part in (candidate.get('content') or {}).get('parts') or []:
+                delta.text += part.get('text', '')
+        usage = data.get('usageMetadata')
+        if usage:
+            delta.input_tokens = usage.get('promptTokenCount')
+            delta.output_tokens = usage.get('candidatesTokenCount')
+        return delta
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the number of tokens in ``text``."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to about ``max_tokens``, by the estimate of ``estimate_tokens``."""
+    return text[:max(max_tokens, 0) * CHARS_PER_TOKEN]
+
+async def iter_sse(response: httpx.Response) -> AsyncIterator[Tuple[str, str]]:
+    """Yield the (event, data) pairs of a server-sent event stream."""
+    event = ''
+    data = []
+    async for line in response.aiter_lines():
+        if not line:
+            if data:
+                yield event, '\n'.join(data)
+            event = ''
+            data = []
+        elif line.startswith(':'):
+            continue
+        else:
+            field, _, value = line.partition(':')
+            value = value[1:] if value.startswith(' ') else value
+            if field == 'event':
+                event = value
+            elif field == 'data':
+                data.append(value)
+    if data:
+        yield event, '\n'.join(data)
+
+class LLMEngine:
+    """Runs streaming requests against registered providers."""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """Initialize with the built-in providers and no open connections."""
+        self.transport = transport
+        self.providers: Dict[str, LLMProvider] = {}
+        self.usage: Dict[str, TokenUsage] = {}
+        self._clients: Dict[Tuple[str, str, int], httpx.AsyncClient] = {}
+        self._limits: Dict[Tuple[str, int], Semaphore] = {}
+        for provider in (OpenAIProvider(), AnthropicProvider(), GoogleProvider()):
+            self.register(provider)
+
+    def register(self, provider: LLMProvider):
+        """Add a provider, or replace the one with the same name."""
+        self.providers[provider.name] = provider
+
+    async def stream(self, config: 'AIServiceConfig', prompt: str,
+                     usage: Optional[TokenUsage] = None) -> AsyncIterator[str]:
+        """Stream the completion of ``prompt`` as text deltas.
+
+        Prompts longer than ``config.max_input_tokens`` are cut to fit, and at
+        most ``config.max_tokens`` are generated. The tokens used are added to
+        ``usage`` if given, and to the totals in ``self.usage``. Raises
+        LLMError if the provider fails.
+        """
+        name = config.service_type.value
+        provider = self.providers.get(name)
+        if provider is None:
+            raise LLMError(f"No provider registered for {name}")
+        api_key = os.getenv(config.api_key_env)
+        if not api_key:
+            raise LLMError(f"{config.api_key_env} is not set")
+
+        if estimate_tokens(prompt) > config.max_input_tokens:
+            logger.warning(f"{name} prompt of about {estimate_tokens(prompt)} tokens cut to {config.max_input_tokens}")
+            prompt = truncate_to_tokens(prompt, config.max_input_tokens)
+
+        path, headers, body = provider.request(config, prompt, api_key)
+        client = self._client(provider, config)
+        request_usage = TokenUsage()
+        reported = StreamDelta()
+        async with self._limit(name, config.max_concurrency):
+            try:
+                async with client.stream('POST', path, headers=headers, json=body) as response:
+                    if response.status_code >= 400:
+                        detail = (await response.aread()).decode('utf-8', 'replace')[:500]
+                        raise LLMError(f"{name} returned {response.status_code}: {detail}")
+                    async for event, data in iter_sse(response):
+                        if data == '[DONE]':
+                            break
+                        delta = provider.parse(event, json.loads(data))
+                        reported.input_tokens = delta.input_tokens or reported.input_tokens
+                        reported.output_tokens = delta.output_tokens or reported.output_tokens
+                        if delta.text:
+                            request_usage.output_tokens += estimate_tokens(delta.text)
+                            yield delta.text
+            except (httpx.HTTPError, json.JSONDecodeError) as e:
+                logger.warning(f"{name} request failed: {e}")
+                raise LLMError(f"{name} request failed: {e}") from e
+            finally:
+                # Estimates stand in for counts the provider did not report
+                request_usage.input_tokens = reported.input_tokens or estimate_tokens(prompt)
+                request_usage.output_tokens = reported.output_tokens or request_usage.output_tokens
+                self.usage.setdefault(name, TokenUsage()).add(request_usage)
+                if usage is not None:
+                    usage.add(request_usage)
+
+    async def close(self):
+        """Close every pooled connection."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    def _client(self, provider: LLMProvider, config: 'AIServiceConfig') -> httpx.AsyncClient:
+        """Get the pooled client for a provider's base URL and concurrency."""
+        key = (provider.name, config.base_url or provider.default_base_url, config.max_concurrency)
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = httpx.AsyncClient(
+                base_url=key[1],
+                transport=self.transport,
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=config.max_concurrency,
+                    max_keepalive_connections=config.max_concurrency
+                )
+            )
+        return client
+
+    def _limit(self, name: str, max_concurrency: int) -> Semaphore:
+        """Get the semaphore bounding a provider's requests in flight.
+
+        Kept per limit as well as per provider, so a changed setting takes
+        effect for the requests that follow.
+        """
+        limit = self._limits.get((name, max_concurrency))
+        if limit is None:
+            limit = self._limits[(name, max_concurrency)] = Semaphore(max_concurrency)
+        return limit
+
+# Shared by every request, so connections to providers are reused
+llm_engine = LLMEngine()
@@ -0,0 +1,50 @@
+"""Small in-memory LRU cache used by the services."""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+class LRUCache:
+    """Least-recently-used cache with an optional time-to-live per entry.
+
+    Once ``maxsize`` entries are stored, the least recently used one is evicted
+    to make room for a new one.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """Initialize an empty cache."""
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value, or ``default`` if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, optionally expiring after ``ttl`` seconds."""
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value and return it, or ``default`` if it is missing."""
+        entry = self._entries.pop(key, None)
+        return entry[0] if entry is not None else default
+
+    def clear(self):
+        """Remove every value."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
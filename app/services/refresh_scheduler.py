@@ -0,0 +1,168 @@
+"""Background scheduler that keeps cached channel videos up to date."""
+import asyncio
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, or_, select
+
+from app.db.database import engine
+from app.models.models import Channel, Video
+from app.services.youtube_client import YouTubeClient, get_youtube_client
+from app.services.youtube_service import YouTubeService
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for channels that are due
+SCHEDULER_TICK = float(os.getenv('BREVIFY_SCHEDULER_TICK', '30'))
+
+# Maximum number of channels refreshed at the same time
+SCHEDULER_CONCURRENCY = int(os.getenv('BREVIFY_SCHEDULER_CONCURRENCY', '4'))
+
+# Maximum number of due channels picked up per tick
+SCHEDULER_BATCH = int(os.getenv('BREVIFY_SCHEDULER_BATCH', '50'))
+
+# Daily YouTube API quota units the process may spend before polling pauses
+DAILY_QUOTA_BUDGET = int(os.getenv('BREVIFY_DAILY_QUOTA_BUDGET', '8000'))
+
+# Bounds on how often a channel is polled, in seconds
+MIN_POLL_INTERVAL = 15 * 60
+MAX_POLL_INTERVAL = 24 * 60 * 60
+DEFAULT_POLL_INTERVAL = 60 * 60
+
+# Fraction of a channel's typical gap between uploads to wait between polls
+POLL_FRACTION = 0.25
+
+# Random spread applied to each interval so channels do not poll in lockstep
+POLL_JITTER = 0.1
+
+# Number of recent uploads used to estimate how often a channel uploads
+UPLOAD_HISTORY = 10
+
+def poll_interval(published: List[datetime]) -> int:
+    """Work out how many seconds to wait before polling a channel again.
+
+    Channels that upload often are polled often, quiet channels rarely.
+    ``published`` holds the channel's recent upload dates, newest first.
+    """
+    if len(published) < 2:
+        return DEFAULT_POLL_INTERVAL
+
+    gaps = sorted(
+        (newer - older).total_seconds()
+        for newer, older in zip(published, published[1:])
+    )
+    typical_gap = gaps[len(gaps) // 2]
+
+    # A channel that has gone quiet for longer than usual slows down too
+    silence = (datetime.utcnow() - published[0]).total_seconds()
+    typical_gap = max(typical_gap, silence)
+
+    interval = typical_gap * POLL_FRACTION
+    return int(min(max(interval, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL))
+
+class RefreshScheduler:
+    """Refreshes channels in the background on adaptive intervals.
+
+    Each tick picks the channels whose ``next_poll_at`` has passed and
+    refreshes them ``concurrency`` at a time. The quota spent is checked before
+    each group, so polling stops part way through a tick once the process has
+    spent ``quota_budget`` API units for the day. A group can overshoot the
+    budget by at most what its channels' refreshes cost.
+    """
+
+    def __init__(
+        self,
+        client: Optional[YouTubeClient] = None,
+        concurrency: int = SCHEDULER_CONCURRENCY,
+        quota_budget: int = DAILY_QUOTA_BUDGET,
+        tick: float = SCHEDULER_TICK
+    ):
+        """Initialize the scheduler."""
+        self.client = client or get_youtube_client()
+        self.concurrency = concurrency
+        self.quota_budget = quota_budget
+        self.tick = tick
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start polling in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Channel refresh scheduler started")
+
+    async def stop(self):
+        """Stop polling and wait for the current tick to be cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Channel refresh scheduler stopped")
+
+    async def _run(self):
+        """Poll due channels until cancelled."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Error in channel refresh scheduler: {e}")
+            await asyncio.sleep(self.tick)
+
+    async def run_once(self) -> int:
+        """Refresh the channels that are due and return how many were refreshed."""
+        now = datetime.utcnow()
+        refreshed = 0
+        with Session(engine) as db:
+            statement = select(Channel.id).where(
+                or_(Channel.next_poll_at == None, Channel.next_poll_at <= now)
+            ).order_by(Channel.next_poll_at).limit(SCHEDULER_BATCH)
+            channel_ids = db.exec(statement).all()
+
+            service = YouTubeService(db, self.client)
+            for start in range(0, len(channel_ids), self.concurrency):
+                if self.client.quota_used >= self.quota_budget:
+                    logger.warning(
+                        f"Daily YouTube quota budget spent, {len(channel_ids) - refreshed} due channels left for later"
+                    )
+                    break
+                group = channel_ids[start:start + self.concurrency]
+                await service.refresh_channels(group, concurrency=self.concurrency, deadline=self.tick)
+                self._schedule(db, group)
+                refreshed += len(group)
+
+        if refreshed:
+            logger.info(f"Refreshed {refreshed} channels")
+        return refreshed
+
+    def _schedule(self, db: Session, channel_ids: List[str]):
+        """Set when each channel should be polled next."""
+        # The most recent upload dates of every channel, in one query
+        recent = select(
+            Video.channel_id,
+            Video.published_at,
+            func.row_number().over(
+                partition_by=Video.channel_id,
+                order_by=Video.published_at.desc()
+            ).label('position')
+        ).where(Video.channel_id.in_(channel_ids)).subquery()
+        statement = select(recent.c.channel_id, recent.c.published_at).where(
+            recent.c.position <= UPLOAD_HISTORY
+        ).order_by(recent.c.channel_id, recent.c.position)
+        published: Dict[str, List[datetime]] = {channel_id: [] for channel_id in channel_ids}
+        for channel_id, published_at in db.exec(statement):
+            published[channel_id].append(published_at)
+
+        now = datetime.utcnow()
+        for channel in db.exec(select(Channel).where(Channel.id.in_(channel_ids))):
+            interval = poll_interval(published[channel.id])
+            interval *= random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+            channel.poll_interval = int(interval)
+            channel.next_poll_at = now + timedelta(seconds=interval)
+            db.add(channel)
+        db.commit()
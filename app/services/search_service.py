@@ -0,0 +1,110 @@
+"""Full-text search over cached videos and transcripts."""
+import html
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, select
+
+from app.db import search_index
+from app.db.search_index import MATCH_END, MATCH_START, SEARCH_TRANSCRIPTS, SEARCH_VIDEOS, match_words
+from app.models.models import Video
+
+logger = logging.getLogger(__name__)
+
+# Transcript passages fetched per result, so one long video cannot fill the page
+TRANSCRIPT_HITS_PER_RESULT = 5
+
+# Passages shown for each video
+SNIPPETS_PER_VIDEO = 3
+
+@dataclass
+class TranscriptSnippet:
+    """Matching passage of a transcript."""
+    start: Optional[float]  # Seconds into the video, None if unknown
+    text: str
+    url: str  # Link to the passage
+
+@dataclass
+class SearchHit:
+    """Video matching a search, with the passages that matched."""
+    video_id: str
+    url: str
+    score: float  # Lower is better, as in SQLite's bm25()
+    title: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    snippet: Optional[str] = None  # Matching part of the title or description
+    transcript: List[TranscriptSnippet] = field(default_factory=list)
+
+def _highlight(snippet: Optional[str]) -> Optional[str]:
+    """Turn a snippet from SQLite into HTML, with matched terms in ``<mark>``."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+def _watch_url(video_id: str, start: Optional[float] = None) -> str:
+    """Link to a video, optionally at a given second."""
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    if start:
+        url += f"&t={int(start)}s"
+    return url
+
+class SearchService:
+    """Searches video titles, descriptions and cached transcripts.
+
+    Matching, ranking and snippets all happen in SQLite, so only the hits
+    that are returned are read into Python.
+    """
+
+    def __init__(self, db: Session):
+        """Initialize the service with a database session."""
+        self.db = db
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """Get the videos best matching every word of the query."""
+        if not query.split():
+            return []
+
+        params = {'query': match_words(query)}
+        hits: Dict[str, SearchHit] = {}
+
+        rows = self._hits('video_fts', SEARCH_VIDEOS, {**params, 'limit': limit})
+        for video_id, snippet, score in rows:
+            hits[video_id] = SearchHit(
+                video_id=video_id,
+                url=_watch_url(video_id),
+                score=score,
+                snippet=_highlight(snippet)
+            )
+
+        rows = self._hits('transcript_fts', SEARCH_TRANSCRIPTS, {**params, 'limit': limit * TRANSCRIPT_HITS_PER_RESULT})
+        for video_id, start_ms, snippet, score in rows:
+            hit = hits.get(video_id)
+            if hit is None:
+                hit = hits[video_id] = SearchHit(video_id=video_id, url=_watch_url(video_id), score=score)
+            hit.score = min(hit.score, score)
+            if len(hit.transcript) < SNIPPETS_PER_VIDEO:
+                start = start_ms / 1000 if start_ms is not None else None
+                hit.transcript.append(TranscriptSnippet(start, _highlight(snippet), _watch_url(video_id, start)))
+
+        results = sorted(hits.values(), key=lambda hit: hit.score)[:limit]
+        self._add_video_details(results)
+        return results
+
+    def _hits(self, index: str, statement, params: dict):
+        """Run a search query, or find nothing if its index does not exist."""
+        if index not in search_index.available_indexes:
+            return []
+        return self.db.execute(statement, params)
+
+    def _add_video_details(self, hits: List[SearchHit]):
+        """Fill in titles and thumbnails of hits for videos in the cache."""
+        if not hits:
+            return
+        statement = select(Video.id, Video.title, Video.thumbnail_url).where(
+            Video.id.in_([hit.video_id for hit in hits])
+        )
+        details = {video_id: (title, thumbnail_url) for video_id, title, thumbnail_url in self.db.exec(statement)}
+        for hit in hits:
+            if hit.video_id in details:
+                hit.title, hit.thumbnail_url = details[hit.video_id]
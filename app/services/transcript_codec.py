@@ -0,0 +1,76 @@
+"""Compact binary encoding for transcript segments.
+
+A transcript is stored as one zlib-compressed blob laid out as::
+
+    version   uint8
+    count     uint32
+    segments  count x (start_ms uint32, duration_ms uint32, text_end uint32)
+    text      UTF-8 text of every segment joined by newlines
+
+``text_end`` is the byte offset in ``text`` where each segment ends, so the
+plain text is a single slice and timings never have to be parsed to get it.
+"""
+import struct
+import zlib
+from typing import Dict, List, Tuple
+
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<BI')
+_SEGMENT = struct.Struct('<III')
+
+def encode_segments(segments: List[Dict]) -> bytes:
+    """Encode segments as returned by YouTubeTranscriptApi."""
+    texts = [segment['text'].encode('utf-8') for segment in segments]
+
+    table = bytearray(_HEADER.pack(FORMAT_VERSION, len(segments)))
+    offset = 0
+    for segment, text in zip(segments, texts):
+        offset += len(text)
+        table += _SEGMENT.pack(
+            round(segment['start'] * 1000),
+            round(segment['duration'] * 1000),
+            offset
+        )
+        # Account for the newline that follows every segment but the last
+        offset += 1
+
+    return zlib.compress(bytes(table) + b'\n'.join(texts), 9)
+
+def _split(blob: bytes):
+    """Decompress a blob into its segment count, segment table and text."""
+    data = zlib.decompress(blob)
+    version, count = _HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unknown transcript format version: {version}")
+    text_start = _HEADER.size + count * _SEGMENT.size
+    return count, data[_HEADER.size:text_start], data[text_start:]
+
+def decode_text(blob: bytes) -> str:
+    """Get the plain text of a transcript, one segment per line."""
+    _, _, text = _split(blob)
+    return text.decode('utf-8')
+
+def decode_timings(blob: bytes) -> List[Tuple[int, int, str]]:
+    """Get the (start_ms, duration_ms, text) of every segment of a transcript."""
+    count, table, text = _split(blob)
+    timings = []
+    text_start = 0
+    for start_ms, duration_ms, text_end in _SEGMENT.iter_unpack(table):
+        timings.append((start_ms, duration_ms, text[text_start:text_end].decode('utf-8')))
+        text_start = text_end + 1
+    return timings
+
+def decode_segments(blob: bytes) -> List[Dict]:
+    """Get the segments of a transcript with their timings in seconds."""
+    count, table, text = _split(blob)
+    segments = []
+    text_start = 0
+    for start_ms, duration_ms, text_end in _SEGMENT.iter_unpack(table):
+        segments.append({
+            'text': text[text_start:text_end].decode('utf-8'),
+            'start': start_ms / 1000,
+            'duration': duration_ms / 1000
+        })
+        text_start = text_end + 1
+    return segments
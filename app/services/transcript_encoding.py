@@ -0,0 +1,86 @@
+"""Response bodies for transcripts and their content encodings.
+
+Two formats are served: ``text``, the plain transcript as the API has always
+returned it, and ``segments``, a compact array of ``[start_ms, duration_ms,
+text]`` rows for clients that need timings. Bodies are compressed with the
+best encoding the client accepts. gzip is always available; brotli and zstd
+are used when the ``brotli`` and ``zstandard`` packages are installed.
+"""
+import gzip
+import json
+from typing import Callable, Dict, List, Optional
+
+from app.services.transcript_codec import decode_text, decode_timings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TRANSCRIPT_FORMATS = ('text', 'segments')
+
+# Bodies are compressed once and stored, so the slowest, smallest settings are used
+_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    'gzip': lambda body: gzip.compress(body, 9, mtime=0),
+}
+if brotli is not None:
+    _COMPRESSORS['br'] = lambda body: brotli.compress(body, quality=11)
+if zstandard is not None:
+    _COMPRESSORS['zstd'] = zstandard.ZstdCompressor(level=19).compress
+
+# Encodings this server can produce, most preferred first
+ENCODINGS = [name for name in ('zstd', 'br', 'gzip') if name in _COMPRESSORS]
+
+def negotiate(accept_encoding: Optional[str]) -> str:
+    """Pick the preferred encoding allowed by an Accept-Encoding header.
+
+    Returns ``identity`` if the client accepts none of ``ENCODINGS``.
+    """
+    weights = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    for name in ENCODINGS:
+        if weights.get(name, weights.get('*', 0.0)) > 0:
+            return name
+    return 'identity'
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with one of ``ENCODINGS``, or return it for ``identity``."""
+    if encoding == 'identity':
+        return body
+    return _COMPRESSORS[encoding](body)
+
+def _dump(content: dict) -> bytes:
+    """Serialize JSON the same way as FastAPI's JSONResponse."""
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def render(format: str, language: str, blob: bytes) -> bytes:
+    """Render the uncompressed body of a stored transcript."""
+    if format == 'segments':
+        return _dump({'language': language, 'segments': [list(row) for row in decode_timings(blob)]})
+    return _dump({'transcript': decode_text(blob)})
+
+def render_text(format: str, transcript: str) -> bytes:
+    """Render the body of a transcript that only has text and no timings."""
+    if format == 'segments':
+        segments: List[list] = [[None, None, line] for line in transcript.split('\n')]
+        return _dump({'language': None, 'segments': segments})
+    return _dump({'transcript': transcript})
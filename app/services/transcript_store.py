@@ -0,0 +1,282 @@
+"""Service for caching transcripts of any video."""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, delete, func, select, update
+
+from app.models.models import Transcript, TranscriptBody, TranscriptChunk
+from app.services.transcript_codec import decode_segments, encode_segments
+from app.services.transcript_encoding import compress, render
+
+logger = logging.getLogger(__name__)
+
+# Total stored transcript size before the least recently used are evicted
+TRANSCRIPT_CACHE_BYTES = int(os.getenv('BREVIFY_TRANSCRIPT_CACHE_MB', '256')) * 1024 * 1024
+
+# Eviction frees space down to this fraction of the budget
+EVICTION_TARGET = 0.9
+
+# Reads only record access time if it is older than this, to avoid a write per read
+ACCESS_RESOLUTION = timedelta(hours=1)
+
+# Total size of the store, summed from the table once and then kept up to date
+# by the store's writes, so a write does not have to scan the table
+_total_size: Optional[int] = None
+_total_size_lock = threading.Lock()
+
+# Seconds of speech grouped into one search chunk, so a hit points at a moment
+SEARCH_CHUNK_SECONDS = 30
+
+def chunk_segments(segments: List[Dict], seconds: float = SEARCH_CHUNK_SECONDS) -> List[Tuple[float, str]]:
+    """Group segments into (start, text) chunks spanning about ``seconds`` each."""
+    chunks = []
+    start = None
+    texts = []
+    for segment in segments:
+        if start is None:
+            start = segment['start']
+        texts.append(segment['text'])
+        if segment['start'] + segment['duration'] - start >= seconds:
+            chunks.append((start, ' '.join(texts)))
+            start = None
+            texts = []
+    if texts:
+        chunks.append((start, ' '.join(texts)))
+    return chunks
+
+class TranscriptStore:
+    """Caches transcripts keyed by video ID and language.
+
+    Unlike ``Video.transcript`` this works for any video, whether or not its
+    channel has been added. Transcripts are stored as compressed segments with
+    their timings; use ``transcript_codec`` to decode them. The total size is
+    kept under ``max_bytes`` by evicting the least recently read transcripts.
+    The text of each transcript is also kept in ``TranscriptChunk`` rows,
+    which the full-text search index is built from, and each response body
+    served for it is kept in a ``TranscriptBody`` row, counted in its size.
+    """
+
+    def __init__(self, db: Session, max_bytes: int = TRANSCRIPT_CACHE_BYTES):
+        """Initialize the store with a database session."""
+        self.db = db
+        self.max_bytes = max_bytes
+
+    def get(self, video_id: str, languages: Sequence[str] = ('en',)) -> Optional[Transcript]:
+        """Get the cached transcript in the first available language."""
+        statement = select(Transcript).where(
+            Transcript.video_id == video_id,
+            Transcript.language.in_(languages)
+        )
+        transcripts = {t.language: t for t in self.db.exec(statement).all()}
+        for language in languages:
+            transcript = transcripts.get(language)
+            if transcript:
+                self._touch(transcript)
+                return transcript
+        return None
+
+    def version(self, video_id: str, languages: Sequence[str] = ('en',)) -> Optional[Tuple[str, datetime]]:
+        """Get the language and fetch time of the transcript ``get`` would return.
+
+        Only reads metadata, never the segments, so it is cheap enough to
+        answer conditional requests with. A stored transcript never changes
+        until it is fetched again, so the pair identifies its content.
+        """
+        statement = select(Transcript.language, Transcript.fetched_at).where(
+            Transcript.video_id == video_id,
+            Transcript.language.in_(languages)
+        )
+        fetched = dict(self.db.exec(statement).all())
+        for language in languages:
+            if language in fetched:
+                return language, fetched[language]
+        return None
+
+    def body(self, video_id: str, format: str, encoding: str,
+             languages: Sequence[str] = ('en',)) -> Optional[bytes]:
+        """Get a response body for the transcript ``get`` would return.
+
+        The body is rendered and compressed the first time it is asked for and
+        stored, so later requests only read it back.
+        """
+        statement = select(Transcript.language, Transcript.last_accessed).where(
+            Transcript.video_id == video_id,
+            Transcript.language.in_(languages)
+        )
+        accessed = dict(self.db.exec(statement).all())
+        language = next((language for language in languages if language in accessed), None)
+        if language is None:
+            return None
+
+        stored = self.db.exec(select(TranscriptBody.body).where(
+            TranscriptBody.video_id == video_id,
+            TranscriptBody.language == language,
+            TranscriptBody.format == format,
+            TranscriptBody.encoding == encoding
+        )).first()
+        if stored is not None:
+            if datetime.utcnow() - accessed[language] >= ACCESS_RESOLUTION:
+                self.db.exec(update(Transcript).where(
+                    Transcript.video_id == video_id,
+                    Transcript.language == language
+                ).values(last_accessed=datetime.utcnow()))
+                self.db.commit()
+            return stored
+
+        blob = self.db.exec(select(Transcript.segments).where(
+            Transcript.video_id == video_id,
+            Transcript.language == language
+        )).one()
+        body = compress(render(format, language, blob), encoding)
+        # Another request may have stored the same body in the meantime
+        inserted = self.db.exec(insert(TranscriptBody).values(
+            video_id=video_id, language=language, format=format, encoding=encoding, body=body
+        ).on_conflict_do_nothing()).rowcount
+        self.db.exec(update(Transcript).where(
+            Transcript.video_id == video_id,
+            Transcript.language == language
+        ).values(size=Transcript.size + len(body) * inserted, last_accessed=datetime.utcnow()))
+        self.db.commit()
+        self._add_size(len(body) * inserted)
+        return body
+
+    def put(self, video_id: str, language: str, source: str, segments: List[Dict]) -> Transcript:
+        """Store a transcript, evicting old ones if the store is over budget.
+
+        This blocks on the database, so async callers run it in a worker thread.
+        """
+        replaced = self.db.exec(select(Transcript.size).where(
+            Transcript.video_id == video_id,
+            Transcript.language == language
+        )).first() or 0
+        blob = encode_segments(segments)
+        transcript = Transcript(
+            video_id=video_id,
+            language=language,
+            source=source,
+            segments=blob,
+            size=len(blob)
+        )
+        transcript = self.db.merge(transcript)
+        self._discard_bodies(video_id, language)
+        self._index(video_id, language, segments)
+        self.db.commit()
+        self._add_size(len(blob) - replaced)
+
+        if self.total_size() > self.max_bytes:
+            self.evict()
+        return transcript
+
+    def total_size(self) -> int:
+        """Total size in bytes of every cached transcript.
+
+        The table is only summed the first time; after that the running total
+        kept by the store's writes is returned.
+        """
+        global _total_size
+        with _total_size_lock:
+            if _total_size is None:
+                _total_size = self.db.exec(select(func.coalesce(func.sum(Transcript.size), 0))).one()
+            return _total_size
+
+    def evict(self) -> int:
+        """Remove least recently read transcripts until under budget.
+
+        Returns the number of transcripts removed.
+        """
+        excess = self.total_size() - int(self.max_bytes * EVICTION_TARGET)
+        if excess <= 0:
+            return 0
+
+        # Only keys and sizes are read, never the segments
+        statement = select(
+            Transcript.video_id, Transcript.language, Transcript.size
+        ).order_by(Transcript.last_accessed)
+        victims = []
+        freed = 0
+        for video_id, language, size in self.db.exec(statement):
+            if excess <= 0:
+                break
+            victims.append((video_id, language))
+            excess -= size
+            freed += size
+
+        for video_id, language in victims:
+            self.db.exec(delete(Transcript).where(
+                Transcript.video_id == video_id,
+                Transcript.language == language
+            ))
+            self._discard_bodies(video_id, language)
+            self._unindex(video_id, language)
+        self.db.commit()
+        self._add_size(-freed)
+        logger.info(f"Evicted {len(victims)} transcripts from the cache")
+        return len(victims)
+
+    def index_missing(self) -> int:
+        """Build search chunks for cached transcripts that have none.
+
+        Returns the number of transcripts indexed.
+        """
+        indexed = select(TranscriptChunk.id).where(
+            TranscriptChunk.video_id == Transcript.video_id,
+            TranscriptChunk.language == Transcript.language
+        )
+        statement = select(Transcript.video_id, Transcript.language).where(~indexed.exists())
+        missing = self.db.exec(statement).all()
+
+        for video_id, language in missing:
+            blob = self.db.exec(select(Transcript.segments).where(
+                Transcript.video_id == video_id,
+                Transcript.language == language
+            )).one()
+            self._index(video_id, language, decode_segments(blob))
+            self.db.commit()
+
+        if missing:
+            logger.info(f"Indexed {len(missing)} cached transcripts for search")
+        return len(missing)
+
+    def _index(self, video_id: str, language: str, segments: List[Dict]):
+        """Replace the search chunks of a transcript."""
+        self._unindex(video_id, language)
+        for start, text in chunk_segments(segments):
+            self.db.add(TranscriptChunk(
+                video_id=video_id,
+                language=language,
+                start_ms=round(start * 1000),
+                text=text
+            ))
+
+    def _unindex(self, video_id: str, language: str):
+        """Remove the search chunks of a transcript."""
+        self.db.exec(delete(TranscriptChunk).where(
+            TranscriptChunk.video_id == video_id,
+            TranscriptChunk.language == language
+        ))
+
+    def _discard_bodies(self, video_id: str, language: str):
+        """Remove the stored response bodies of a transcript."""
+        self.db.exec(delete(TranscriptBody).where(
+            TranscriptBody.video_id == video_id,
+            TranscriptBody.language == language
+        ))
+
+    def _add_size(self, change: int):
+        """Add a committed change in size to the running total, once there is one."""
+        global _total_size
+        with _total_size_lock:
+            if _total_size is not None:
+                _total_size += change
+
+    def _touch(self, transcript: Transcript):
+        """Record that a transcript was read."""
+        now = datetime.utcnow()
+        if now - transcript.last_accessed >= ACCESS_RESOLUTION:
+            transcript.last_accessed = now
+            self.db.add(transcript)
+            self.db.commit()
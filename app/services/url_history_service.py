@@ -1,11 +1,63 @@
 """
 Service for managing URL history operations.
 """
-from datetime import datetime
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from app.models.url_history import URLHistory, Tag
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import case, delete, desc, false, select, text
+from app.db import search_index
+from app.db.database import engine
+from app.db.search_index import MIN_QUERY_LENGTH, SEARCH_URL_HISTORY, match_phrase
+from app.models.url_history import URLHistory, Tag, url_history_dict, url_tags
+from app.services.lru_cache import LRUCache
+from app.services.url_typeahead import url_typeahead
+
+# Number of tag names whose IDs are kept in memory
+TAG_CACHE_SIZE = 4096
+
+# Rows looked up per query by the bulk methods, well under SQLite's
+# limit on bound parameters
+BULK_CHUNK_SIZE = 500
+
+# Creates the tags that do not exist yet, leaving existing ones alone
+INSERT_TAGS = insert(Tag.__table__).on_conflict_do_nothing(index_elements=['name'])
+
+# Links a URL to a tag unless it is already linked
+LINK_TAG = text('''
+    INSERT INTO url_tags (url_id, tag_id)
+    SELECT :url_id, :tag_id
+    WHERE NOT EXISTS (SELECT 1 FROM url_tags WHERE url_id = :url_id AND tag_id = :tag_id)
+''')
+
+# IDs of committed tags by name; tags are never renamed or deleted, so
+# entries stay valid
+_tag_id_cache = LRUCache(maxsize=TAG_CACHE_SIZE)
+
+# Entries deleted per transaction by cleanup, so the write lock is held briefly
+CLEANUP_BATCH_SIZE = 500
+
+def delete_old_entries_batch(cutoff: datetime, batch_size: int = CLEANUP_BATCH_SIZE) -> List[int]:
+    """Delete one batch of non-favorite entries last accessed before ``cutoff``.
+
+    Runs in its own short transaction, so it can be called from a worker
+    thread. Returns the IDs of the deleted entries.
+    """
+    with engine.begin() as conn:
+        ids = conn.execute(
+            select(URLHistory.id)
+            .where(URLHistory.is_favorite == False, URLHistory.last_accessed < cutoff)
+            .limit(batch_size)
+        ).scalars().all()
+        if ids:
+            conn.execute(delete(URLHistory).where(URLHistory.id.in_(ids)))
+            conn.execute(url_tags.delete().where(url_tags.c.url_id.in_(ids)))
+    return ids
+
+def _chunks(items: List, size: int = BULK_CHUNK_SIZE) -> Iterable[List]:
+    """Split a list into consecutive chunks of at most ``size`` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 class URLHistoryService:
     def __init__(self, db: Session):
@@ -33,30 +85,89 @@ class URLHistoryService:
 
         # Handle tags
         if tags:
-            for tag_name in tags:
-                tag = self.db.query(Tag).filter(Tag.name == tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    self.db.add(tag)
-                if tag not in url_entry.tags:
-                    url_entry.tags.append(tag)
+            self.db.flush()
+            self._link_tags({url_entry.id: tags})
 
         self.db.commit()
+        url_typeahead.add(url_entry)
         return url_entry
 
+    def add_urls(self, entries: List[Dict], source: str = 'manual') -> int:
+        """Add or update many URLs and their tags in a single transaction.
+
+        Each entry is a dict with a ``url`` and optional ``title`` and
+        ``tags``. A URL listed more than once counts as that many accesses.
+        Returns the number of entries processed.
+        """
+        urls = list(dict.fromkeys(entry['url'] for entry in entries))
+        url_entries = {}
+        for chunk in _chunks(urls):
+            for url_entry in self.db.query(URLHistory).filter(URLHistory.url.in_(chunk)):
+                url_entries[url_entry.url] = url_entry
+
+        now = datetime.utcnow()
+        new_entries = {}
+        tags = {}
+        for entry in entries:
+            url_entry = url_entries.get(entry['url']) or new_entries.get(entry['url'])
+            if isinstance(url_entry, URLHistory):
+                url_entry.last_accessed = now
+                url_entry.access_count += 1
+                if entry.get('title'):
+                    url_entry.title = entry['title']
+            elif url_entry:
+                url_entry['access_count'] += 1
+                if entry.get('title'):
+                    url_entry['title'] = entry['title']
+            else:
+                new_entries[entry['url']] = {
+                    'url': entry['url'],
+                    'title': entry.get('title'),
+                    'source': source,
+                    'created_at': now,
+                    'last_accessed': now,
+                    'access_count': 1
+                }
+            if entry.get('tags'):
+                tags.setdefault(entry['url'], []).extend(entry['tags'])
+
+        # New entries are inserted in one statement rather than a row at a
+        # time, then their IDs are read back
+        self.db.flush()
+        ids = {url: url_entry.id for url, url_entry in url_entries.items()}
+        if new_entries:
+            self.db.execute(insert(URLHistory.__table__), list(new_entries.values()))
+            for chunk in _chunks(list(new_entries)):
+                for url_id, url in self.db.query(URLHistory.id, URLHistory.url).filter(URLHistory.url.in_(chunk)):
+                    ids[url] = url_id
+        if tags:
+            self._link_tags({ids[url]: names for url, names in tags.items()})
+        self.db.commit()
+
+        if url_typeahead.ready:
+            for chunk in _chunks(list(ids.values())):
+                query = self.db.query(URLHistory)\
+                    .options(selectinload(URLHistory.tags))\
+                    .filter(URLHistory.id.in_(chunk))
+                for url_entry in query:
+                    url_typeahead.add(url_entry)
+        return len(entries)
+
     def get_recent_urls(self, limit: int = 10) -> List[URLHistory]:
         """Get most recently accessed URLs."""
-        return self.db.query(URLHistory)\
-            .order_by(desc(URLHistory.last_accessed))\
-            .limit(limit)\
-            .all()
+        return self._load(self._recent(limit))
+
+    def get_recent_url_dicts(self, limit: int = 10) -> List[dict]:
+        """Get most recently accessed URLs as dictionaries."""
+        return self._dicts(self._recent(limit))
 
     def get_favorite_urls(self) -> List[URLHistory]:
         """Get favorite URLs."""
-        return self.db.query(URLHistory)\
-            .filter(URLHistory.is_favorite == True)\
-            .order_by(desc(URLHistory.last_accessed))\
-            .all()
+        return self._load(self._favorites())
+
+    def get_favorite_url_dicts(self) -> List[dict]:
+        """Get favorite URLs as dictionaries."""
+        return self._dicts(self._favorites())
 
     def toggle_favorite(self, url_id: int) -> bool:
         """Toggle favorite status for a URL."""
@@ -64,6 +175,7 @@ class URLHistoryService:
         if url_entry:
             url_entry.is_favorite = not url_entry.is_favorite
             self.db.commit()
+            url_typeahead.add(url_entry)
             return url_entry.is_favorite
         return False
 
@@ -73,14 +185,9 @@ class URLHistoryService:
         if not url_entry:
             return False
 
-        tag = self.db.query(Tag).filter(Tag.name == tag_name).first()
-        if not tag:
-            tag = Tag(name=tag_name)
-            self.db.add(tag)
-
-        if tag not in url_entry.tags:
-            url_entry.tags.append(tag)
-            self.db.commit()
+        self._link_tags({url_id: [tag_name]})
+        self.db.commit()
+        url_typeahead.add(url_entry)
         return True
 
     def remove_tag(self, url_id: int, tag_name: str) -> bool:
@@ -93,36 +200,146 @@ class URLHistoryService:
         if tag and tag in url_entry.tags:
             url_entry.tags.remove(tag)
             self.db.commit()
+            url_typeahead.add(url_entry)
             return True
         return False
 
+    def _tag_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """Get the IDs of tags by name, creating the tags that are missing."""
+        ids = {}
+        missing = []
+        for name in dict.fromkeys(names):
+            tag_id = _tag_id_cache.get(name)
+            if tag_id is None:
+                missing.append(name)
+            else:
+                ids[name] = tag_id
+
+        for chunk in _chunks(missing):
+            for tag_id, name in self.db.query(Tag.id, Tag.name).filter(Tag.name.in_(chunk)):
+                ids[name] = tag_id
+                _tag_id_cache.set(name, tag_id)
+
+            # Tags created here are not cached, as the transaction may still roll back
+            new = [name for name in chunk if name not in ids]
+            if new:
+                self.db.execute(INSERT_TAGS, [{'name': name} for name in new])
+                for tag_id, name in self.db.query(Tag.id, Tag.name).filter(Tag.name.in_(new)):
+                    ids[name] = tag_id
+        return ids
+
+    def _link_tags(self, tags: Dict[int, List[str]]):
+        """Tag URLs, given as a mapping of URL ID to tag names."""
+        tag_ids = self._tag_ids(name for names in tags.values() for name in names)
+        links = {
+            (url_id, tag_ids[name])
+            for url_id, names in tags.items()
+            for name in names
+        }
+        self.db.execute(LINK_TAG, [{'url_id': url_id, 'tag_id': tag_id} for url_id, tag_id in links])
+
+        # The links were written around the ORM, so reload tags when next read
+        for url_entry in self.db.identity_map.values():
+            if isinstance(url_entry, URLHistory) and url_entry.id in tags:
+                self.db.expire(url_entry, ['tags'])
+
     def search_urls(self, query: str, limit: int = 10) -> List[URLHistory]:
-        """Search URLs by title or URL string."""
-        return self.db.query(URLHistory)\
-            .filter(
+        """Search URLs by title, URL string or tag, best match first."""
+        return self._load(self._search(query, limit))
+
+    def search_url_dicts(self, query: str, limit: int = 10) -> List[dict]:
+        """Search URLs like ``search_urls``, returning dictionaries."""
+        return self._dicts(self._search(query, limit))
+
+    def get_url_suggestions(self, partial_url: str, limit: int = 5) -> List[URLHistory]:
+        """Get URL suggestions based on partial input."""
+        return self._load(self._suggestions(partial_url, limit))
+
+    def get_url_suggestion_dicts(self, partial_url: str, limit: int = 5) -> List[dict]:
+        """Get URL suggestions like ``get_url_suggestions``, returning dictionaries."""
+        return self._dicts(self._suggestions(partial_url, limit))
+
+    def _recent(self, limit: int):
+        """Query for the most recently accessed URLs."""
+        return select(URLHistory)\
+            .order_by(desc(URLHistory.last_accessed))\
+            .limit(limit)
+
+    def _favorites(self):
+        """Query for favorite URLs."""
+        return select(URLHistory)\
+            .where(URLHistory.is_favorite == True)\
+            .order_by(desc(URLHistory.last_accessed))
+
+    def _search(self, query: str, limit: int):
+        """Query for URLs matching a search."""
+        if self._use_index(query):
+            return self._match(match_phrase(query), limit)
+        return select(URLHistory)\
+            .where(
                 (URLHistory.url.ilike(f'%{query}%')) |
                 (URLHistory.title.ilike(f'%{query}%'))
             )\
             .order_by(desc(URLHistory.last_accessed))\
-            .limit(limit)\
-            .all()
+            .limit(limit)
 
-    def get_url_suggestions(self, partial_url: str, limit: int = 5) -> List[URLHistory]:
-        """Get URL suggestions based on partial input."""
-        return self.db.query(URLHistory)\
-            .filter(URLHistory.url.ilike(f'%{partial_url}%'))\
+    def _suggestions(self, partial_url: str, limit: int):
+        """Query for URLs to suggest for partial input."""
+        if self._use_index(partial_url):
+            return self._match(match_phrase(partial_url, 'url'), limit)
+        return select(URLHistory)\
+            .where(URLHistory.url.ilike(f'%{partial_url}%'))\
             .order_by(desc(URLHistory.access_count))\
-            .limit(limit)\
-            .all()
+            .limit(limit)
+
+    def _use_index(self, query: str) -> bool:
+        """Check whether a query can be answered by the full-text index."""
+        return 'url_history_fts' in search_index.available_indexes and len(query) >= MIN_QUERY_LENGTH
+
+    def _match(self, fts_query: str, limit: int):
+        """Query for the URLs matching a full-text query, in rank order."""
+        ids = self.db.execute(SEARCH_URL_HISTORY, {'query': fts_query, 'limit': limit}).scalars().all()
+        if not ids:
+            return select(URLHistory).where(false())
+        rank = case({url_id: position for position, url_id in enumerate(ids)}, value=URLHistory.id)
+        return select(URLHistory).where(URLHistory.id.in_(ids)).order_by(rank)
+
+    def _load(self, statement) -> List[URLHistory]:
+        """Run a URL query, loading the tags of every result in one more query."""
+        return self.db.execute(statement.options(selectinload(URLHistory.tags))).scalars().all()
+
+    def _dicts(self, statement) -> List[dict]:
+        """Run a URL query as plain rows and serialize them like ``to_dict``.
+
+        This skips building ORM objects, and reads the tags of the results
+        in one more query per ``BULK_CHUNK_SIZE`` rows.
+        """
+        rows = self.db.execute(statement.with_only_columns(*URLHistory.__table__.columns)).all()
+        tags = {}
+        for chunk in _chunks([row.id for row in rows]):
+            tag_rows = self.db.execute(
+                select(url_tags.c.url_id, Tag.name)
+                .join(Tag, Tag.id == url_tags.c.tag_id)
+                .where(url_tags.c.url_id.in_(chunk))
+            )
+            for url_id, name in tag_rows:
+                tags.setdefault(url_id, []).append(name)
+        return [url_history_dict(row, tags.get(row.id, [])) for row in rows]
 
     def cleanup_old_entries(self, days: int = 30) -> int:
-        """Remove entries older than specified days that aren't favorites."""
+        """Remove entries older than specified days that aren't favorites.
+
+        Entries are deleted in batches, each in its own transaction. Use
+        ``HistoryRetention`` to do this in the background instead.
+        """
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        deleted = self.db.query(URLHistory)\
-            .filter(
-                URLHistory.last_accessed < cutoff_date,
-                URLHistory.is_favorite == False
-            )\
-            .delete()
-        self.db.commit()
+        deleted = 0
+        while True:
+            ids = delete_old_entries_batch(cutoff_date)
+            for url_id in ids:
+                url_typeahead.remove(url_id)
+            deleted += len(ids)
+            if len(ids) < CLEANUP_BATCH_SIZE:
+                break
+        self.db.expire_all()
         return deleted
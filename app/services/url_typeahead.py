@@ -0,0 +1,293 @@
+"""In-memory typeahead for URL history suggestions."""
+import logging
+import math
+import os
+import re
+import sys
+from bisect import bisect_left, insort
+from calendar import timegm
+from collections import OrderedDict
+from datetime import datetime
+from heapq import nlargest, nsmallest
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.url_history import URLHistory
+
+logger = logging.getLogger(__name__)
+
+# Most URLs kept in memory, at roughly 2 KB each; the least recently
+# accessed are left out
+TYPEAHEAD_MAX_ENTRIES = int(os.getenv('BREVIFY_TYPEAHEAD_MAX_ENTRIES', '10000'))
+
+# Fraction of the URLs evicted at once when the index grows past its limit,
+# so the scan for the lowest scores runs once per that many additions
+EVICTION_FRACTION = 0.01
+
+# Time after which a visit counts half as much towards the frecency score
+FRECENCY_HALF_LIFE = 7 * 24 * 60 * 60
+
+# Best matches remembered per prefix; larger limits scan the index instead
+TOP_MATCHES = 20
+
+# Prefixes up to this length match the most URLs, so their best matches are
+# computed when the index is built and always kept
+SHORT_PREFIX = 2
+
+# Longer prefixes whose best matches are remembered
+PREFIX_CACHE_SIZE = 1024
+
+# Words of a URL or title that can each start a match, and the characters
+# of each that are indexed; longer queries are looked up by their start and
+# then checked against the whole URL and title
+MAX_KEYS_PER_ENTRY = 12
+MAX_KEY_LENGTH = 24
+
+_SCHEME = re.compile(r'^[a-z]+://(www\.)?')
+_WORD_START = re.compile(r'(?<![a-z0-9])[a-z0-9]')
+
+def normalize(text: str) -> str:
+    """Lowercase text and strip the URL scheme and www. prefix."""
+    return _SCHEME.sub('', text.strip().lower())
+
+def frecency(access_count: int, last_accessed: datetime) -> float:
+    """Score combining how often and how recently a URL was accessed.
+
+    This is the log of ``access_count`` halved for every half-life since the
+    last access. It is measured from a fixed epoch instead of from now, so the
+    order of scores never changes as time passes and scores are computed once.
+    """
+    return math.log(max(access_count or 1, 1)) + \
+        timegm(last_accessed.timetuple()) * math.log(2) / FRECENCY_HALF_LIFE
+
+def _texts(url: str, title: Optional[str]) -> tuple:
+    """The normalized URL and title that queries are matched against."""
+    return _SCHEME.sub('', url.lower()), (title or '').lower()
+
+def _keys(url: str, title: Optional[str]) -> List[str]:
+    """Strings that a query can be a prefix of: each word onwards."""
+    keys = []
+    for text in _texts(url, title):
+        for match in _WORD_START.finditer(text):
+            keys.append(text[match.start():match.start() + MAX_KEY_LENGTH])
+    return list(dict.fromkeys(keys))[:MAX_KEYS_PER_ENTRY]
+
+class URLTypeahead:
+    """Prefix index over URL history that suggests URLs without the database.
+
+    Every URL is indexed under its normalized form and each word of it and
+    its title onwards, in one sorted list searched with ``bisect``. Matches
+    are ranked by ``frecency``.
+
+    A query matches a URL when the URL or its title has a word starting with
+    it. This differs from the database fallback, which matches the query
+    anywhere in the URL: "tube" finds "youtube.com" there but not here.
+
+    The best matches of each prefix that has been typed are remembered and
+    kept up to date as URLs are added, so answering a keystroke is normally
+    a dictionary lookup. Scores only ever go up, so a URL entering a list can
+    only push out the last one; a list that loses a URL in any other way is
+    dropped and rebuilt from the index on the next query.
+    """
+
+    def __init__(self, max_entries: int = TYPEAHEAD_MAX_ENTRIES):
+        """Initialize an empty index."""
+        self.max_entries = max_entries
+        self.ready = False
+        self._entries: Dict[int, dict] = {}  # URL ID to its to_dict() form
+        self._scores: Dict[int, float] = {}
+        self._entry_keys: Dict[int, List[str]] = {}
+        self._index: List[tuple] = []  # Sorted (key, URL ID) pairs
+        self._short: Dict[str, List[int]] = {}  # Best URL IDs for short prefixes
+        self._prefixes: OrderedDict = OrderedDict()  # Same for longer ones, LRU
+        self._bytes = 0
+
+    def build(self, db: Session):
+        """Load the most recently accessed URLs from the database."""
+        self._entries.clear()
+        self._scores.clear()
+        self._entry_keys.clear()
+        self._index = []
+        self._short.clear()
+        self._prefixes.clear()
+        self._bytes = 0
+
+        query = db.query(URLHistory)\
+            .options(selectinload(URLHistory.tags))\
+            .order_by(URLHistory.last_accessed.desc())\
+            .limit(self.max_entries)\
+            .yield_per(1000)
+        for url_entry in query:
+            self._add(url_entry.to_dict(), url_entry.access_count, url_entry.last_accessed)
+        self._index.sort()
+
+        # Visiting URLs best first fills each short prefix with its top matches
+        for url_id in sorted(self._scores, key=self._scores.get, reverse=True):
+            for prefix in self._short_prefixes(url_id):
+                matches = self._short.setdefault(prefix, [])
+                if len(matches) < TOP_MATCHES:
+                    matches.append(url_id)
+        self.ready = True
+
+        stats = self.stats()
+        logger.info(f"URL typeahead built with {stats['entries']} URLs, "
+                    f"{stats['keys']} keys, about {stats['bytes'] // 1024} KB")
+
+    def add(self, url_entry: URLHistory):
+        """Add a URL or replace its indexed copy after it changed."""
+        if not self.ready:
+            return
+        old_keys = self._entry_keys.get(url_entry.id)
+        new_keys = _keys(url_entry.url, url_entry.title)
+        if old_keys is not None and old_keys != new_keys:
+            self.remove(url_entry.id)
+            old_keys = None
+
+        if old_keys is None:
+            self._add(url_entry.to_dict(), url_entry.access_count, url_entry.last_accessed, keep_sorted=True)
+        else:
+            # Same keys, so only the stored copy and the score change
+            entry = url_entry.to_dict()
+            self._bytes += self._size(entry, new_keys) - self._size(self._entries[url_entry.id], new_keys)
+            self._entries[url_entry.id] = entry
+            self._scores[url_entry.id] = frecency(url_entry.access_count, url_entry.last_accessed)
+        self._rank(url_entry.id)
+
+        if len(self._entries) > self.max_entries:
+            excess = len(self._entries) - self.max_entries + int(self.max_entries * EVICTION_FRACTION)
+            for url_id in nsmallest(excess, self._scores, key=self._scores.get):
+                self.remove(url_id)
+
+    def remove(self, url_id: int):
+        """Remove a URL from the index if it is there."""
+        entry = self._entries.pop(url_id, None)
+        if entry is None:
+            return
+        for prefix in self._short_prefixes(url_id):
+            if url_id in self._short.get(prefix, ()):
+                del self._short[prefix]
+        for prefix in [prefix for prefix, matches in self._prefixes.items() if url_id in matches]:
+            del self._prefixes[prefix]
+
+        del self._scores[url_id]
+        keys = self._entry_keys.pop(url_id)
+        for key in keys:
+            position = bisect_left(self._index, (key, url_id))
+            del self._index[position]
+        self._bytes -= self._size(entry, keys)
+
+    def suggest(self, query: str, limit: int = 5) -> List[dict]:
+        """Get the URLs with a word starting with ``query``, best first.
+
+        The words of both the URL and its title are searched.
+        """
+        prefix = normalize(query)
+        if limit > TOP_MATCHES:
+            matches = self._scan(prefix, limit)
+        elif len(prefix) <= SHORT_PREFIX:
+            matches = self._short.get(prefix)
+            if matches is None:
+                matches = self._short[prefix] = self._scan(prefix, TOP_MATCHES)
+        else:
+            matches = self._prefixes.get(prefix)
+            if matches is None:
+                matches = self._prefixes[prefix] = self._scan(prefix, TOP_MATCHES)
+                while len(self._prefixes) > PREFIX_CACHE_SIZE:
+                    self._prefixes.popitem(last=False)
+            else:
+                self._prefixes.move_to_end(prefix)
+        return [self._entries[url_id] for url_id in matches[:limit]]
+
+    def stats(self) -> dict:
+        """Size of the index, including an estimate of its memory use."""
+        cached = list(self._short.values()) + list(self._prefixes.values())
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'keys': len(self._index),
+            'cached_prefixes': len(cached),
+            'bytes': self._bytes + sys.getsizeof(self._index) +
+                sum(sys.getsizeof(matches) for matches in cached)
+        }
+
+    def _scan(self, prefix: str, limit: int) -> List[int]:
+        """Find the best URLs for a prefix by walking the index."""
+        key_prefix = prefix[:MAX_KEY_LENGTH]
+        matches = set()
+        for position in range(bisect_left(self._index, (key_prefix,)), len(self._index)):
+            key, url_id = self._index[position]
+            if not key.startswith(key_prefix):
+                break
+            matches.add(url_id)
+        if len(prefix) > MAX_KEY_LENGTH:
+            # Keys are cut short, so they only show that the start matches
+            matches = {url_id for url_id in matches if self._matches(url_id, prefix)}
+        return nlargest(limit, matches, key=self._scores.get)
+
+    def _matches(self, url_id: int, prefix: str) -> bool:
+        """Check whether a word of a URL or its title starts with ``prefix``."""
+        key_prefix = prefix[:MAX_KEY_LENGTH]
+        if not any(key.startswith(key_prefix) for key in self._entry_keys[url_id]):
+            return False
+        if len(prefix) <= MAX_KEY_LENGTH:
+            return True
+        entry = self._entries[url_id]
+        return any(
+            text.startswith(prefix, match.start())
+            for text in _texts(entry['url'], entry['title'])
+            for match in _WORD_START.finditer(text)
+        )
+
+    def _rank(self, url_id: int):
+        """Place a URL whose score went up in the remembered best matches."""
+        score = self._scores[url_id]
+        remembered = [(prefix, self._short.get(prefix)) for prefix in self._short_prefixes(url_id)]
+        remembered += [
+            (prefix, matches) for prefix, matches in self._prefixes.items()
+            if self._matches(url_id, prefix)
+        ]
+        for prefix, matches in remembered:
+            if matches is None:
+                continue
+            if url_id in matches:
+                matches.remove(url_id)
+            elif len(matches) >= TOP_MATCHES and score <= self._scores[matches[-1]]:
+                continue
+            position = next(
+                (i for i, other in enumerate(matches) if self._scores[other] < score),
+                len(matches)
+            )
+            matches.insert(position, url_id)
+            del matches[TOP_MATCHES:]
+
+    def _short_prefixes(self, url_id: int) -> set:
+        """Short prefixes that a URL matches, including the empty one."""
+        return {
+            key[:length]
+            for key in self._entry_keys[url_id]
+            for length in range(SHORT_PREFIX + 1)
+        }
+
+    def _add(self, entry: dict, access_count: int, last_accessed: datetime, keep_sorted: bool = False):
+        """Index one URL."""
+        url_id = entry['id']
+        keys = _keys(entry['url'], entry['title'])
+        self._entries[url_id] = entry
+        self._scores[url_id] = frecency(access_count, last_accessed)
+        self._entry_keys[url_id] = keys
+        for key in keys:
+            if keep_sorted:
+                insort(self._index, (key, url_id))
+            else:
+                self._index.append((key, url_id))
+        self._bytes += self._size(entry, keys)
+
+    def _size(self, entry: dict, keys: List[str]) -> int:
+        """Approximate memory held for one URL."""
+        return sys.getsizeof(entry) + \
+            sum(sys.getsizeof(value) for value in entry.values()) + \
+            sum(sys.getsizeof(key) + 64 for key in keys)  # 64 for each (key, id) tuple
+
+# Shared by every request; built at startup
+url_typeahead = URLTypeahead()
@@ -0,0 +1,236 @@
+"""Non-blocking transport for YouTube Data API requests."""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httplib2
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+# Number of YouTube API calls that can be in flight at the same time
+YOUTUBE_API_WORKERS = int(os.getenv('BREVIFY_YOUTUBE_API_WORKERS', '16'))
+
+# Where the YouTube Data API discovery document is cached between runs
+DISCOVERY_CACHE_PATH = Path(__file__).parent.parent.parent / 'data' / 'discovery' / 'youtube.v3.json'
+
+DISCOVERY_URL = 'https://youtube.googleapis.com/$discovery/rest?version=v3'
+
+# Seconds to wait for more channel lookups before sending a batch
+CHANNEL_BATCH_WINDOW = float(os.getenv('BREVIFY_CHANNEL_BATCH_WINDOW', '0.05'))
+
+# channels().list accepts at most 50 comma-separated IDs per call
+CHANNEL_BATCH_SIZE = 50
+
+# Quota units charged for API methods that cost more than one unit
+QUOTA_COSTS = {
+    'youtube.search.list': 100,
+}
+
+def load_discovery_document(cache_path: Path = DISCOVERY_CACHE_PATH) -> str:
+    """Load the YouTube discovery document, caching it on disk.
+
+    The cached copy is used when present. Otherwise the document bundled with
+    googleapiclient is used, falling back to downloading it.
+    """
+    if cache_path.exists():
+        return cache_path.read_text()
+
+    document = get_static_doc('youtube', 'v3')
+    if document is None:
+        logger.info("Downloading YouTube discovery document")
+        response, content = httplib2.Http().request(DISCOVERY_URL)
+        if response.status != 200:
+            raise ValueError(f"Could not download discovery document: HTTP {response.status}")
+        document = content.decode('utf-8')
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(document)
+    except OSError as e:
+        logger.warning(f"Could not cache discovery document: {e}")
+    return document
+
+class YouTubeClient:
+    """Runs googleapiclient requests on a dedicated thread pool.
+
+    googleapiclient only offers a blocking ``execute()``, so requests are handed
+    to worker threads and awaited from the event loop. Each worker keeps its own
+    keep-alive httplib2 connection because httplib2 is not thread-safe, so the
+    workers double as the connection pool.
+
+    The API resource is built once from the discovery document and shared by
+    every request, since building it is not free.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, max_workers: int = YOUTUBE_API_WORKERS):
+        """Initialize the client with its API resource and worker pool."""
+        self.youtube = None
+        if api_key:
+            self.youtube = build_from_document(load_discovery_document(), developerKey=api_key)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='youtube-api'
+        )
+        self._local = threading.local()
+        self._quota_day = date.today()
+        self._quota_used = 0
+        self.channel_batcher = ChannelBatcher(self)
+
+    @property
+    def quota_used(self) -> int:
+        """Quota units spent by this process today."""
+        if self._quota_day != date.today():
+            self._quota_day = date.today()
+            self._quota_used = 0
+        return self._quota_used
+
+    def _http(self) -> httplib2.Http:
+        """Get the HTTP connection owned by the current worker thread."""
+        if not hasattr(self._local, 'http'):
+            self._local.http = httplib2.Http()
+        return self._local.http
+
+    def _execute(self, request) -> Optional[dict]:
+        """Execute a request on the current worker thread."""
+        try:
+            return request.execute(http=self._http())
+        except HttpError as e:
+            if e.resp.status == 304:
+                return None
+            raise
+
+    async def execute(self, request, etag: Optional[str] = None) -> Optional[dict]:
+        """Execute a googleapiclient request without blocking the event loop.
+
+        When ``etag`` is given the request is made conditional, and ``None`` is
+        returned if the resource has not changed since that ETag.
+        """
+        if etag:
+            request.headers['If-None-Match'] = etag
+        self._quota_used = self.quota_used + QUOTA_COSTS.get(request.methodId, 1)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._execute, request)
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Run another blocking YouTube call, such as a transcript download, on the pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def shutdown(self):
+        """Stop the worker pool, dropping calls that have not started."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+class ChannelBatcher:
+    """Coalesces channels().list lookups into calls of up to 50 IDs.
+
+    Lookups that arrive within ``window`` seconds of each other are sent as one
+    call, and each caller gets its own channel back. A lookup of a channel that
+    is already waiting or in flight shares that lookup's result.
+
+    If a call fails, its IDs are split in half and sent again, so one bad ID
+    or a transient error does not fail every lookup in the batch. Errors that
+    would fail any call, such as running out of quota, are passed straight on.
+    """
+
+    def __init__(self, client: YouTubeClient, window: float = CHANNEL_BATCH_WINDOW):
+        """Initialize the batcher for a client."""
+        self.client = client
+        self.window = window
+        # Every lookup not yet answered, whether waiting or in flight
+        self._lookups: Dict[str, asyncio.Future] = {}
+        # IDs waiting for the next batch
+        self._pending: List[str] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._sending = set()
+
+    async def get(self, channel_id: str) -> Optional[dict]:
+        """Get a channel resource with its snippet and content details.
+
+        Returns ``None`` if the channel does not exist.
+        """
+        future = self._lookups.get(channel_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._lookups[channel_id] = loop.create_future()
+            self._pending.append(channel_id)
+            if len(self._pending) >= CHANNEL_BATCH_SIZE:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+
+        # Shielded so one cancelled caller does not fail the others
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        """Send every pending lookup as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[str]):
+        """Look up a batch of channels and hand each caller its result."""
+        try:
+            response = await self.client.execute(self.client.youtube.channels().list(
+                part='snippet,contentDetails',
+                id=','.join(batch),
+                maxResults=CHANNEL_BATCH_SIZE
+            ))
+        except Exception as e:
+            if len(batch) > 1 and not _fails_every_call(e):
+                logger.warning(f"Channel lookup of {len(batch)} IDs failed, retrying in halves: {e}")
+                half = len(batch) // 2
+                await asyncio.gather(self._send(batch[:half]), self._send(batch[half:]))
+                return
+            for channel_id in batch:
+                self._resolve(channel_id, exception=e)
+            return
+
+        items = {item['id']: item for item in response.get('items', [])}
+        for channel_id in batch:
+            self._resolve(channel_id, items.get(channel_id))
+
+    def _resolve(self, channel_id: str, result: Optional[dict] = None,
+                 exception: Optional[BaseException] = None):
+        """Answer the callers waiting on a channel, so later lookups start afresh."""
+        future = self._lookups.pop(channel_id)
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+def _fails_every_call(error: Exception) -> bool:
+    """Check whether an error is about the caller, not the request, e.g. no quota left."""
+    return isinstance(error, HttpError) and error.resp.status in (401, 403, 429)
+
+_client: Optional[YouTubeClient] = None
+
+def get_youtube_client() -> YouTubeClient:
+    """Get the YouTube API client shared by the whole process."""
+    global _client
+    if _client is None:
+        _client = YouTubeClient(os.getenv('YOUTUBE_API_KEY'))
+    return _client
+
+def shutdown_youtube_client():
+    """Shut down the shared YouTube API client if it was started."""
+    global _client
+    if _client is not None:
+        _client.shutdown()
+        _client = None
+        logger.info("YouTube API client shut down")
@@ -1,33 +1,236 @@
 """Service for interacting with YouTube API."""
+import asyncio
+import base64
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
 from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
-from sqlmodel import Session, select
-from app.models.models import Channel, Video
-from googleapiclient.discovery import build
+from sqlmodel import Session, select, tuple_, update
+from app.models.models import Channel, ChannelAlias, Video
+from app.db.database import engine
+from app.services.youtube_client import YouTubeClient, get_youtube_client
+from app.services.lru_cache import LRUCache
+from app.services.fragment_cache import fragment_cache
+from app.services.transcript_store import TranscriptStore
+from app.services.transcript_codec import decode_text
+from app.services.transcript_encoding import compress, render_text
 import os
 from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of channels fetched from YouTube at the same time
+REFRESH_CONCURRENCY = int(os.getenv('BREVIFY_REFRESH_CONCURRENCY', '8'))
+
+# Seconds to wait for channel refreshes before serving cached videos instead
+REFRESH_DEADLINE = float(os.getenv('BREVIFY_REFRESH_DEADLINE', '3'))
+
+# Pages of uploads fetched for a channel with no cached videos
+INITIAL_PAGES = 1
+
+# Upper bound on pages walked by a refresh before the cutoff date is reached
+MAX_REFRESH_PAGES = 20
+
+# Number of resolved channel aliases kept in memory
+ALIAS_CACHE_SIZE = 4096
+
+# Seconds before a handle or custom URL that was not found is searched again
+NEGATIVE_ALIAS_TTL = 60 * 60
+
+# Maximum number of transcripts downloaded at the same time
+TRANSCRIPT_CONCURRENCY = int(os.getenv('BREVIFY_TRANSCRIPT_CONCURRENCY', '4'))
+
+# Videos per page of the feed on the index page
+FEED_PAGE_SIZE = int(os.getenv('BREVIFY_FEED_PAGE_SIZE', '24'))
+
+# Keeps references to background refreshes so they are not garbage collected
+_background_tasks = set()
+
+# Transcript downloads in progress, shared by every request for the same video
+_transcript_fetches: Dict[Tuple[str, Tuple[str, ...]], asyncio.Task] = {}
+
+_transcript_semaphore = asyncio.Semaphore(TRANSCRIPT_CONCURRENCY)
+
+# Channel IDs for handles and custom URLs, in front of the channelalias table
+_alias_cache = LRUCache(maxsize=ALIAS_CACHE_SIZE)
+
+# Marks an alias that has not been resolved yet
+_MISSING = object()
+
+@dataclass
+class FetchedTranscript:
+    """Transcript downloaded from YouTube."""
+    language: str
+    source: str  # "manual" or "generated"
+    segments: List[dict]
+
+    @property
+    def text(self) -> str:
+        """Plain text of the transcript, one segment per line."""
+        return '\n'.join(segment['text'] for segment in self.segments)
+
+def _download_transcript(video_id: str, languages: Tuple[str, ...]) -> FetchedTranscript:
+    """Download a transcript, preferring manual captions in the first matching language.
+
+    This blocks, so it runs on the YouTube client's worker pool.
+    """
+    transcript = YouTubeTranscriptApi.list_transcripts(video_id).find_transcript(languages)
+    return FetchedTranscript(
+        language=transcript.language_code,
+        source='generated' if transcript.is_generated else 'manual',
+        segments=transcript.fetch()
+    )
+
+def parse_channel_url(url: str) -> Tuple[str, str]:
+    """Split a channel URL into its kind and name.
+
+    The kind is ``channel`` for channel IDs, ``handle`` for @handles, and
+    ``c`` or ``user`` for custom URLs.
+    """
+    url = url.strip().split('?')[0].split('#')[0]
+
+    # Handle @username format
+    if '@' in url:
+        return 'handle', url.split('@')[-1].split('/')[0]
+
+    for kind in ('channel', 'c', 'user'):
+        marker = f'/{kind}/'
+        if marker in url:
+            name = url.split(marker)[-1].split('/')[0]
+            if name:
+                return kind, name
+
+    raise ValueError("Invalid YouTube channel URL format")
+
+@dataclass
+class UploadsRefresh:
+    """Result of checking a channel's uploads playlist for new videos."""
+    playlist_id: str
+    videos: List[dict]
+    etag: Optional[str] = None
+
+@dataclass
+class FeedPage:
+    """A page of cached videos from every channel, newest first."""
+    videos: List[Video]
+    next_cursor: Optional[str] = None  # None on the last page
+
+def encode_feed_cursor(video: Video) -> str:
+    """Build the cursor for the page that follows ``video``."""
+    key = f"{video.published_at.isoformat()}|{video.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+def decode_feed_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Get the (published_at, id) key from a cursor.
+
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        published_at, video_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(published_at), video_id
+    except Exception as e:
+        raise ValueError(f"Invalid feed cursor: {cursor}") from e
+
+def _save_videos(db: Session, channel_id: str, refresh: UploadsRefresh) -> List[Video]:
+    """Insert fetched videos that are not already cached.
+
+    Also remembers the channel's uploads playlist, so it is only looked up once,
+    and the ETag of its first page for the next conditional refresh.
+    """
+    return _save_refreshes(db, {channel_id: refresh})
+
+def _save_refreshes(db: Session, refreshes: Dict[str, UploadsRefresh]) -> List[Video]:
+    """Save the refreshes of several channels, as ``_save_videos``, in one transaction.
+
+    A commit expires every object loaded in the session, so committing once
+    instead of once per channel keeps the cost linear in the number of
+    channels.
+    """
+    if not refreshes:
+        return []
+
+    now = datetime.utcnow()
+    for channel in db.exec(select(Channel).where(Channel.id.in_(refreshes))).all():
+        refresh = refreshes[channel.id]
+        channel.uploads_playlist_id = refresh.playlist_id
+        channel.uploads_etag = refresh.etag
+        channel.uploads_checked = now
+        db.add(channel)
+
+    ids = [video_data['id'] for refresh in refreshes.values() for video_data in refresh.videos]
+    existing = set(db.exec(select(Video.id).where(Video.id.in_(ids))).all()) if ids else set()
+
+    new_videos = []
+    for refresh in refreshes.values():
+        for video_data in refresh.videos:
+            if video_data['id'] in existing:
+                continue
+            existing.add(video_data['id'])
+            video = Video(**video_data)
+            db.add(video)
+            new_videos.append(video)
+
+    db.commit()
+    for video in new_videos:
+        db.refresh(video)
+    for channel_id in {video.channel_id for video in new_videos}:
+        fragment_cache.invalidate(channel_id)
+    return new_videos
+
+async def _finish_refresh(fetch: asyncio.Task, channel_id: str):
+    """Store the result of a channel refresh that missed its deadline."""
+    try:
+        refresh = await fetch
+    except Exception as e:
+        logger.error(f"Error refreshing channel {channel_id} in background: {e}")
+        return
+
+    with Session(engine) as db:
+        new_videos = _save_videos(db, channel_id, refresh)
+    logger.info(f"Background refresh stored {len(new_videos)} new videos for channel {channel_id}")
+
+def _transcript_body(video_id: str, format: str, encoding: str, languages: Sequence[str]) -> Optional[bytes]:
+    """Read or build a transcript body, in its own session since it runs in a worker thread."""
+    with Session(engine) as db:
+        body = TranscriptStore(db).body(video_id, format, encoding, languages)
+        if body is not None:
+            return body
+
+        # Transcripts cached before the transcript store existed are rare, so
+        # their bodies are not stored
+        transcript = db.exec(select(Video.transcript).where(Video.id == video_id)).first()
+    if transcript:
+        return compress(render_text(format, transcript), encoding)
+    return None
+
+def _store_transcript(video_id: str, fetched: FetchedTranscript):
+    """Save a downloaded transcript, in its own session since it runs in a worker thread."""
+    with Session(engine) as db:
+        TranscriptStore(db).put(video_id, fetched.language, fetched.source, fetched.segments)
+        db.exec(update(Video).where(Video.id == video_id).values(transcript_fetched=datetime.utcnow()))
+        db.commit()
+
 class YouTubeService:
     """Service for fetching YouTube data."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, client: Optional[YouTubeClient] = None):
         """Initialize the service with a database session."""
         self.db = db
-        self.youtube = None
-        api_key = os.getenv('YOUTUBE_API_KEY')
-        if api_key:
-            self.youtube = build('youtube', 'v3', developerKey=api_key)
+        self.client = client or get_youtube_client()
+        self.youtube = self.client.youtube
 
     async def get_channel_info(self, channel_url: str) -> Optional[Channel]:
         """Get channel info, first checking cache then YouTube."""
         # Extract channel ID from URL
-        channel_id = self._extract_channel_id(channel_url)
-        
+        channel_id = await self.resolve_channel_id(channel_url)
+        return await self.get_channel(channel_id)
+
+    async def get_channel(self, channel_id: str) -> Optional[Channel]:
+        """Get channel info by channel ID, first checking cache then YouTube.
+
+        Returns None if the channel could not be fetched.
+        """
         # Check cache first
         statement = select(Channel).where(Channel.id == channel_id)
         cached_channel = self.db.exec(statement).first()
@@ -36,8 +239,15 @@ class YouTubeService:
 
         # If not in cache or stale, fetch from YouTube
         try:
-            channel_info = self._fetch_channel_from_youtube(channel_id)
-            if cached_channel:
+            channel_info = await self._fetch_channel_from_youtube(
+                channel_id,
+                etag=cached_channel.etag if cached_channel else None
+            )
+            if channel_info is None:
+                # Not modified, so the cached copy is still valid
+                cached_channel.last_fetched = datetime.utcnow()
+                self.db.add(cached_channel)
+            elif cached_channel:
                 # Update existing channel
                 for key, value in channel_info.items():
                     setattr(cached_channel, key, value)
@@ -52,42 +262,153 @@ class YouTubeService:
             return cached_channel
         except Exception as e:
             logger.error(f"Error fetching channel info: {e}")
+            # The session may be shared, so it must stay usable after a failed flush
+            self.db.rollback()
             return None
 
+    def get_feed_page(self, cursor: Optional[str] = None, limit: int = FEED_PAGE_SIZE) -> FeedPage:
+        """Get a page of cached videos, newest first, without calling YouTube.
+
+        Pages are ordered by (published_at, id) and continue after the key in
+        ``cursor``, so each page is a range read of the feed index however
+        deep it is. Raises ValueError if the cursor is malformed.
+        """
+        statement = select(Video).order_by(Video.published_at.desc(), Video.id.desc())
+        if cursor:
+            statement = statement.where(tuple_(Video.published_at, Video.id) < decode_feed_cursor(cursor))
+
+        # One extra row tells whether there is another page
+        videos = self.db.exec(statement.limit(limit + 1)).all()
+        if len(videos) > limit:
+            videos = videos[:limit]
+            return FeedPage(videos, encode_feed_cursor(videos[-1]))
+        return FeedPage(videos)
+
     async def get_videos(self, channel_id: str) -> List[Video]:
         """Get videos for a channel, using cache when possible."""
         # Check cache first
         statement = select(Video).where(Video.channel_id == channel_id).order_by(Video.published_at.desc())
         cached_videos = self.db.exec(statement).all()
 
-        # Get latest video date
-        latest_date = None
-        if cached_videos:
-            latest_date = max(v.published_at for v in cached_videos)
+        channel = self.db.get(Channel, channel_id)
 
         # Fetch new videos from YouTube
         try:
-            new_videos_data = self._fetch_videos_from_youtube(channel_id, after_date=latest_date)
-            new_videos = []
-            for video_data in new_videos_data:
-                video = Video(**video_data)
-                self.db.add(video)
-                new_videos.append(video)
-            
-            if new_videos:
-                self.db.commit()
-                for video in new_videos:
-                    self.db.refresh(video)
-                cached_videos.extend(new_videos)
-            
+            refresh = await self._fetch_new_videos(
+                channel_id,
+                channel.uploads_playlist_id if channel else None,
+                after_date=self._latest_published(cached_videos),
+                etag=channel.uploads_etag if channel else None
+            )
+            cached_videos.extend(_save_videos(self.db, channel_id, refresh))
             return sorted(cached_videos, key=lambda x: x.published_at, reverse=True)
         except Exception as e:
             logger.error(f"Error fetching videos: {e}")
             return cached_videos if cached_videos else []
 
-    async def get_transcript(self, video_id: str) -> Optional[str]:
+    async def refresh_channels(
+        self,
+        channel_ids: List[str],
+        concurrency: int = REFRESH_CONCURRENCY,
+        deadline: float = REFRESH_DEADLINE
+    ) -> List[Video]:
+        """Refresh several channels concurrently and return all of their videos.
+
+        At most ``concurrency`` channels are fetched from YouTube at once. Channels
+        that are not refreshed within ``deadline`` seconds are served from their
+        cached videos while the fetch finishes in the background.
+        """
+        # Load every cached video in one query
+        statement = select(Video).where(Video.channel_id.in_(channel_ids))
+        cached: Dict[str, List[Video]] = {channel_id: [] for channel_id in channel_ids}
+        for video in self.db.exec(statement).all():
+            cached[video.channel_id].append(video)
+
+        statement = select(Channel.id, Channel.uploads_playlist_id, Channel.uploads_etag).where(
+            Channel.id.in_(channel_ids)
+        )
+        uploads = {row[0]: (row[1], row[2]) for row in self.db.exec(statement).all()}
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(channel_id: str) -> UploadsRefresh:
+            playlist_id, etag = uploads.get(channel_id, (None, None))
+            if not playlist_id:
+                # Resolved outside the semaphore so lookups batch together
+                playlist_id = await self._fetch_uploads_playlist_id(channel_id)
+            async with semaphore:
+                return await self._fetch_new_videos(
+                    channel_id,
+                    playlist_id,
+                    after_date=self._latest_published(cached[channel_id]),
+                    etag=etag
+                )
+
+        fetches = {channel_id: asyncio.create_task(fetch(channel_id)) for channel_id in channel_ids}
+        if fetches:
+            await asyncio.wait(fetches.values(), timeout=deadline)
+
+        # Sort keys are read now, since saving expires the cached videos
+        videos = [(video.published_at, video) for channel_id in channel_ids for video in cached[channel_id]]
+        refreshed = {}
+        for channel_id, task in fetches.items():
+            if not task.done():
+                # Serve the cache now and store the result once it arrives
+                logger.info(f"Channel {channel_id} missed the refresh deadline, serving cached videos")
+                background = asyncio.create_task(_finish_refresh(task, channel_id))
+                _background_tasks.add(background)
+                background.add_done_callback(_background_tasks.discard)
+            elif task.exception():
+                logger.error(f"Error fetching videos for channel {channel_id}: {task.exception()}")
+            else:
+                refreshed[channel_id] = task.result()
+
+        videos.extend((video.published_at, video) for video in _save_refreshes(self.db, refreshed))
+        videos.sort(key=lambda pair: pair[0], reverse=True)
+        return [video for _, video in videos]
+
+    async def backfill_videos(self, channel_id: str, max_pages: Optional[int] = None) -> List[Video]:
+        """Walk a channel's whole upload history and cache any missing videos.
+
+        ``max_pages`` limits how many pages of 50 uploads are fetched.
+        """
+        channel = self.db.get(Channel, channel_id)
+        playlist_id = channel.uploads_playlist_id if channel else None
+        if not playlist_id:
+            playlist_id = await self._fetch_uploads_playlist_id(channel_id)
+
+        refresh = await self._fetch_videos_from_youtube(channel_id, playlist_id, max_pages=max_pages)
+        return _save_videos(self.db, channel_id, refresh)
+
+    async def _fetch_new_videos(
+        self,
+        channel_id: str,
+        playlist_id: Optional[str],
+        after_date: Optional[datetime] = None,
+        etag: Optional[str] = None
+    ) -> UploadsRefresh:
+        """Fetch videos newer than ``after_date``, resolving the uploads playlist if needed.
+
+        ``etag`` is only sent when there are cached videos to fall back on.
+        """
+        if not playlist_id:
+            playlist_id = await self._fetch_uploads_playlist_id(channel_id)
+
+        if not after_date:
+            return await self._fetch_videos_from_youtube(channel_id, playlist_id, max_pages=INITIAL_PAGES)
+        return await self._fetch_videos_from_youtube(
+            channel_id, playlist_id, after_date, MAX_REFRESH_PAGES, etag=etag
+        )
+
+    async def get_transcript(self, video_id: str, languages: Sequence[str] = ('en',)) -> Optional[str]:
         """Get transcript for a video, using cache when possible."""
         # Check cache first
+        store = TranscriptStore(self.db)
+        cached = store.get(video_id, languages)
+        if cached:
+            return decode_text(cached.segments)
+
+        # Transcripts cached before the transcript store existed
         statement = select(Video).where(Video.id == video_id)
         video = self.db.exec(statement).first()
         if video and video.transcript:
@@ -95,141 +416,285 @@ class YouTubeService:
 
         # If not in cache, fetch from YouTube
         try:
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            formatter = TextFormatter()
-            transcript = formatter.format_transcript(transcript_list)
-
-            # Cache the transcript
-            if video:
-                video.transcript = transcript
-                video.transcript_fetched = datetime.utcnow()
-                self.db.add(video)
-                self.db.commit()
-                self.db.refresh(video)
-
-            return transcript
+            fetched = await self._fetch_transcript(video_id, tuple(languages))
+            return fetched.text
         except Exception as e:
             logger.error(f"Error fetching transcript: {e}")
             return None
 
+    async def get_transcript_body(self, video_id: str, format: str = 'text', encoding: str = 'identity',
+                                  languages: Sequence[str] = ('en',)) -> Optional[bytes]:
+        """Get a cached transcript as an encoded response body.
+
+        Returns None if the transcript is not cached; ``get_transcript``
+        fetches it. See ``transcript_encoding`` for the formats and encodings.
+        The first request for a body renders and compresses it, which takes
+        long enough at the highest levels that it runs in a worker thread.
+        """
+        return await asyncio.to_thread(_transcript_body, video_id, format, encoding, languages)
+
+    def get_transcript_version(self, video_id: str, languages: Sequence[str] = ('en',)) -> Optional[Tuple[str, datetime]]:
+        """Identify the cached transcript ``get_transcript`` would return.
+
+        Returns a version string and the time the transcript was fetched, or
+        None if it is not cached. The transcript text is never read.
+        """
+        cached = TranscriptStore(self.db).version(video_id, languages)
+        if cached:
+            language, fetched_at = cached
+            return f"{video_id}:{language}:{fetched_at.isoformat()}", fetched_at
+
+        # Transcripts cached before the transcript store existed
+        statement = select(Video.transcript_fetched, Video.updated_at).where(
+            Video.id == video_id,
+            Video.transcript != None,
+            Video.transcript != ''
+        )
+        legacy = self.db.exec(statement).first()
+        if legacy:
+            modified = legacy[0] or legacy[1]
+            return f"{video_id}:legacy:{modified.isoformat()}", modified
+        return None
+
+    async def _fetch_transcript(self, video_id: str, languages: Tuple[str, ...]) -> FetchedTranscript:
+        """Fetch and store a transcript, joining a fetch already in progress for it.
+
+        However many requests wait for the same transcript, it is downloaded
+        and written to the store once.
+        """
+        key = (video_id, languages)
+        task = _transcript_fetches.get(key)
+        if task is None:
+            task = asyncio.create_task(self._download_and_store_transcript(video_id, languages))
+            _transcript_fetches[key] = task
+            task.add_done_callback(lambda _: _transcript_fetches.pop(key, None))
+
+        # Shielded so one cancelled caller does not fail the others
+        return await asyncio.shield(task)
+
+    async def _download_and_store_transcript(self, video_id: str, languages: Tuple[str, ...]) -> FetchedTranscript:
+        """Download a transcript and store it, both off the event loop."""
+        async with _transcript_semaphore:
+            fetched = await self.client.run(_download_transcript, video_id, languages)
+        await asyncio.to_thread(_store_transcript, video_id, fetched)
+        return fetched
+
+    def _latest_published(self, videos: List[Video]) -> Optional[datetime]:
+        """Get the publish date of the newest video, if any."""
+        if not videos:
+            return None
+        return max(v.published_at for v in videos)
+
     def _is_cache_fresh(self, last_fetched: datetime, max_age_hours: int = 24) -> bool:
         """Check if cached data is fresh enough."""
         if not last_fetched:
             return False
         return datetime.utcnow() - last_fetched < timedelta(hours=max_age_hours)
 
-    def _extract_channel_id(self, url: str) -> str:
-        """Extract channel ID from URL."""
+    async def resolve_channel_id(self, url: str) -> str:
+        """Extract channel ID from URL.
+
+        Handles and custom URLs are resolved through the alias cache before
+        falling back to a search, which costs 100 quota units.
+        """
+        kind, name = parse_channel_url(url)
+
+        # Handle direct channel URLs
+        if kind == 'channel':
+            return name
+
+        if kind == 'handle':
+            not_found = f"Could not find channel for username: {name}"
+        else:
+            not_found = f"Could not find channel for custom URL: {name}"
+
+        alias = f"{kind}:{name.lower()}"
+        channel_id = self._lookup_alias(alias)
+        if channel_id is None:
+            raise ValueError(not_found)
+        if channel_id is not _MISSING:
+            return channel_id
+
         if not self.youtube:
             raise ValueError("YouTube API key not configured")
 
-        # Handle @username format
-        if '@' in url:
-            username = url.split('@')[-1].split('/')[0]
-            request = self.youtube.search().list(
-                part='snippet',
-                q=username,
-                type='channel',
-                maxResults=1
-            )
-            response = request.execute()
-            
-            if response['items']:
-                return response['items'][0]['id']['channelId']
-            raise ValueError(f"Could not find channel for username: {username}")
-            
-        # Handle direct channel URLs
-        if '/channel/' in url:
-            return url.split('/channel/')[-1].split('/')[0]
-            
-        # Handle custom URLs
-        if '/c/' in url or '/user/' in url:
-            custom_id = url.split('/')[-1]
-            request = self.youtube.search().list(
-                part='snippet',
-                q=custom_id,
-                type='channel',
-                maxResults=1
-            )
-            response = request.execute()
-            
-            if response['items']:
-                return response['items'][0]['id']['channelId']
-            raise ValueError(f"Could not find channel for custom URL: {custom_id}")
-            
-        raise ValueError("Invalid YouTube channel URL format")
+        request = self.youtube.search().list(
+            part='snippet',
+            q=name,
+            type='channel',
+            maxResults=1
+        )
+        response = await self.client.execute(request)
+
+        channel_id = response['items'][0]['id']['channelId'] if response['items'] else None
+        self._store_alias(alias, channel_id)
+        if not channel_id:
+            raise ValueError(not_found)
+        return channel_id
+
+    def _lookup_alias(self, alias: str):
+        """Look up a resolved alias in memory, then in the database.
 
-    def _fetch_channel_from_youtube(self, channel_id: str) -> dict:
-        """Fetch channel info from YouTube."""
+        Returns the channel ID, ``None`` for an alias recently found not to
+        exist, or ``_MISSING`` when the alias still has to be resolved.
+        """
+        channel_id = _alias_cache.get(alias, _MISSING)
+        if channel_id is not _MISSING:
+            return channel_id
+
+        row = self.db.get(ChannelAlias, alias)
+        if row is None:
+            return _MISSING
+
+        if row.channel_id:
+            _alias_cache.set(alias, row.channel_id)
+            return row.channel_id
+
+        remaining = NEGATIVE_ALIAS_TTL - (datetime.utcnow() - row.resolved_at).total_seconds()
+        if remaining <= 0:
+            return _MISSING
+        _alias_cache.set(alias, None, ttl=remaining)
+        return None
+
+    def _store_alias(self, alias: str, channel_id: Optional[str]):
+        """Remember what an alias resolved to; ``None`` if nothing was found."""
+        self.db.merge(ChannelAlias(alias=alias, channel_id=channel_id, resolved_at=datetime.utcnow()))
+        self.db.commit()
+        _alias_cache.set(alias, channel_id, ttl=None if channel_id else NEGATIVE_ALIAS_TTL)
+
+    async def _fetch_channel_from_youtube(self, channel_id: str, etag: Optional[str] = None) -> Optional[dict]:
+        """Fetch channel info from YouTube.
+
+        New channels are looked up through the batcher. A refresh of a known
+        channel passes its ``etag`` and is sent on its own as a conditional
+        request, which a batch cannot be; ``None`` is returned if the channel
+        has not changed. The ETag kept is the response's when there is one,
+        since that is what the API compares If-None-Match against. A channel
+        found through the batcher only has its item's ETag, so its first
+        refresh is a full fetch.
+        """
         if not self.youtube:
             raise ValueError("YouTube API key not configured")
 
         try:
-            channel_response = self.youtube.channels().list(
-                part='snippet,contentDetails',
-                id=channel_id
-            ).execute()
-            
-            if not channel_response['items']:
+            if etag:
+                response = await self.client.execute(self.youtube.channels().list(
+                    part='snippet,contentDetails',
+                    id=channel_id
+                ), etag=etag)
+                if response is None:
+                    return None
+                channel_info = next(iter(response.get('items', [])), None)
+                new_etag = response.get('etag')
+            else:
+                channel_info = await self.client.channel_batcher.get(channel_id)
+                new_etag = channel_info.get('etag') if channel_info else None
+            if not channel_info:
                 raise ValueError("Channel not found")
-            
-            channel_info = channel_response['items'][0]
+
             return {
                 'id': channel_info['id'],
                 'title': channel_info['snippet']['title'],
                 'description': channel_info['snippet']['description'],
                 'thumbnail_url': channel_info['snippet']['thumbnails']['high']['url'],
-                'url': f"https://youtube.com/channel/{channel_info['id']}"
+                'url': f"https://youtube.com/channel/{channel_info['id']}",
+                'uploads_playlist_id': channel_info['contentDetails']['relatedPlaylists'].get('uploads'),
+                'etag': new_etag
             }
         except Exception as e:
             logger.error(f"Error fetching channel info: {e}")
             raise ValueError(f"Error fetching channel info: {e}")
 
-    def _fetch_videos_from_youtube(self, channel_id: str, after_date: Optional[datetime] = None) -> List[dict]:
-        """Fetch videos from YouTube."""
+    async def _fetch_uploads_playlist_id(self, channel_id: str) -> str:
+        """Look up the ID of a channel's uploads playlist."""
         if not self.youtube:
             raise ValueError("YouTube API key not configured")
 
-        try:
-            # Get channel's uploads playlist
-            channel_response = self.youtube.channels().list(
-                part='contentDetails',
-                id=channel_id
-            ).execute()
-            
-            if not channel_response['items']:
-                raise ValueError("Channel not found")
-            
-            playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-            
-            # Get videos from uploads playlist
-            videos_response = self.youtube.playlistItems().list(
+        channel_info = await self.client.channel_batcher.get(channel_id)
+        if not channel_info:
+            raise ValueError("Channel not found")
+
+        return channel_info['contentDetails']['relatedPlaylists']['uploads']
+
+    async def _iter_playlist_pages(
+        self,
+        playlist_id: str,
+        max_pages: Optional[int] = None,
+        etag: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        """Yield the responses for a playlist one page at a time, newest first.
+
+        Nothing is yielded if the first page has not changed since ``etag``.
+        """
+        page_token = None
+        pages = 0
+        while True:
+            response = await self.client.execute(self.youtube.playlistItems().list(
                 part='snippet',
                 playlistId=playlist_id,
-                maxResults=50  # Increased to get more videos
-            ).execute()
-            
-            videos = []
-            for item in videos_response['items']:
-                snippet = item['snippet']
-                published_at = datetime.strptime(snippet['publishedAt'], '%Y-%m-%dT%H:%M:%SZ')
-                
-                # Skip if we already have newer videos
-                if after_date and published_at <= after_date:
-                    continue
-                
-                video_data = {
-                    'id': snippet['resourceId']['videoId'],
-                    'channel_id': channel_id,
-                    'title': snippet['title'],
-                    'description': snippet['description'],
-                    'thumbnail_url': snippet['thumbnails']['high']['url'],
-                    'published_at': published_at,
-                    'url': f"https://youtube.com/watch?v={snippet['resourceId']['videoId']}"
-                }
-                videos.append(video_data)
-            
-            return videos
+                maxResults=50,
+                pageToken=page_token
+            ), etag=etag if page_token is None else None)
+            if response is None:
+                return
+            yield response
+
+            pages += 1
+            page_token = response.get('nextPageToken')
+            if not page_token or (max_pages and pages >= max_pages):
+                return
+
+    async def _fetch_videos_from_youtube(
+        self,
+        channel_id: str,
+        playlist_id: str,
+        after_date: Optional[datetime] = None,
+        max_pages: Optional[int] = None,
+        etag: Optional[str] = None
+    ) -> UploadsRefresh:
+        """Fetch videos from a channel's uploads playlist.
+
+        Pages are fetched until one reaches ``after_date`` or ``max_pages`` pages
+        have been read. Only the first page is conditional on ``etag``; when it is
+        unchanged no videos are returned and the ETag is kept.
+        """
+        if not self.youtube:
+            raise ValueError("YouTube API key not configured")
+
+        try:
+            refresh = UploadsRefresh(playlist_id=playlist_id, videos=[], etag=etag)
+            first_page = True
+            async for response in self._iter_playlist_pages(playlist_id, max_pages, etag):
+                if first_page:
+                    refresh.etag = response.get('etag')
+                    first_page = False
+
+                reached_cutoff = False
+                for item in response['items']:
+                    snippet = item['snippet']
+                    published_at = datetime.strptime(snippet['publishedAt'], '%Y-%m-%dT%H:%M:%SZ')
+
+                    # Skip if we already have newer videos
+                    if after_date and published_at <= after_date:
+                        reached_cutoff = True
+                        continue
+
+                    video_data = {
+                        'id': snippet['resourceId']['videoId'],
+                        'channel_id': channel_id,
+                        'title': snippet['title'],
+                        'description': snippet['description'],
+                        'thumbnail_url': snippet['thumbnails']['high']['url'],
+                        'published_at': published_at,
+                        'url': f"https://youtube.com/watch?v={snippet['resourceId']['videoId']}"
+                    }
+                    refresh.videos.append(video_data)
+
+                # Older pages only hold videos we already have
+                if reached_cutoff:
+                    break
+
+            return refresh
         except Exception as e:
             logger.error(f"Error fetching videos: {e}")
-            raise ValueError(f"Error fetching videos: {e}")
\ No newline at end of file
+            raise ValueError(f"Error fetching videos: {e}")
@@ -0,0 +1,24 @@
+"""Benchmarks run against a scratch database, never the real one.
+
+Run them with ``pytest benchmarks``; they are not part of the test suite.
+"""
+import os
+import statistics
+import tempfile
+
+os.environ['BREVIFY_DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp(prefix='brevify-bench-')}/brevify.db"
+
+import pytest
+
+from tests.support import reset_database
+
+@pytest.fixture
+def database():
+    """An empty database."""
+    reset_database()
+
+def record_percentiles(benchmark):
+    """Add the p50 and p99 of a finished benchmark's rounds to its extra info."""
+    rounds = sorted(benchmark.stats.stats.data)
+    benchmark.extra_info['p50_ms'] = round(statistics.median(rounds) * 1000, 2)
+    benchmark.extra_info['p99_ms'] = round(rounds[min(len(rounds) - 1, int(len(rounds) * 0.99))] * 1000, 2)
@@ -0,0 +1,46 @@
+"""Read and write throughput of the shared engine under concurrent requests.
+
+Each operation is what one request to the URL history API does: open a
+session, then either record a URL or list the recent ones. One in five is a
+write.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlmodel import Session
+
+from app.db.database import engine
+from app.services.url_history_service import URLHistoryService
+
+WORKERS = [1, 4, 16]
+
+OPERATIONS = 2000
+
+WRITE_EVERY = 5
+
+@pytest.fixture
+def history(database):
+    """A database with some URL history to read."""
+    with Session(engine) as db:
+        URLHistoryService(db).add_urls(
+            [{'url': f'https://youtube.com/watch?v=seed{i}', 'title': f'Seed {i}'} for i in range(1000)],
+            source='manual'
+        )
+
+def operation(i: int):
+    """One request's worth of database work."""
+    with Session(engine) as db:
+        service = URLHistoryService(db)
+        if i % WRITE_EVERY == 0:
+            service.add_url(f'https://youtube.com/watch?v={i}', f'Video {i}')
+        else:
+            service.get_recent_url_dicts(20)
+
+@pytest.mark.parametrize('workers', WORKERS)
+def test_mixed_throughput(benchmark, history, workers):
+    def run():
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(operation, range(OPERATIONS)))
+
+    benchmark.pedantic(run, rounds=3)
+    benchmark.extra_info['operations_per_second'] = round(OPERATIONS / benchmark.stats.stats.median)
@@ -0,0 +1,72 @@
+"""Index page latency with 10, 100 and 1000 channels.
+
+``test_refresh_channels`` times the concurrent refresh that keeps the index
+fresh, against a stubbed YouTube client with a fixed round trip per call.
+``test_index_page`` times rendering ``/`` itself from the cached videos.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.db.database import engine
+from app.models.models import Channel, Video
+from app.services.fragment_cache import fragment_cache
+from app.services.youtube_service import YouTubeService
+from benchmarks.conftest import record_percentiles
+from tests.support import FakeYouTubeClient
+
+CHANNEL_COUNTS = [10, 100, 1000]
+
+# Simulated YouTube API round trip
+API_LATENCY = 0.02
+
+VIDEOS_PER_CHANNEL = 5
+
+def add_channels(count: int):
+    """Cache ``count`` channels that each have a few videos."""
+    newest = datetime(2024, 1, 1)
+    with Session(engine) as db:
+        for c in range(count):
+            channel_id = f'UC{c:06d}'
+            db.add(Channel(
+                id=channel_id, title=f'Channel {c}', description='', url='', thumbnail_url='',
+                uploads_playlist_id=f'UU{channel_id}'
+            ))
+            for v in range(VIDEOS_PER_CHANNEL):
+                db.add(Video(
+                    id=f'{channel_id}-{v}', channel_id=channel_id, title=f'Video {v}', description='',
+                    thumbnail_url='', url='', published_at=newest - timedelta(days=v, minutes=c)
+                ))
+        db.commit()
+    return [f'UC{c:06d}' for c in range(count)]
+
+@pytest.mark.parametrize('channels', CHANNEL_COUNTS)
+def test_refresh_channels(benchmark, database, channels):
+    channel_ids = add_channels(channels)
+    # Uploads are no newer than the cached videos, so every refresh finds nothing new
+    client = FakeYouTubeClient(latency=API_LATENCY, newest_upload=datetime(2024, 1, 1) - timedelta(days=1))
+
+    def refresh():
+        with Session(engine) as db:
+            asyncio.run(YouTubeService(db, client).refresh_channels(channel_ids))
+
+    benchmark.pedantic(refresh, rounds=20 if channels < 1000 else 5)
+    client.shutdown()
+    record_percentiles(benchmark)
+
+@pytest.mark.parametrize('channels', CHANNEL_COUNTS)
+def test_index_page(benchmark, database, channels):
+    add_channels(channels)
+    import main
+
+    with TestClient(main.app) as client:
+        # Each round renders the feed instead of reusing the cached fragment
+        benchmark.pedantic(
+            lambda: client.get('/').raise_for_status(),
+            setup=fragment_cache.clear,
+            rounds=100
+        )
+    record_percentiles(benchmark)
@@ -0,0 +1,37 @@
+"""Saved URL inserts per second, one transaction each versus batched."""
+import itertools
+
+from app.db.saved_urls import save_url, save_urls
+from app.services.url_service import URLService
+
+URLS = 5000
+
+_batches = itertools.count()
+
+def new_urls() -> list:
+    """URLs that have not been saved before, so every insert adds a row."""
+    batch = next(_batches)
+    return [f'https://youtube.com/@channel{batch}-{i}' for i in range(URLS)]
+
+def record_rate(benchmark):
+    """Add the inserts per second of a finished benchmark to its extra info."""
+    benchmark.extra_info['inserts_per_second'] = round(URLS / benchmark.stats.stats.median)
+
+def test_save_url_each(benchmark, database):
+    benchmark.pedantic(lambda urls: [save_url(url) for url in urls],
+                       setup=lambda: ((new_urls(),), {}), rounds=3)
+    record_rate(benchmark)
+
+def test_save_urls_batched(benchmark, database):
+    benchmark.pedantic(save_urls, setup=lambda: ((new_urls(),), {}), rounds=10)
+    record_rate(benchmark)
+
+def test_url_service_save_urls_with_metadata(benchmark, database):
+    service = URLService()
+    metadata = {'channel_name': 'Channel', 'last_video_title': 'Video', 'last_video_date': '2024-01-01'}
+    benchmark.pedantic(
+        service.save_urls,
+        setup=lambda: (([(url, metadata) for url in new_urls()],), {}),
+        rounds=10
+    )
+    record_rate(benchmark)
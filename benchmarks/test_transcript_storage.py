@@ -0,0 +1,79 @@
+"""Database size and read latency of compressed segment storage.
+
+Compares the old layout, a transcript's plain text in ``Video.transcript``,
+with the compressed segment blobs of ``transcript_codec``. Transcripts are
+generated to look like an hour of speech each.
+"""
+import os
+import random
+import sqlite3
+from itertools import accumulate
+
+import pytest
+
+from app.services.transcript_codec import decode_segments, decode_text, encode_segments
+
+# Transcripts in each database
+TRANSCRIPTS = int(os.getenv('BREVIFY_BENCH_TRANSCRIPTS', '2000'))
+
+# About an hour of speech, at a segment every 2.5 seconds
+SEGMENTS_PER_TRANSCRIPT = 1500
+
+def make_segments(rng: random.Random, vocabulary: list, cum_weights: list) -> list:
+    """Generate timed segments with a natural-language-like word distribution."""
+    segments = []
+    start = 0.0
+    for _ in range(SEGMENTS_PER_TRANSCRIPT):
+        duration = round(rng.uniform(1.5, 4.0), 3)
+        text = ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(5, 12)))
+        segments.append({'text': text, 'start': round(start, 3), 'duration': duration})
+        start += duration
+    return segments
+
+@pytest.fixture(scope='module')
+def databases(tmp_path_factory):
+    """Paths of the old and new layout databases, filled with the same transcripts."""
+    rng = random.Random(0)
+    vocabulary = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(2, 9))) for _ in range(5000)]
+    cum_weights = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+
+    directory = tmp_path_factory.mktemp('transcripts')
+    old = sqlite3.connect(directory / 'text.db')
+    new = sqlite3.connect(directory / 'segments.db')
+    old.execute('CREATE TABLE video (id TEXT PRIMARY KEY, transcript TEXT)')
+    new.execute('CREATE TABLE transcript (video_id TEXT, language TEXT, segments BLOB, '
+                'PRIMARY KEY (video_id, language))')
+    for i in range(TRANSCRIPTS):
+        segments = make_segments(rng, vocabulary, cum_weights)
+        text = '\n'.join(segment['text'] for segment in segments)
+        old.execute('INSERT INTO video VALUES (?, ?)', (f'v{i}', text))
+        new.execute('INSERT INTO transcript VALUES (?, ?, ?)', (f'v{i}', 'en', encode_segments(segments)))
+    for connection in (old, new):
+        connection.commit()
+        connection.execute('VACUUM')
+        connection.close()
+    return directory / 'text.db', directory / 'segments.db'
+
+def read_one(path, sql: str):
+    """A function reading a random transcript's column with ``sql``."""
+    connection = sqlite3.connect(path)
+    rng = random.Random(1)
+    return lambda: connection.execute(sql, (f'v{rng.randrange(TRANSCRIPTS)}',)).fetchone()[0]
+
+def test_database_size(databases, record_property):
+    old, new = (os.path.getsize(path) for path in databases)
+    record_property('text_mb', round(old / 2**20, 1))
+    record_property('segments_mb', round(new / 2**20, 1))
+    assert new < old, f"segments {new / 2**20:.1f} MB, text {old / 2**20:.1f} MB"
+
+def test_read_text_column(benchmark, databases):
+    read = read_one(databases[0], 'SELECT transcript FROM video WHERE id = ?')
+    benchmark(read)
+
+def test_read_compressed_text(benchmark, databases):
+    read = read_one(databases[1], "SELECT segments FROM transcript WHERE video_id = ? AND language = 'en'")
+    benchmark(lambda: decode_text(read()))
+
+def test_read_compressed_segments(benchmark, databases):
+    read = read_one(databases[1], "SELECT segments FROM transcript WHERE video_id = ? AND language = 'en'")
+    benchmark(lambda: decode_segments(read()))
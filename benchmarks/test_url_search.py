@@ -0,0 +1,51 @@
+"""URL history search latency with the trigram index versus ``LIKE`` scans.
+
+Run with ``--benchmark-group-by=param:rows`` to compare the two at each size.
+"""
+import random
+from datetime import datetime
+
+import pytest
+from sqlmodel import Session
+
+from app.db import search_index
+from app.db.database import engine
+from app.services.url_history_service import URLHistoryService
+from benchmarks.conftest import record_percentiles
+from tests.support import reset_database
+
+ROWS = [10_000, 100_000, 1_000_000]
+
+WORDS = ['guitar', 'lesson', 'review', 'podcast', 'live', 'tutorial', 'cooking', 'travel',
+         'python', 'music', 'news', 'gaming', 'science', 'history', 'workout', 'vlog']
+
+# Matches about one row in 250, so results are a full page at every size
+QUERY = 'guitar tutorial'
+
+INSERT_URL = '''
+    INSERT INTO url_history (url, title, created_at, last_accessed, access_count, is_favorite, source)
+    VALUES (?, ?, ?, ?, 1, 0, 'manual')
+'''
+
+@pytest.fixture(scope='module', params=ROWS)
+def rows(request):
+    """A database with this many URLs in its history."""
+    reset_database()
+    rng = random.Random(request.param)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(INSERT_URL, [
+            (f'https://youtube.com/watch?v={i:011d}', ' '.join(rng.choices(WORDS, k=2)) + f' {i}', now, now)
+            for i in range(request.param)
+        ])
+    return request.param
+
+@pytest.mark.parametrize('index', [True, False], ids=['fts', 'like'])
+def test_search_urls(benchmark, rows, index, monkeypatch):
+    if not index:
+        monkeypatch.setattr(search_index, 'available_indexes', set())
+    with Session(engine) as db:
+        service = URLHistoryService(db)
+        results = benchmark.pedantic(service.search_url_dicts, args=(QUERY, 20), rounds=20)
+    assert len(results) == 20
+    record_percentiles(benchmark)
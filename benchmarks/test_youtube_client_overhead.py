@@ -0,0 +1,67 @@
+"""Startup and per-request overhead of the shared YouTube API client.
+
+Before the shared client, every request built its own API resource with
+``build()`` and its own HTTP connection. Now the resource is built once from
+the cached discovery document, and each worker thread keeps its connection
+alive between requests.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httplib2
+import pytest
+from googleapiclient.discovery import build, build_from_document
+
+from app.services.youtube_client import YouTubeClient, load_discovery_document
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answers every request at once, keeping the connection open."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this each response
+    # waits out a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"items": []}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope='module')
+def api_endpoint():
+    """URL of a local server standing in for the YouTube Data API."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}/youtube/v3/'
+    server.shutdown()
+    server.server_close()
+
+def test_build_per_request(benchmark):
+    """What each request used to pay to build its API resource."""
+    benchmark(build, 'youtube', 'v3', developerKey='test', cache_discovery=False)
+
+def test_shared_client_startup(benchmark, tmp_path):
+    """What the shared client pays once, at startup."""
+    cache_path = tmp_path / 'youtube.v3.json'
+    load_discovery_document(cache_path)
+    benchmark(lambda: build_from_document(load_discovery_document(cache_path), developerKey='test'))
+
+def test_request_new_connection(benchmark, api_endpoint):
+    """A request on a fresh connection, as with a resource built per request."""
+    youtube = build_from_document(load_discovery_document(), developerKey='test',
+                                  client_options={'api_endpoint': api_endpoint})
+    benchmark(lambda: youtube.channels().list(part='snippet', id='UC1').execute(http=httplib2.Http()))
+
+def test_request_kept_alive_connection(benchmark, api_endpoint):
+    """A request on a worker's kept-alive connection."""
+    client = YouTubeClient(max_workers=1)
+    client.youtube = build_from_document(load_discovery_document(), developerKey='test',
+                                         client_options={'api_endpoint': api_endpoint})
+    benchmark(lambda: client._execute(client.youtube.channels().list(part='snippet', id='UC1')))
+    client.shutdown()
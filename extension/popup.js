@@ -33,11 +33,11 @@ async function init() {
 
     currentVideo = videoId;
     
-    // Check for transcript
-    const response = await fetch(`${BREVIFY_API}/check-transcript?video_id=${videoId}`);
+    // Check for transcript without downloading it; the server fetches and caches it if needed
+    const response = await fetch(`${BREVIFY_API}/api/transcript/${encodeURIComponent(videoId)}/status`);
     const data = await response.json();
     
-    hasTranscript = data.has_transcript;
+    hasTranscript = Boolean(data.available);
     
     if (hasTranscript) {
       statusEl.innerHTML = '<p>✅ Transcript available</p>';
@@ -59,7 +59,7 @@ analyzeBtn.addEventListener('click', async () => {
     analyzeBtn.disabled = true;
     analyzeBtn.textContent = 'Loading...';
     
-    const response = await fetch(`${BREVIFY_API}/fetch-transcript?video_id=${currentVideo}`);
+    const response = await fetch(`${BREVIFY_API}/api/transcript/${encodeURIComponent(currentVideo)}`);
     const data = await response.json();
     
     if (data.transcript) {
@@ -1,18 +1,35 @@
 """Main FastAPI application."""
 import os
+import json
+import hashlib
 import logging
+from dataclasses import asdict
 from pathlib import Path
-from fastapi import FastAPI, Request, Depends, Form
-from fastapi.responses import HTMLResponse
+from typing import Literal, Optional
+from fastapi import FastAPI, Request, Response, Depends, Form, File, HTTPException, UploadFile
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from markupsafe import Markup
 from sqlmodel import Session
 
 from app.services.youtube_service import YouTubeService
+from app.services.youtube_client import get_youtube_client, shutdown_youtube_client
+from app.services.refresh_scheduler import RefreshScheduler
+from app.services.history_retention import HISTORY_RETENTION_DAYS, HistoryRetention
+from app.services.channel_import import ChannelImporter, parse_channel_urls, parse_subscriptions_file
+from app.services.search_service import SearchService
+from app.services.transcript_store import TranscriptStore
+from app.services.url_typeahead import url_typeahead
+from app.services.fragment_cache import fragment_cache
+from app.services.transcript_encoding import TRANSCRIPT_FORMATS, negotiate
+from app.services.ai_service import DEFAULT_CONFIGS, AIService, AIServiceType
+from app.services.llm_engine import LLMError, TokenUsage, llm_engine
 from app.components.video_list import VideoList
-from app.db.database import get_db, create_db_and_tables
-from app.models.models import Channel
+from app.db.database import engine, get_db, create_db_and_tables
+from app.api.url_history import router as url_history_router
+from app.api.http_cache import cache_headers, is_not_modified, make_etag, not_modified
 
 # Configure logging
 logging.basicConfig(
@@ -24,6 +41,15 @@ logger = logging.getLogger(__name__)
 # Get base directory
 BASE_DIR = Path(__file__).resolve().parent
 
+# Identifies the templates, so pages cached by browsers are not reused after they change
+TEMPLATE_DIGEST = hashlib.sha256(
+    b''.join(path.read_bytes() for path in sorted((BASE_DIR / "templates").glob("*.html")))
+).hexdigest()
+
+# Transcripts rarely change once fetched, so clients may reuse them briefly
+# and then revalidate, which the ETag answers with a 304
+TRANSCRIPT_CACHE_CONTROL = "public, max-age=300, must-revalidate"
+
 # Create FastAPI app
 app = FastAPI()
 
@@ -42,39 +68,92 @@ app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), na
 # Mount extension directory for development
 app.mount("/extension", StaticFiles(directory=os.path.join(BASE_DIR, "extension")), name="extension")
 
+# URL history API
+app.include_router(url_history_router)
+
 # Setup templates
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 
 # Initialize video list component
 video_list = VideoList(templates)
 
+# Keeps channel videos fresh so request handlers only read the database
+scheduler: Optional[RefreshScheduler] = None
+
+# Removes old URL history entries when BREVIFY_HISTORY_RETENTION_DAYS is set
+retention: Optional[HistoryRetention] = None
+
 @app.on_event("startup")
 async def on_startup():
-    """Create database tables on startup."""
+    """Create database tables, the shared YouTube client and background jobs."""
+    global scheduler, retention
     create_db_and_tables()
+    with Session(engine) as db:
+        TranscriptStore(db).index_missing()
+        url_typeahead.build(db)
+    client = get_youtube_client()
+    if client.youtube:
+        scheduler = RefreshScheduler(client)
+        scheduler.start()
+    if HISTORY_RETENTION_DAYS > 0:
+        retention = HistoryRetention(HISTORY_RETENTION_DAYS)
+        retention.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Stop background jobs, the YouTube API worker pool and AI connections on shutdown."""
+    if scheduler:
+        await scheduler.stop()
+    if retention:
+        await retention.stop()
+    shutdown_youtube_client()
+    await llm_engine.close()
 
 def get_youtube_service(db: Session = Depends(get_db)) -> YouTubeService:
     """Get YouTubeService instance with database session."""
     return YouTubeService(db)
 
+def render_feed_page(youtube_service: YouTubeService, cursor: Optional[str] = None) -> Markup:
+    """Render a page of the video feed, reusing it until new videos are saved.
+
+    Raises ValueError if the cursor is malformed.
+    """
+    key = fragment_cache.feed_key(cursor)
+    html = fragment_cache.get(key)
+    if html is None:
+        page = youtube_service.get_feed_page(cursor)
+        html = video_list.render_page(page.videos, page.next_cursor)
+        fragment_cache.set(key, html)
+    return Markup(html)
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request, youtube_service: YouTubeService = Depends(get_youtube_service)):
-    """Render the main page."""
-    # Get all channels and their videos
-    db = youtube_service.db
-    channels = db.query(Channel).all()
-    videos = []
-    for channel in channels:
-        channel_videos = await youtube_service.get_videos(channel.id)
-        videos.extend(channel_videos)
-    
-    # Sort by published date
-    videos.sort(key=lambda x: x.published_at, reverse=True)
-    
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "videos": videos
-    })
+    """Render the main page with the first page of the video feed."""
+    # Videos are kept fresh by the refresh scheduler
+    feed = render_feed_page(youtube_service)
+
+    headers = cache_headers(make_etag(TEMPLATE_DIGEST, hashlib.sha256(feed.encode()).hexdigest()))
+    if is_not_modified(request, headers['ETag']):
+        return not_modified(headers)
+
+    # Streamed, so the page starts arriving before all of it is rendered
+    template = templates.get_template("index.html")
+    return StreamingResponse(
+        template.generate(request=request, feed=feed),
+        media_type="text/html",
+        headers=headers
+    )
+
+@app.get("/api/videos", response_class=HTMLResponse)
+async def get_feed_page(
+    cursor: str,
+    youtube_service: YouTubeService = Depends(get_youtube_service)
+):
+    """Render the next page of the video feed for htmx to append."""
+    try:
+        return HTMLResponse(render_feed_page(youtube_service, cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/api/channel")
 async def add_channel(
@@ -92,25 +171,145 @@ async def add_channel(
         # Fetch videos (this will cache them)
         videos = await youtube_service.get_videos(channel.id)
         
-        # Return the video list partial
-        return templates.TemplateResponse("video_list.html", {
-            "request": request,
-            "videos": videos
-        })
+        # Return the video list partial, rendered again only when it changed
+        latest_update = max((video.updated_at for video in videos), default=None)
+        key = fragment_cache.channel_key(channel.id, latest_update)
+        html = fragment_cache.get(key)
+        if html is None:
+            html = video_list.render_page(videos)
+            fragment_cache.set(key, html)
+        return HTMLResponse(html)
     except Exception as e:
         logger.error(f"Error adding channel: {e}")
         return {"error": str(e)}
 
+@app.post("/api/channels/import")
+async def import_channels(
+    channel_urls: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None)
+):
+    """Import many channels at once, streaming progress as Server-Sent Events.
+
+    Accepts pasted URLs, an OPML file or a Google Takeout subscriptions.csv.
+    """
+    urls = parse_channel_urls(channel_urls or '')
+    if file:
+        try:
+            urls.extend(parse_subscriptions_file(await file.read()))
+        except Exception as e:
+            logger.error(f"Error reading subscriptions file: {e}")
+            return {"error": f"Could not read subscriptions file: {e}"}
+
+    importer = ChannelImporter()
+
+    async def events():
+        added = duplicates = failed = 0
+        async for progress in importer.run(urls):
+            if progress['status'] == 'added':
+                added += 1
+            elif progress['status'] == 'duplicate':
+                duplicates += 1
+            else:
+                failed += 1
+            yield f"event: progress\ndata: {json.dumps(progress)}\n\n"
+        totals = {'added': added, 'duplicates': duplicates, 'failed': failed}
+        yield f"event: done\ndata: {json.dumps(totals)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.get("/api/transcript/{video_id}")
 async def get_transcript(
     video_id: str,
+    request: Request,
+    format: Literal[TRANSCRIPT_FORMATS] = 'text',
+    youtube_service: YouTubeService = Depends(get_youtube_service)
+):
+    """Get transcript for a specific video.
+
+    ``format=segments`` returns ``[start_ms, duration_ms, text]`` rows instead
+    of the plain text. Bodies are compressed as negotiated by Accept-Encoding,
+    once per transcript. Cached transcripts carry an ETag and Last-Modified,
+    and conditional requests for them are answered with 304 without reading
+    the transcript.
+    """
+    encoding = negotiate(request.headers.get('accept-encoding'))
+    version = youtube_service.get_transcript_version(video_id)
+    if version:
+        headers = _transcript_headers(version, format, encoding)
+        if is_not_modified(request, headers['ETag'], version[1]):
+            return not_modified(headers)
+
+    body = await youtube_service.get_transcript_body(video_id, format, encoding)
+    if body is None and await youtube_service.get_transcript(video_id):
+        version = youtube_service.get_transcript_version(video_id)
+        body = await youtube_service.get_transcript_body(video_id, format, encoding)
+    if body is None:
+        # May become available later, so must not be cached
+        return JSONResponse({"transcript": None}, headers={"Cache-Control": "no-store"})
+    headers = _transcript_headers(version, format, encoding)
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/api/transcript/{video_id}/status")
+async def get_transcript_status(
+    video_id: str,
+    youtube_service: YouTubeService = Depends(get_youtube_service)
+):
+    """Tell whether a video has a transcript, fetching it if needed.
+
+    Cached transcripts are checked without reading or sending them.
+    """
+    available = bool(youtube_service.get_transcript_version(video_id) or await youtube_service.get_transcript(video_id))
+    return JSONResponse({"available": available}, headers={"Cache-Control": "no-store"})
+
+def _transcript_headers(version, format: str, encoding: str) -> dict:
+    """Caching headers for one format and encoding of a transcript."""
+    headers = cache_headers(make_etag(version[0], format, encoding), version[1], TRANSCRIPT_CACHE_CONTROL) if version else {}
+    headers['Vary'] = 'Accept-Encoding'
+    return headers
+
+@app.get("/api/ai/{video_id}")
+async def stream_ai(
+    video_id: str,
+    service: AIServiceType = AIServiceType.OPENAI,
+    template: str = "summarize",
     youtube_service: YouTubeService = Depends(get_youtube_service)
 ):
-    """Get transcript for a specific video."""
+    """Stream an AI response to a video's transcript as server-sent events.
+
+    Each message carries a JSON string of generated text. The stream ends with
+    a ``done`` event carrying the tokens used, or an ``error`` event.
+    """
+    ai_service = AIService(DEFAULT_CONFIGS[service])
+    if not ai_service.get_template(template):
+        raise HTTPException(status_code=404, detail=f"Template '{template}' not found")
     transcript = await youtube_service.get_transcript(video_id)
-    if transcript:
-        return {"transcript": transcript}
-    return {"transcript": None}
+    if not transcript:
+        raise HTTPException(status_code=404, detail="Transcript not available")
+    return StreamingResponse(
+        ai_events(ai_service, template, transcript),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    )
+
+async def ai_events(ai_service: AIService, template: str, transcript: str):
+    """Format an AI response stream as server-sent events."""
+    usage = TokenUsage()
+    try:
+        async for text in ai_service.stream_transcript(template, transcript, usage):
+            yield f"data: {json.dumps(text)}\n\n"
+    except LLMError as e:
+        logger.error(f"Error processing transcript with {ai_service.config.service_type.value}: {e}")
+        yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+        return
+    yield f"event: done\ndata: {json.dumps(asdict(usage))}\n\n"
+
+@app.get("/api/search")
+async def search(q: str, limit: int = 20, db: Session = Depends(get_db)):
+    """Search cached video titles, descriptions and transcripts."""
+    hits = SearchService(db).search(q, limit)
+    return {"results": [asdict(hit) for hit in hits]}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,38 @@
+"""Tests run against a scratch database, never the real one."""
+import os
+import tempfile
+from contextlib import contextmanager
+
+os.environ['BREVIFY_DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp(prefix='brevify-test-')}/brevify.db"
+
+import pytest
+from sqlalchemy import event
+
+from app.db.database import engine
+from tests.support import reset_database
+
+@pytest.fixture
+def database():
+    """An empty database."""
+    reset_database()
+
+@pytest.fixture
+def count_queries():
+    """Count the SQL statements run inside ``with count_queries() as queries:``.
+
+    ``queries`` is the list of statements, filled in as they run.
+    """
+    @contextmanager
+    def counting():
+        queries = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            queries.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield queries
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+    return counting
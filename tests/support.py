@@ -0,0 +1,162 @@
+"""Shared helpers for tests and benchmarks.
+
+``BREVIFY_DATABASE_URL`` must point at a scratch database before anything
+from ``app`` is imported; each conftest does that first.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.db.database import create_db_and_tables, engine
+from app.db.saved_urls import init_db
+from app.services import transcript_store, youtube_service
+from app.services.fragment_cache import fragment_cache
+from app.services.url_history_service import _tag_id_cache
+from app.services.url_typeahead import url_typeahead
+from app.services.youtube_client import YouTubeClient
+
+def reset_database():
+    """Replace the scratch database with an empty one and clear in-memory caches."""
+    engine.dispose()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(engine.url.database + suffix):
+            os.remove(engine.url.database + suffix)
+    create_db_and_tables()
+    init_db()
+
+    fragment_cache.clear()
+    transcript_store._total_size = None
+    youtube_service._alias_cache.clear()
+    _tag_id_cache.clear()
+    url_typeahead.ready = False
+
+class EventLoopTicks:
+    """Count timer ticks of the event loop while in ``async with``.
+
+    A blocked event loop stops ticking, so this shows whether awaited work
+    kept the loop free.
+    """
+
+    interval = 0.01
+
+    def __init__(self):
+        self.ticks = 0
+        self._ticker = None
+
+    async def __aenter__(self) -> 'EventLoopTicks':
+        self._ticker = asyncio.create_task(self._tick())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._ticker.cancel()
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.ticks += 1
+
+    def kept_running(self, seconds: float) -> bool:
+        """Whether the loop ticked at least half as often as a free loop would in ``seconds``."""
+        return self.ticks >= seconds / self.interval / 2
+
+class FakeRequest:
+    """Stands in for a googleapiclient HttpRequest."""
+
+    def __init__(self, method_id: str, params: Dict):
+        self.methodId = method_id
+        self.params = params
+        self.headers = {}
+
+class _FakeCollection:
+    """Stands in for a resource collection such as ``youtube.channels()``."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def list(self, **params) -> FakeRequest:
+        return FakeRequest(f'youtube.{self.name}.list', params)
+
+class _FakeResource:
+    """Stands in for the resource built from the discovery document."""
+
+    def channels(self):
+        return _FakeCollection('channels')
+
+    def playlistItems(self):
+        return _FakeCollection('playlistItems')
+
+    def search(self):
+        return _FakeCollection('search')
+
+class FakeYouTubeClient(YouTubeClient):
+    """YouTube client that answers from canned data instead of the network.
+
+    Requests still go through the real worker pool; each one sleeps for
+    ``latency`` seconds on its worker thread to stand in for the round trip.
+    Channels exist for any ID, and each uploads playlist has ``uploads``
+    videos published a day apart, ending on ``newest_upload``, served
+    ``page_size`` to a page. A request whose
+    If-None-Match matches the response's ETag gets ``None``, as for a 304.
+    """
+
+    def __init__(self, latency: float = 0.0, uploads: int = 3,
+                 newest_upload: Optional[datetime] = None,
+                 handles: Optional[Dict[str, str]] = None, page_size: int = 50, **kwargs):
+        super().__init__(api_key=None, **kwargs)
+        self.youtube = _FakeResource()
+        self.latency = latency
+        self.uploads = uploads
+        self.newest_upload = newest_upload or datetime(2024, 1, 1)
+        self.handles = handles or {}
+        self.page_size = page_size
+        self.requests: List[FakeRequest] = []
+
+    def _execute(self, request: FakeRequest) -> Optional[dict]:
+        self.requests.append(request)
+        if self.latency:
+            time.sleep(self.latency)
+        response = getattr(self, '_' + request.methodId.split('.')[1])(request.params)
+        etag = request.headers.get('If-None-Match')
+        if etag and etag == response.get('etag'):
+            return None
+        return response
+
+    def _channels(self, params: Dict) -> dict:
+        return {'etag': f"etag-list-{params['id']}", 'items': [
+            {
+                'id': channel_id,
+                'etag': f'etag-{channel_id}',
+                'snippet': {
+                    'title': f'Channel {channel_id}',
+                    'description': '',
+                    'thumbnails': {'high': {'url': f'https://example.com/{channel_id}.jpg'}}
+                },
+                'contentDetails': {'relatedPlaylists': {'uploads': f'UU{channel_id}'}}
+            }
+            for channel_id in params['id'].split(',')
+        ]}
+
+    def _playlistItems(self, params: Dict) -> dict:
+        playlist_id = params['playlistId']
+        start = int(params.get('pageToken') or 0)
+        end = min(start + min(params.get('maxResults', 50), self.page_size), self.uploads)
+        response = {'etag': f'etag-{playlist_id}-{self.newest_upload:%Y%m%d}-{start}', 'items': []}
+        for i in range(start, end):
+            published_at = self.newest_upload - timedelta(days=i)
+            response['items'].append({'snippet': {
+                'title': f'Video {i} of {playlist_id}',
+                'description': '',
+                'thumbnails': {'high': {'url': 'https://example.com/video.jpg'}},
+                'publishedAt': published_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                # Named after the upload date, so a video keeps its ID as newer ones arrive
+                'resourceId': {'videoId': f'{playlist_id}-{published_at:%Y%m%d}'}
+            }})
+        if end < self.uploads:
+            response['nextPageToken'] = str(end)
+        return response
+
+    def _search(self, params: Dict) -> dict:
+        channel_id = self.handles.get(params['q'])
+        return {'items': [{'id': {'channelId': channel_id}}] if channel_id else []}
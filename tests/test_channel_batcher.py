@@ -0,0 +1,74 @@
+"""Batching of channels().list lookups."""
+import asyncio
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from tests.support import FakeYouTubeClient
+
+class FailingClient(FakeYouTubeClient):
+    """Rejects any channels().list call that includes an ID in ``bad_ids``."""
+
+    def __init__(self, status: int, bad_ids, **kwargs):
+        super().__init__(**kwargs)
+        self.status = status
+        self.bad_ids = set(bad_ids)
+
+    def _channels(self, params):
+        if self.bad_ids & set(params['id'].split(',')):
+            raise HttpError(httplib2.Response({'status': self.status}), b'rejected')
+        return super()._channels(params)
+
+def sent_ids(client) -> list:
+    """The IDs of each channels().list call, in the order they were made."""
+    return [request.params['id'].split(',') for request in client.requests]
+
+def lookup(client, *waves):
+    """Look up each wave of channel IDs, starting each wave while the previous one is in flight."""
+    async def run():
+        lookups = []
+        for wave in waves:
+            lookups += [asyncio.ensure_future(client.channel_batcher.get(channel_id)) for channel_id in wave]
+            await asyncio.sleep(client.latency / 2)
+        return await asyncio.gather(*lookups, return_exceptions=True)
+
+    return asyncio.run(run())
+
+@pytest.fixture
+def client():
+    client = FakeYouTubeClient(latency=0.1)
+    yield client
+    client.shutdown()
+
+def test_lookups_in_flight_are_not_sent_again(client):
+    first = [f'UC{i}' for i in range(60)]
+    # Half repeat IDs from the first wave, which are in flight by now
+    second = [f'UC{i}' for i in range(30, 90)]
+
+    results = lookup(client, first, second)
+
+    assert [result['id'] for result in results] == first + second
+    sent = [channel_id for call in sent_ids(client) for channel_id in call]
+    assert sorted(sent) == sorted(f'UC{i}' for i in range(90))
+
+def test_failed_batch_is_split_until_the_bad_id_is_found():
+    client = FailingClient(400, ['UC3'], latency=0.01)
+    try:
+        results = lookup(client, [f'UC{i}' for i in range(8)])
+    finally:
+        client.shutdown()
+
+    assert isinstance(results[3], HttpError)
+    assert [result['id'] for i, result in enumerate(results) if i != 3] == \
+        [f'UC{i}' for i in range(8) if i != 3]
+
+def test_quota_error_fails_the_batch_without_retrying():
+    client = FailingClient(403, ['UC3'], latency=0.01)
+    try:
+        results = lookup(client, [f'UC{i}' for i in range(8)])
+    finally:
+        client.shutdown()
+
+    assert all(isinstance(result, HttpError) for result in results)
+    assert len(client.requests) == 1
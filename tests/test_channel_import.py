@@ -0,0 +1,80 @@
+"""Bulk channel import."""
+import asyncio
+import json
+
+import httplib2
+import pytest
+from fastapi.testclient import TestClient
+from googleapiclient.errors import HttpError
+from sqlmodel import Session, select
+
+from app.db.database import engine
+from app.models.models import Channel
+from app.services import channel_import, youtube_client
+from app.services.channel_import import ChannelImporter
+from tests.support import FakeYouTubeClient
+
+URLS = [
+    'https://www.youtube.com/@alpha',
+    'https://www.youtube.com/channel/UCalpha',
+    'https://www.youtube.com/channel/UCbeta',
+    'https://www.youtube.com/@overquota',
+    'https://www.youtube.com/channel/UCgamma',
+    'https://example.com/not-a-channel',
+]
+
+class QuotaClient(FakeYouTubeClient):
+    """Fails searches for ``overquota`` the way the API does when out of quota."""
+
+    def _search(self, params):
+        if params['q'] == 'overquota':
+            raise HttpError(httplib2.Response({'status': 403}), b'quotaExceeded')
+        return super()._search(params)
+
+@pytest.fixture
+def client(database):
+    client = QuotaClient(handles={'alpha': 'UCalpha'})
+    yield client
+    client.shutdown()
+
+def test_import_survives_duplicates_and_api_errors(client):
+    async def run():
+        return [progress async for progress in ChannelImporter(client).run(URLS)]
+
+    progress = {update['url']: update for update in asyncio.run(run())}
+
+    assert len(progress) == len(URLS)
+    statuses = sorted(update['status'] for update in progress.values())
+    assert statuses == ['added', 'added', 'added', 'duplicate', 'error', 'error']
+    assert 'quotaExceeded' in progress['https://www.youtube.com/@overquota']['error']
+    with Session(engine) as db:
+        assert sorted(db.exec(select(Channel.id)).all()) == ['UCalpha', 'UCbeta', 'UCgamma']
+
+def test_import_endpoint_always_finishes(client, monkeypatch):
+    import main
+    monkeypatch.setattr(youtube_client, '_client', client)
+
+    with TestClient(main.app) as http:
+        response = http.post('/api/channels/import', data={'channel_urls': '\n'.join(URLS)})
+
+    events = response.text.strip().split('\n\n')
+    assert events[-1].startswith('event: done')
+    assert json.loads(events[-1].split('data: ', 1)[1]) == {'added': 3, 'duplicates': 1, 'failed': 2}
+
+def test_each_channel_is_resolved_in_its_own_session(client, monkeypatch):
+    sessions = []
+
+    class RecordingService(channel_import.YouTubeService):
+        def __init__(self, db, *args, **kwargs):
+            sessions.append(db)
+            super().__init__(db, *args, **kwargs)
+
+    monkeypatch.setattr(channel_import, 'YouTubeService', RecordingService)
+
+    async def run():
+        return [progress async for progress in ChannelImporter(client).run(URLS[2:3] + URLS[4:5])]
+
+    asyncio.run(run())
+
+    assert len(sessions) == 2
+    assert sessions[0] is not sessions[1]
@@ -0,0 +1,78 @@
+"""Resolving handles and custom URLs to channel IDs."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app.db.database import engine
+from app.models.models import ChannelAlias
+from app.services import youtube_service
+from app.services.lru_cache import LRUCache
+from app.services.youtube_service import NEGATIVE_ALIAS_TTL, YouTubeService
+from tests.support import FakeYouTubeClient
+
+@pytest.fixture
+def client(database):
+    client = FakeYouTubeClient(handles={'guitar': 'UCguitar'})
+    yield client
+    client.shutdown()
+
+def resolve(client, url: str) -> str:
+    with Session(engine) as db:
+        return asyncio.run(YouTubeService(db, client).resolve_channel_id(url))
+
+def searches(client) -> int:
+    return sum(request.methodId == 'youtube.search.list' for request in client.requests)
+
+def test_channel_urls_need_no_lookup(client):
+    assert resolve(client, 'https://www.youtube.com/channel/UCabc') == 'UCabc'
+    assert client.requests == []
+
+def test_handles_are_searched_once(client):
+    assert resolve(client, 'https://www.youtube.com/@guitar') == 'UCguitar'
+    # Handles are case-insensitive
+    assert resolve(client, 'https://www.youtube.com/@Guitar') == 'UCguitar'
+    assert searches(client) == 1
+
+    # Stored in the database, so a restart does not search again
+    youtube_service._alias_cache.clear()
+    assert resolve(client, 'https://www.youtube.com/@guitar') == 'UCguitar'
+    assert searches(client) == 1
+
+def test_missing_handles_are_remembered_for_a_while(client):
+    for _ in range(2):
+        with pytest.raises(ValueError, match='Could not find channel'):
+            resolve(client, 'https://www.youtube.com/@nobody')
+    assert searches(client) == 1
+
+    # Still remembered after a restart, until the TTL runs out
+    youtube_service._alias_cache.clear()
+    with pytest.raises(ValueError):
+        resolve(client, 'https://www.youtube.com/@nobody')
+    assert searches(client) == 1
+
+    with Session(engine) as db:
+        row = db.get(ChannelAlias, 'handle:nobody')
+        row.resolved_at = datetime.utcnow() - timedelta(seconds=NEGATIVE_ALIAS_TTL + 1)
+        db.add(row)
+        db.commit()
+    youtube_service._alias_cache.clear()
+
+    # The channel may have been created since
+    client.handles['nobody'] = 'UCnobody'
+    assert resolve(client, 'https://www.youtube.com/@nobody') == 'UCnobody'
+    assert searches(client) == 2
+
+def test_lru_cache_expiry_and_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    # 'b' was the least recently used
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+
+    cache.set('expired', 4, ttl=0)
+    assert cache.get('expired', 'missing') == 'missing'
@@ -0,0 +1,76 @@
+"""Paging through a channel's uploads playlist."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, func, select
+
+from app.db.database import engine
+from app.models.models import Channel, Video
+from app.services.youtube_service import YouTubeService
+from tests.support import FakeYouTubeClient
+
+UPLOADS = 30
+
+PAGE_SIZE = 5
+
+@pytest.fixture
+def client(database):
+    client = FakeYouTubeClient(uploads=UPLOADS, page_size=PAGE_SIZE, newest_upload=datetime(2024, 6, 1))
+    yield client
+    client.shutdown()
+
+def add_channel(client):
+    with Session(engine) as db:
+        assert asyncio.run(YouTubeService(db, client).get_channel('UC1'))
+
+def run(client, method: str, *args) -> int:
+    """Call a YouTubeService method in a fresh session; returns the number of videos."""
+    with Session(engine) as db:
+        return len(asyncio.run(getattr(YouTubeService(db, client), method)(*args)))
+
+def playlist_requests(client) -> list:
+    return [request.params.get('pageToken') for request in client.requests
+            if request.methodId == 'youtube.playlistItems.list']
+
+def cached_videos() -> int:
+    with Session(engine) as db:
+        return db.exec(select(func.count()).select_from(Video)).one()
+
+def test_new_channel_fetches_one_page_and_remembers_its_playlist(client):
+    add_channel(client)
+
+    assert run(client, 'get_videos', 'UC1') == PAGE_SIZE
+    assert playlist_requests(client) == [None]
+    with Session(engine) as db:
+        assert db.get(Channel, 'UC1').uploads_playlist_id == 'UUUC1'
+
+    # The playlist is not looked up again
+    channel_lookups = len(client.requests) - 1
+    run(client, 'get_videos', 'UC1')
+    assert len(client.requests) - len(playlist_requests(client)) == channel_lookups
+
+def test_refresh_stops_at_the_first_page_with_cached_videos(client):
+    add_channel(client)
+    run(client, 'get_videos', 'UC1')
+
+    # Seven new uploads fill the first page and part of the second
+    client.newest_upload += timedelta(days=7)
+    client.requests.clear()
+
+    assert run(client, 'get_videos', 'UC1') == PAGE_SIZE + 7
+    assert playlist_requests(client) == [None, str(PAGE_SIZE)]
+
+def test_backfill_walks_every_page(client):
+    add_channel(client)
+    run(client, 'get_videos', 'UC1')
+
+    assert run(client, 'backfill_videos', 'UC1') == UPLOADS - PAGE_SIZE
+    assert len(playlist_requests(client)) == 1 + UPLOADS // PAGE_SIZE
+    assert cached_videos() == UPLOADS
+
+def test_backfill_stops_after_max_pages(client):
+    add_channel(client)
+
+    assert run(client, 'backfill_videos', 'UC1', 2) == 2 * PAGE_SIZE
+    assert cached_videos() == 2 * PAGE_SIZE
@@ -0,0 +1,81 @@
+"""Revalidating cached channels and uploads with ETags."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app.db.database import engine
+from app.models.models import Channel
+from app.services.youtube_service import YouTubeService
+from tests.support import FakeYouTubeClient
+
+@pytest.fixture
+def client(database):
+    client = FakeYouTubeClient(uploads=20, page_size=5, newest_upload=datetime(2024, 6, 1))
+    yield client
+    client.shutdown()
+
+def expire(channel_id: str):
+    """Make a cached channel old enough to be fetched again."""
+    with Session(engine) as db:
+        channel = db.get(Channel, channel_id)
+        channel.last_fetched = datetime.utcnow() - timedelta(days=2)
+        db.add(channel)
+        db.commit()
+
+def get_channel(client, channel_id: str) -> Channel:
+    """Get a channel through the service, then read back what was stored."""
+    with Session(engine) as db:
+        assert asyncio.run(YouTubeService(db, client).get_channel(channel_id))
+    with Session(engine) as db:
+        return db.get(Channel, channel_id)
+
+def test_known_channels_are_refreshed_with_conditional_requests(client):
+    channel = get_channel(client, 'UC1')
+    # Looked up through the batcher, which only has the item's ETag
+    assert channel.etag == 'etag-UC1'
+
+    expire('UC1')
+    channel = get_channel(client, 'UC1')
+    assert client.requests[-1].headers['If-None-Match'] == 'etag-UC1'
+    assert channel.etag == 'etag-list-UC1'
+
+    expire('UC1')
+    channel = get_channel(client, 'UC1')
+    assert client.requests[-1].headers['If-None-Match'] == 'etag-list-UC1'
+    # Not modified, so the cached copy is kept and counts as fresh again
+    assert channel.etag == 'etag-list-UC1'
+    assert datetime.utcnow() - channel.last_fetched < timedelta(minutes=1)
+    assert len(client.requests) == 3
+
+def get_videos(client, channel_id: str) -> int:
+    with Session(engine) as db:
+        return len(asyncio.run(YouTubeService(db, client).get_videos(channel_id)))
+
+def test_unchanged_uploads_are_revalidated_with_the_first_page_etag(client):
+    get_channel(client, 'UC1')
+    get_videos(client, 'UC1')
+    etag = get_channel(client, 'UC1').uploads_etag
+    assert etag == 'etag-UUUC1-20240601-0'
+
+    client.requests.clear()
+    assert get_videos(client, 'UC1') == 5
+    [request] = client.requests
+    assert request.headers['If-None-Match'] == etag
+    assert get_channel(client, 'UC1').uploads_etag == etag
+
+def test_only_the_first_page_is_conditional(client):
+    get_channel(client, 'UC1')
+    get_videos(client, 'UC1')
+
+    client.newest_upload += timedelta(days=7)
+    client.requests.clear()
+    get_videos(client, 'UC1')
+
+    first, second = client.requests
+    assert first.headers['If-None-Match'] == 'etag-UUUC1-20240601-0'
+    assert second.params['pageToken'] == '5'
+    assert 'If-None-Match' not in second.headers
+    # The ETag of the new first page is kept for the next refresh
+    assert get_channel(client, 'UC1').uploads_etag == 'etag-UUUC1-20240608-0'
@@ -0,0 +1,85 @@
+"""Rendered video lists are reused until new videos are saved."""
+from datetime import datetime
+
+from sqlmodel import Session
+
+import main
+from app.db.database import engine
+from app.models.models import Channel, Video
+from app.services.fragment_cache import FragmentCache
+from app.services.youtube_service import UploadsRefresh, YouTubeService, _save_videos
+
+def video_data(video_id: str, day: int, channel_id: str = 'UC1') -> dict:
+    return {
+        'id': video_id, 'title': f'Title {video_id}', 'description': '', 'thumbnail_url': '', 'url': '',
+        'published_at': datetime(2024, 1, day), 'channel_id': channel_id
+    }
+
+def save(channel_id: str, *videos: dict) -> int:
+    with Session(engine) as db:
+        return len(_save_videos(db, channel_id, UploadsRefresh(f'UU{channel_id}', list(videos))))
+
+def render_feed() -> str:
+    with Session(engine) as db:
+        return main.render_feed_page(YouTubeService(db))
+
+def add_channels(*channel_ids: str):
+    with Session(engine) as db:
+        for channel_id in channel_ids:
+            db.add(Channel(id=channel_id, title=channel_id, description='', thumbnail_url='', url=''))
+        db.commit()
+
+def test_feed_page_is_reused(database, count_queries):
+    add_channels('UC1')
+    save('UC1', video_data('a', 1))
+    assert 'Title a' in render_feed()
+
+    with count_queries() as queries:
+        assert 'Title a' in render_feed()
+    assert queries == []
+
+def test_saving_videos_invalidates_the_feed(database):
+    add_channels('UC1')
+    save('UC1', video_data('a', 1))
+    render_feed()
+
+    assert save('UC1', video_data('b', 2)) == 1
+    assert 'Title b' in render_feed()
+
+def test_saving_nothing_new_keeps_the_feed(database):
+    add_channels('UC1')
+    save('UC1', video_data('a', 1))
+    key = main.fragment_cache.feed_key(None)
+
+    assert save('UC1', video_data('a', 1)) == 0
+    assert main.fragment_cache.feed_key(None) == key
+
+def test_cards_are_rendered_once(database):
+    video = Video(**video_data('a', 1), updated_at=datetime(2024, 2, 1))
+    first = main.video_list.render_cards([video])
+
+    video.title = 'Changed'
+    # Same video and version, so the cached card is used
+    assert main.video_list.render_cards([video]) == first
+
+    # A new version of the video is rendered again
+    video.updated_at = datetime(2024, 2, 2)
+    assert 'Changed' in main.video_list.render_cards([video])[0]
+
+def test_invalidate_moves_only_that_channel_on():
+    cache = FragmentCache()
+    feed = cache.feed_key('cursor')
+    one = cache.channel_key('UC1', None)
+    two = cache.channel_key('UC2', None)
+
+    cache.invalidate('UC1')
+    assert cache.feed_key('cursor') != feed
+    assert cache.channel_key('UC1', None) != one
+    assert cache.channel_key('UC2', None) == two
+
+def test_cache_is_bounded():
+    cache = FragmentCache(maxsize=2)
+    for key in 'abc':
+        cache.set(key, key)
+    assert cache.get('a') is None
+    assert cache.get('c') == 'c'
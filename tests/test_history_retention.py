@@ -0,0 +1,93 @@
+"""Removing old URL history in batches."""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, text
+from sqlmodel import Session, select
+
+from app.db.database import engine
+from app.models.url_history import URLHistory, url_tags
+from app.services.history_retention import purge_old_entries
+from app.services.url_history_service import CLEANUP_BATCH_SIZE, URLHistoryService, delete_old_entries_batch
+
+OLD = datetime.utcnow() - timedelta(days=60)
+
+def add_entries(count: int, last_accessed: datetime = OLD, is_favorite: bool = False, prefix: str = 'old'):
+    """Add entries last accessed at ``last_accessed``, each with a tag."""
+    with Session(engine) as db:
+        service = URLHistoryService(db)
+        service.add_urls([{'url': f'https://youtube.com/watch?v={prefix}{i}', 'tags': ['music']}
+                          for i in range(count)])
+        db.exec(URLHistory.__table__.update()
+                .where(URLHistory.url.like(f'https://youtube.com/watch?v={prefix}%'))
+                .values(last_accessed=last_accessed, is_favorite=is_favorite))
+        db.commit()
+
+def count(statement) -> int:
+    with Session(engine) as db:
+        return db.exec(statement).one()
+
+def remaining_urls() -> int:
+    return count(select(func.count()).select_from(URLHistory))
+
+def remaining_tags() -> int:
+    return count(select(func.count()).select_from(url_tags))
+
+def test_batch_deletes_old_non_favorites_and_their_tags(database):
+    add_entries(30)
+    add_entries(5, is_favorite=True, prefix='favorite')
+    add_entries(5, last_accessed=datetime.utcnow(), prefix='recent')
+
+    ids = delete_old_entries_batch(datetime.utcnow() - timedelta(days=30), batch_size=20)
+
+    assert len(ids) == 20
+    assert remaining_urls() == 20
+    assert remaining_tags() == 20
+
+def test_cleanup_runs_batches_until_done(database):
+    add_entries(CLEANUP_BATCH_SIZE * 2 + 200)
+    add_entries(5, is_favorite=True, prefix='favorite')
+
+    with Session(engine) as db:
+        assert URLHistoryService(db).cleanup_old_entries(days=30) == CLEANUP_BATCH_SIZE * 2 + 200
+
+    assert remaining_urls() == 5
+    assert remaining_tags() == 5
+
+def test_expired_entries_are_found_through_the_index(database):
+    with Session(engine) as db:
+        plan = db.exec(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM url_history "
+            "WHERE is_favorite = 0 AND last_accessed < '2024-01-01' LIMIT 500"
+        )).all()
+    assert 'ix_url_history_is_favorite_last_accessed' in ' '.join(row[-1] for row in plan)
+
+def test_purge_lets_other_writers_in_between_batches(database):
+    add_entries(1000)
+    add_entries(5, is_favorite=True, prefix='favorite')
+
+    async def run():
+        written = []
+
+        async def write():
+            for i in range(20):
+                def add(i=i):
+                    with Session(engine) as db:
+                        URLHistoryService(db).add_url(f'https://youtube.com/watch?v=new{i}')
+                await asyncio.to_thread(add)
+                written.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        writer = asyncio.create_task(write())
+        deleted = await purge_old_entries(30, batch_size=100, pause=0.02)
+        finished = time.perf_counter()
+        await writer
+        return deleted, written, finished
+
+    deleted, written, finished = asyncio.run(run())
+
+    assert deleted == 1000
+    # Writes went through while the purge was still running
+    assert any(at < finished for at in written)
+    assert remaining_urls() == 5 + 20
@@ -0,0 +1,59 @@
+"""Validators and conditional request checks."""
+from datetime import datetime
+
+from starlette.requests import Request
+
+from app.api.http_cache import cache_headers, cached_json, is_not_modified, make_etag
+
+MODIFIED = datetime(2024, 6, 1, 12, 0, 0, 500000)
+
+def request(**headers) -> Request:
+    return Request({
+        'type': 'http',
+        'method': 'GET',
+        'path': '/',
+        'headers': [(name.replace('_', '-').lower().encode(), value.encode()) for name, value in headers.items()]
+    })
+
+def test_make_etag():
+    etag = make_etag('video', 1)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert make_etag('video', 1) == etag
+    assert make_etag('video', 2) != etag
+    # Parts are separated, so they cannot run together
+    assert make_etag('ab', 'c') != make_etag('a', 'bc')
+
+def test_cache_headers():
+    headers = cache_headers('"abc"', MODIFIED, 'public, max-age=60')
+    assert headers == {
+        'ETag': '"abc"',
+        'Cache-Control': 'public, max-age=60',
+        'Last-Modified': 'Sat, 01 Jun 2024 12:00:00 GMT'
+    }
+
+def test_if_none_match():
+    assert is_not_modified(request(if_none_match='"abc"'), '"abc"')
+    assert is_not_modified(request(if_none_match='"x", W/"abc"'), '"abc"')
+    assert is_not_modified(request(if_none_match='*'), '"abc"')
+    assert not is_not_modified(request(if_none_match='"x"'), '"abc"')
+    assert not is_not_modified(request(), '"abc"', MODIFIED)
+
+def test_if_modified_since():
+    # Last-Modified drops the fraction of a second, which must still match
+    assert is_not_modified(request(if_modified_since='Sat, 01 Jun 2024 12:00:00 GMT'), '"abc"', MODIFIED)
+    assert not is_not_modified(request(if_modified_since='Sat, 01 Jun 2024 11:59:59 GMT'), '"abc"', MODIFIED)
+    assert not is_not_modified(request(if_modified_since='not a date'), '"abc"', MODIFIED)
+
+def test_if_none_match_takes_precedence():
+    headers = {'if_none_match': '"x"', 'if_modified_since': 'Sat, 01 Jun 2024 12:00:00 GMT'}
+    assert not is_not_modified(request(**headers), '"abc"', MODIFIED)
+
+def test_cached_json():
+    response = cached_json(request(), {'a': 1})
+    assert response.status_code == 200
+    assert response.body == b'{"a":1}'
+
+    revalidated = cached_json(request(if_none_match=response.headers['ETag']), {'a': 1})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == response.headers['ETag']
+    assert cached_json(request(if_none_match=response.headers['ETag']), {'a': 2}).status_code == 200
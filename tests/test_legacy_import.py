@@ -0,0 +1,54 @@
+"""Import of URL history and saved URLs from the old data/brevify.db."""
+import sqlite3
+
+from sqlmodel import Session
+
+from app.db.database import engine, import_legacy_database
+from app.db.saved_urls import get_saved_urls
+from app.services.url_history_service import URLHistoryService
+
+def make_legacy_database(path):
+    """Create a database laid out as the old sqlite3 and SQLAlchemy layers left it."""
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE url_history (
+            id INTEGER PRIMARY KEY, url VARCHAR NOT NULL, title VARCHAR, created_at DATETIME,
+            last_accessed DATETIME, access_count INTEGER, is_favorite BOOLEAN, source VARCHAR
+        );
+        CREATE TABLE tags (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE);
+        CREATE TABLE url_tags (url_id INTEGER, tag_id INTEGER);
+        CREATE TABLE saved_urls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO url_history VALUES
+            (1, 'https://youtube.com/watch?v=a', 'A', '2024-01-01 00:00:00', '2024-01-02 00:00:00', 3, 1, 'manual'),
+            (2, 'https://youtube.com/watch?v=b', 'B', '2024-01-01 00:00:00', '2024-01-03 00:00:00', 1, 0, 'manual');
+        INSERT INTO tags VALUES (1, 'music'), (2, 'talks');
+        INSERT INTO url_tags VALUES (1, 1), (2, 2);
+        INSERT INTO saved_urls (url) VALUES ('https://youtube.com/@one'), ('https://youtube.com/@one');
+    ''')
+    conn.commit()
+    conn.close()
+
+def test_imports_once_and_keeps_existing_rows(database, tmp_path):
+    legacy = tmp_path / 'brevify.db'
+    make_legacy_database(legacy)
+    with Session(engine) as db:
+        # Already here, so the legacy copy of this URL is skipped
+        URLHistoryService(db).add_url('https://youtube.com/watch?v=b', 'B now', tags=['talks', 'new'])
+
+    assert import_legacy_database(legacy)
+
+    assert not legacy.exists()
+    assert (tmp_path / 'brevify.db.imported').exists()
+    with Session(engine) as db:
+        urls = {entry['url']: entry for entry in URLHistoryService(db).get_recent_url_dicts(10)}
+    assert set(urls) == {'https://youtube.com/watch?v=a', 'https://youtube.com/watch?v=b'}
+    assert urls['https://youtube.com/watch?v=a']['tags'] == ['music']
+    assert urls['https://youtube.com/watch?v=a']['is_favorite']
+    assert urls['https://youtube.com/watch?v=b']['title'] == 'B now'
+    assert sorted(urls['https://youtube.com/watch?v=b']['tags']) == ['new', 'talks']
+    assert get_saved_urls() == ['https://youtube.com/@one']
+
+    assert not import_legacy_database(legacy)
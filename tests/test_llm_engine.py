@@ -0,0 +1,209 @@
+"""Streaming from LLM providers, against recorded server-sent event streams."""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.ai_service import AIService, AIServiceConfig, AIServiceType
+from app.services.llm_engine import CHARS_PER_TOKEN, LLMEngine, LLMError, TokenUsage, estimate_tokens
+
+OPENAI_STREAM = '''\
+data: {"id":"c1","choices":[{"index":0,"delta":{"role":"assistant","content":""}}],"usage":null}
+
+data: {"id":"c1","choices":[{"index":0,"delta":{"content":"Hello"}}],"usage":null}
+
+data: {"id":"c1","choices":[{"index":0,"delta":{"content":" world"},"finish_reason":"stop"}],"usage":null}
+
+data: {"id":"c1","choices":[],"usage":{"prompt_tokens":12,"completion_tokens":2,"total_tokens":14}}
+
+data: [DONE]
+
+data: not json, and never read
+
+'''
+
+ANTHROPIC_STREAM = '''\
+event: message_start
+data: {"type":"message_start","message":{"id":"m1","role":"assistant","usage":{"input_tokens":25,"output_tokens":1}}}
+
+event: content_block_start
+data: {"type":"content_block_start","index":0,"content_block":{"type":"text","text":""}}
+
+event: ping
+data: {"type":"ping"}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"text_delta","text":"Hello"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"text_delta","text":" world"}}
+
+event: content_block_stop
+data: {"type":"content_block_stop","index":0}
+
+event: message_delta
+data: {"type":"message_delta","delta":{"stop_reason":"end_turn"},"usage":{"output_tokens":15}}
+
+event: message_stop
+data: {"type":"message_stop"}
+
+'''
+
+ANTHROPIC_OVERLOADED = '''\
+event: message_start
+data: {"type":"message_start","message":{"id":"m1","role":"assistant","usage":{"input_tokens":25,"output_tokens":1}}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"text_delta","text":"Hello"}}
+
+event: error
+data: {"type":"error","error":{"type":"overloaded_error","message":"Overloaded"}}
+
+'''
+
+class MockProvider:
+    """Answers every request with one canned response and records the requests."""
+
+    def __init__(self, body: str, status_code: int = 200):
+        self.body = body
+        self.status_code = status_code
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(self.status_code, content=self.body.encode(),
+                              headers={'Content-Type': 'text/event-stream'})
+
+def config(service_type: AIServiceType, **settings) -> AIServiceConfig:
+    """A config for the service whose API key is ``TEST_API_KEY``."""
+    return AIServiceConfig(service_type=service_type, api_key_env='TEST_API_KEY',
+                           model='test-model', max_tokens=100, temperature=0.0, **settings)
+
+def stream(provider: MockProvider, service_type: AIServiceType, usage: TokenUsage = None,
+           prompt: str = 'Say hello', **settings):
+    """Stream a completion through an engine talking to ``provider``."""
+    engine = LLMEngine(transport=httpx.MockTransport(provider))
+
+    async def run():
+        deltas = []
+        try:
+            async for delta in engine.stream(config(service_type, **settings), prompt, usage):
+                deltas.append(delta)
+        except LLMError as e:
+            return deltas, e, engine
+        finally:
+            await engine.close()
+        return deltas, None, engine
+
+    return asyncio.run(run())
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv('TEST_API_KEY', 'secret')
+
+def test_openai_stream_stops_at_done():
+    provider = MockProvider(OPENAI_STREAM)
+    usage = TokenUsage()
+
+    deltas, error, engine = stream(provider, AIServiceType.OPENAI, usage)
+
+    assert error is None
+    assert deltas == ['Hello', ' world']
+    assert usage == TokenUsage(input_tokens=12, output_tokens=2)
+    assert engine.usage['openai'] == usage
+
+    [request] = provider.requests
+    assert request.url == 'https://api.openai.com/v1/chat/completions'
+    assert request.headers['Authorization'] == 'Bearer secret'
+    body = json.loads(request.content)
+    assert body['stream'] is True
+    assert body['stream_options'] == {'include_usage': True}
+    assert body['max_tokens'] == 100
+
+def test_openai_usage_is_estimated_when_not_reported():
+    stream_without_usage = OPENAI_STREAM.replace(
+        'data: {"id":"c1","choices":[],"usage":{"prompt_tokens":12,"completion_tokens":2,"total_tokens":14}}\n\n', ''
+    )
+    usage = TokenUsage()
+
+    deltas, error, _ = stream(MockProvider(stream_without_usage), AIServiceType.OPENAI, usage)
+
+    assert error is None
+    assert deltas == ['Hello', ' world']
+    assert usage.input_tokens > 0
+    assert usage.output_tokens > 0
+
+def test_anthropic_stream():
+    provider = MockProvider(ANTHROPIC_STREAM)
+    usage = TokenUsage()
+
+    deltas, error, engine = stream(provider, AIServiceType.ANTHROPIC, usage)
+
+    assert error is None
+    assert deltas == ['Hello', ' world']
+    # Output tokens come from message_delta, which reports the final count
+    assert usage == TokenUsage(input_tokens=25, output_tokens=15)
+    assert engine.usage['anthropic'] == usage
+
+    [request] = provider.requests
+    assert request.url == 'https://api.anthropic.com/v1/messages'
+    assert request.headers['x-api-key'] == 'secret'
+    assert request.headers['anthropic-version'] == '2023-06-01'
+
+def test_anthropic_error_event_raises():
+    usage = TokenUsage()
+
+    deltas, error, _ = stream(MockProvider(ANTHROPIC_OVERLOADED), AIServiceType.ANTHROPIC, usage)
+
+    assert deltas == ['Hello']
+    assert isinstance(error, LLMError)
+    assert 'Overloaded' in str(error)
+    # What was used before the error is still counted
+    assert usage.input_tokens == 25
+
+def test_error_status_raises():
+    body = '{"error":{"message":"Incorrect API key provided"}}'
+
+    deltas, error, _ = stream(MockProvider(body, status_code=401), AIServiceType.OPENAI)
+
+    assert deltas == []
+    assert isinstance(error, LLMError)
+    assert '401' in str(error)
+    assert 'Incorrect API key' in str(error)
+
+def test_long_prompts_are_cut():
+    provider = MockProvider(OPENAI_STREAM)
+
+    _, error, _ = stream(provider, AIServiceType.OPENAI, prompt='word ' * 1000, max_input_tokens=50)
+
+    assert error is None
+    [request] = provider.requests
+    assert json.loads(request.content)['messages'][0]['content'] == ('word ' * 1000)[:50 * CHARS_PER_TOKEN]
+
+def test_long_transcripts_are_cut_after_the_instructions():
+    provider = MockProvider(OPENAI_STREAM)
+    engine = LLMEngine(transport=httpx.MockTransport(provider))
+    service = AIService(config(AIServiceType.OPENAI, max_input_tokens=100), engine)
+
+    async def run():
+        try:
+            return await service.process_transcript('summarize', 'word ' * 1000)
+        finally:
+            await engine.close()
+
+    assert asyncio.run(run()) == 'Hello world'
+    [request] = provider.requests
+    prompt = json.loads(request.content)['messages'][0]['content']
+    assert prompt.startswith('Summarize the following transcript')
+    assert 'word word' in prompt
+    assert estimate_tokens(prompt) <= 100
+
+def test_concurrency_limit_follows_the_setting():
+    engine = LLMEngine()
+
+    assert engine._limit('openai', 1) is engine._limit('openai', 1)
+    # A changed setting gets a semaphore of its own size
+    limit = engine._limit('openai', 3)
+    assert limit is not engine._limit('openai', 1)
+    assert limit._value == 3
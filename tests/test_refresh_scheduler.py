@@ -0,0 +1,92 @@
+"""Background channel polling."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.db.database import engine
+from app.models.models import Channel, Video
+from app.services import refresh_scheduler
+from app.services.refresh_scheduler import (
+    DEFAULT_POLL_INTERVAL, MAX_POLL_INTERVAL, MIN_POLL_INTERVAL, RefreshScheduler, poll_interval
+)
+from tests.support import FakeYouTubeClient
+
+def uploads(gap: timedelta, count: int = 10, newest: datetime = None) -> list:
+    """Upload dates ``gap`` apart, newest first."""
+    newest = newest or datetime.utcnow()
+    return [newest - gap * i for i in range(count)]
+
+def test_poll_interval_without_history():
+    assert poll_interval([]) == DEFAULT_POLL_INTERVAL
+    assert poll_interval(uploads(timedelta(days=1), count=1)) == DEFAULT_POLL_INTERVAL
+
+def test_poll_interval_follows_upload_frequency():
+    assert poll_interval(uploads(timedelta(days=1))) == pytest.approx(6 * 60 * 60, abs=1)
+    assert poll_interval(uploads(timedelta(hours=4))) == pytest.approx(60 * 60, abs=1)
+
+def test_poll_interval_bounds():
+    assert poll_interval(uploads(timedelta(minutes=5))) == MIN_POLL_INTERVAL
+    assert poll_interval(uploads(timedelta(days=30))) == MAX_POLL_INTERVAL
+
+def test_poll_interval_slows_down_for_quiet_channels():
+    quiet = uploads(timedelta(hours=4), newest=datetime.utcnow() - timedelta(days=2))
+    assert poll_interval(quiet) == pytest.approx(12 * 60 * 60, abs=1)
+
+@pytest.fixture
+def client(database):
+    client = FakeYouTubeClient(uploads=3, newest_upload=datetime.utcnow())
+    yield client
+    client.shutdown()
+
+def add_channels(count: int):
+    """Add channels that are due for polling and whose uploads playlist is known."""
+    with Session(engine) as db:
+        for i in range(count):
+            db.add(Channel(id=f'UC{i}', title=f'Channel {i}', description='', thumbnail_url='',
+                           url='', uploads_playlist_id=f'UUUC{i}'))
+        db.commit()
+
+def polled_channels() -> list:
+    with Session(engine) as db:
+        return db.exec(select(Channel.id).where(Channel.next_poll_at != None)).all()
+
+def test_polls_due_channels_and_schedules_them(client):
+    add_channels(5)
+
+    refreshed = asyncio.run(RefreshScheduler(client, concurrency=2).run_once())
+
+    assert refreshed == 5
+    with Session(engine) as db:
+        assert len(db.exec(select(Video)).all()) == 15
+        for channel in db.exec(select(Channel)):
+            # Daily uploads, give or take the jitter
+            assert channel.poll_interval == pytest.approx(6 * 60 * 60, rel=refresh_scheduler.POLL_JITTER)
+            assert channel.next_poll_at > datetime.utcnow()
+
+    # Nothing is due any more
+    assert asyncio.run(RefreshScheduler(client).run_once()) == 0
+
+def test_stops_part_way_through_a_tick_when_the_budget_is_spent(client):
+    add_channels(20)
+
+    # Each refresh reads one page of uploads, costing one unit
+    refreshed = asyncio.run(RefreshScheduler(client, concurrency=2, quota_budget=5).run_once())
+
+    assert refreshed == 6
+    assert client.quota_used == 6
+    assert len(polled_channels()) == 6
+
+def test_scheduling_runs_a_fixed_number_of_queries(client, count_queries):
+    def schedule(count: int) -> int:
+        channel_ids = [f'UC{i}' for i in range(count)]
+        with Session(engine) as db:
+            with count_queries() as queries:
+                RefreshScheduler(client)._schedule(db, channel_ids)
+        return len(queries)
+
+    add_channels(20)
+    asyncio.run(RefreshScheduler(client, concurrency=20).run_once())
+
+    assert schedule(2) == schedule(20)
@@ -0,0 +1,33 @@
+"""Creation of the full-text search indexes."""
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.db import search_index
+from app.db.database import engine
+from app.models.models import Channel, Video
+from app.services.search_service import SearchService
+from app.services.url_history_service import URLHistoryService
+from tests.support import reset_database
+
+def test_word_indexes_do_not_need_trigram(monkeypatch):
+    # Stands in for a SQLite build without the trigram tokenizer
+    statements = list(search_index.URL_HISTORY_FTS)
+    statements[0] = statements[0].replace("'trigram'", "'no_such_tokenizer'")
+    monkeypatch.setitem(search_index.SEARCH_INDEXES, 'url_history_fts', statements)
+    reset_database()
+
+    assert search_index.available_indexes == {'video_fts', 'transcript_fts'}
+    with Session(engine) as db:
+        assert db.execute(text("SELECT name FROM sqlite_master WHERE name LIKE 'url_history_fts%'")).all() == []
+
+        db.add(Channel(id='UC1', title='Channel', description='', thumbnail_url='', url=''))
+        db.add(Video(id='v1', title='Sourdough baking', description='', thumbnail_url='', url='',
+                     published_at=datetime(2024, 1, 1), channel_id='UC1'))
+        db.commit()
+        assert [hit.video_id for hit in SearchService(db).search('baking')] == ['v1']
+
+        history = URLHistoryService(db)
+        history.add_url('https://youtube.com/watch?v=v1', title='Sourdough')
+        assert [url.title for url in history.search_urls('sourd')] == ['Sourdough']
@@ -0,0 +1,23 @@
+"""Video and transcript search."""
+from datetime import datetime
+
+from sqlmodel import Session
+
+from app.db.database import engine
+from app.models.models import Channel, TranscriptChunk, Video
+from app.services.search_service import SearchService
+
+def test_snippets_escape_html(database):
+    with Session(engine) as db:
+        db.add(Channel(id='UC1', title='Channel', description='', thumbnail_url='', url=''))
+        db.add(Video(id='v1', title='<script>alert(1)</script> baking', description='',
+                     thumbnail_url='', url='', published_at=datetime(2024, 1, 1), channel_id='UC1'))
+        db.add(TranscriptChunk(video_id='v1', language='en', start_ms=5000,
+                               text='Bread & <img src=x onerror=alert(1)> baking'))
+        db.commit()
+
+        [hit] = SearchService(db).search('baking')
+
+    assert hit.snippet == '&lt;script&gt;alert(1)&lt;/script&gt; <mark>baking</mark>'
+    assert hit.transcript[0].text == 'Bread &amp; &lt;img src=x onerror=alert(1)&gt; <mark>baking</mark>'
+    assert hit.transcript[0].start == 5.0
@@ -0,0 +1,71 @@
+"""Downloading and storing transcripts that are not cached yet."""
+import asyncio
+import time
+
+import pytest
+from sqlmodel import Session
+
+from app.db.database import engine
+from app.services import youtube_service
+from app.services.transcript_store import TranscriptStore
+from app.services.youtube_service import FetchedTranscript, YouTubeService
+from tests.support import FakeYouTubeClient
+
+# How long the stand-in for a transcript download takes
+DOWNLOAD_TIME = 0.1
+
+CALLERS = 5
+
+@pytest.fixture
+def client(database):
+    client = FakeYouTubeClient()
+    yield client
+    client.shutdown()
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Replace transcript downloads with a canned transcript; lists the videos downloaded."""
+    downloaded = []
+
+    def download(video_id, languages):
+        downloaded.append(video_id)
+        time.sleep(DOWNLOAD_TIME)
+        return FetchedTranscript('en', 'manual', [
+            {'text': f'line {i}', 'start': i * 2.0, 'duration': 2.0} for i in range(10)
+        ])
+
+    monkeypatch.setattr(youtube_service, '_download_transcript', download)
+    return downloaded
+
+@pytest.fixture
+def puts(monkeypatch):
+    """Count the transcripts written to the store."""
+    written = []
+    put = TranscriptStore.put
+
+    def counting_put(self, video_id, *args, **kwargs):
+        written.append(video_id)
+        return put(self, video_id, *args, **kwargs)
+
+    monkeypatch.setattr(TranscriptStore, 'put', counting_put)
+    return written
+
+def test_concurrent_requests_download_and_store_once(client, downloads, puts):
+    async def run():
+        sessions = [Session(engine) for _ in range(CALLERS)]
+        try:
+            return await asyncio.gather(*[
+                YouTubeService(db, client).get_transcript('v1') for db in sessions
+            ])
+        finally:
+            for db in sessions:
+                db.close()
+
+    transcripts = asyncio.run(run())
+
+    assert transcripts == [transcripts[0]] * CALLERS
+    assert transcripts[0].startswith('line 0\nline 1\n')
+    assert downloads == ['v1']
+    assert puts == ['v1']
+    with Session(engine) as db:
+        assert TranscriptStore(db).get('v1') is not None
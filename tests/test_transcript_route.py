@@ -0,0 +1,82 @@
+"""Serving cached transcripts from /api/transcript/{video_id} and checking for them."""
+import asyncio
+import gzip
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+import main
+from app.db.database import engine
+from app.services import transcript_encoding, youtube_client, youtube_service
+from app.services.transcript_store import TranscriptStore
+from tests.support import EventLoopTicks, FakeYouTubeClient
+
+# How long the stand-in for a slow compressor takes
+COMPRESS_TIME = 0.3
+
+@pytest.fixture
+def transcript(database, monkeypatch):
+    """A cached transcript of video ``v1``."""
+    client = FakeYouTubeClient()
+    monkeypatch.setattr(youtube_client, '_client', client)
+    with Session(engine) as db:
+        TranscriptStore(db).put('v1', 'en', 'manual', [
+            {'text': f'line {i}', 'start': i * 2.0, 'duration': 2.0} for i in range(100)
+        ])
+    yield
+    client.shutdown()
+
+def test_first_compression_does_not_block_the_event_loop(transcript, monkeypatch):
+    def slow_gzip(body):
+        time.sleep(COMPRESS_TIME)
+        return gzip.compress(body)
+
+    monkeypatch.setitem(transcript_encoding._COMPRESSORS, 'gzip', slow_gzip)
+
+    async def run():
+        async with EventLoopTicks() as ticks:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url='http://test') as http:
+                response = await http.get('/api/transcript/v1', headers={'Accept-Encoding': 'gzip'})
+        return response, ticks
+
+    response, ticks = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(response.content)['transcript'].startswith('line 0\nline 1\n')
+    # The event loop kept running while the body was compressed
+    assert ticks.kept_running(COMPRESS_TIME)
+
+def test_conditional_requests(transcript):
+    client = TestClient(main.app)
+    response = client.get('/api/transcript/v1')
+    assert response.status_code == 200
+    # Browsers revalidate instead of keeping a stale copy
+    assert 'immutable' not in response.headers['Cache-Control']
+    assert 'must-revalidate' in response.headers['Cache-Control']
+
+    etag = response.headers['ETag']
+    for headers in ({'If-None-Match': etag}, {'If-Modified-Since': response.headers['Last-Modified']}):
+        revalidated = client.get('/api/transcript/v1', headers=headers)
+        assert revalidated.status_code == 304
+        assert revalidated.headers['ETag'] == etag
+        assert revalidated.content == b''
+
+    # Each format is a different representation
+    assert client.get('/api/transcript/v1?format=segments', headers={'If-None-Match': etag}).status_code == 200
+
+def test_status(transcript, monkeypatch):
+    def download(video_id, languages):
+        raise LookupError('no transcript')
+
+    monkeypatch.setattr(youtube_service, '_download_transcript', download)
+    client = TestClient(main.app)
+
+    response = client.get('/api/transcript/v1/status')
+    assert response.json() == {'available': True}
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert client.get('/api/transcript/v2/status').json() == {'available': False}
@@ -0,0 +1,52 @@
+"""The transcript store's size budget."""
+import random
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.db.database import engine
+from app.models.models import Transcript
+from app.services.transcript_store import TranscriptStore
+
+def segments(video_id: str, count: int = 200) -> list:
+    """Segments that compress poorly, so every transcript takes real space."""
+    rng = random.Random(video_id)
+    return [{'text': f'{video_id} {rng.getrandbits(64):x}', 'start': i * 2.0, 'duration': 2.0}
+            for i in range(count)]
+
+def stored_size(db: Session) -> int:
+    """The size of the store, summed from the table."""
+    return db.exec(select(func.coalesce(func.sum(Transcript.size), 0))).one()
+
+def test_running_total_matches_the_table(database):
+    with Session(engine) as db:
+        store = TranscriptStore(db)
+        store.put('v1', 'en', 'manual', segments('v1'))
+        store.put('v2', 'en', 'manual', segments('v2'))
+        # Replacing a transcript counts only the new one
+        store.put('v1', 'en', 'manual', segments('v1', 50))
+        store.body('v2', 'text', 'gzip')
+
+        assert store.total_size() == stored_size(db)
+
+def test_puts_do_not_sum_the_table(database, count_queries):
+    with Session(engine) as db:
+        store = TranscriptStore(db)
+        store.put('v1', 'en', 'manual', segments('v1'))
+
+        with count_queries() as queries:
+            for i in range(2, 6):
+                store.put(f'v{i}', 'en', 'manual', segments(f'v{i}'))
+
+    assert not [query for query in queries if 'sum(' in query.lower()]
+
+def test_evicts_least_recently_read_past_the_budget(database):
+    with Session(engine) as db:
+        size = TranscriptStore(db).put('v0', 'en', 'manual', segments('v0')).size
+        store = TranscriptStore(db, max_bytes=size * 3)
+        for i in range(1, 4):
+            store.put(f'v{i}', 'en', 'manual', segments(f'v{i}'))
+
+        assert store.get('v0') is None
+        assert store.get('v3') is not None
+        assert store.total_size() == stored_size(db) <= size * 3
@@ -0,0 +1,41 @@
+"""The URL history list endpoints run a fixed number of queries, however many rows they return."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+import main
+from app.db.database import engine
+from app.services.url_history_service import URLHistoryService
+
+# Endpoints and the queries each runs: one for the URLs and one for the tags
+# of all of them, plus the full-text lookup for search
+ENDPOINTS = [
+    ('/urls/recent/?limit=100', 2),
+    ('/urls/favorites/', 2),
+    ('/urls/search/?q=video&limit=100', 3)
+]
+
+def add_history(rows: int):
+    """Add favorite URLs, each with two tags."""
+    with Session(engine) as db:
+        service = URLHistoryService(db)
+        service.add_urls([
+            {'url': f'https://youtube.com/watch?v={i}', 'title': f'Video {i}', 'tags': ['music', f'tag{i}']}
+            for i in range(rows)
+        ])
+        for url_id in range(1, rows + 1):
+            service.toggle_favorite(url_id)
+
+@pytest.mark.parametrize('endpoint,expected_queries', ENDPOINTS)
+@pytest.mark.parametrize('rows', [1, 50])
+def test_list_query_count(database, count_queries, endpoint, expected_queries, rows):
+    add_history(rows)
+    client = TestClient(main.app)
+
+    with count_queries() as queries:
+        response = client.get(endpoint)
+
+    assert response.status_code == 200
+    assert len(response.json()) == rows
+    assert all(len(url['tags']) == 2 for url in response.json())
+    assert len(queries) == expected_queries, queries
@@ -0,0 +1,66 @@
+"""Adding URLs and tags in bulk."""
+from sqlmodel import Session, select
+
+from app.db.database import engine
+from app.models.url_history import Tag, URLHistory
+from app.services.url_history_service import URLHistoryService
+
+def entries(count: int, start: int = 0):
+    return [
+        {'url': f'https://youtube.com/watch?v={i}', 'title': f'Video {i}', 'tags': ['music', f'tag{i}']}
+        for i in range(start, start + count)
+    ]
+
+def add_urls(rows):
+    with Session(engine) as db:
+        return URLHistoryService(db).add_urls(rows)
+
+def test_add_urls_links_tags(database):
+    add_urls(entries(3) + [{'url': 'https://youtube.com/watch?v=0', 'tags': ['music', 'live']}])
+
+    with Session(engine) as db:
+        urls = {url.url: url for url in db.exec(select(URLHistory))}
+        assert len(urls) == 3
+        first = urls['https://youtube.com/watch?v=0']
+        # Listed twice, so accessed twice
+        assert first.access_count == 2
+        assert first.title == 'Video 0'
+        assert sorted(tag.name for tag in first.tags) == ['live', 'music', 'tag0']
+        # Shared tags are created once
+        assert sorted(tag.name for tag in db.exec(select(Tag))) == ['live', 'music', 'tag0', 'tag1', 'tag2']
+
+def test_add_urls_adds_to_existing_entries(database):
+    add_urls(entries(2))
+    add_urls(entries(2))
+
+    with Session(engine) as db:
+        for url in db.exec(select(URLHistory)):
+            assert url.access_count == 2
+            assert len(url.tags) == 2
+
+def test_add_urls_query_count(database, count_queries):
+    with count_queries() as few:
+        add_urls(entries(5))
+    with count_queries() as many:
+        add_urls(entries(200, start=5))
+
+    assert len(many) == len(few), many
+
+def test_known_tags_are_not_looked_up(database, count_queries):
+    add_urls(entries(5))
+    # Tags are cached once read back committed, so tagging again only links
+    add_urls([{'url': 'https://youtube.com/watch?v=other', 'tags': ['music', 'tag1']}])
+    with count_queries() as queries:
+        add_urls([{'url': 'https://youtube.com/watch?v=new', 'tags': ['music', 'tag1']}])
+
+    assert not any('FROM tags ' in query for query in queries), queries
+
+def test_add_tag(database):
+    with Session(engine) as db:
+        service = URLHistoryService(db)
+        url = service.add_url('https://youtube.com/watch?v=a', tags=['music'])
+        assert service.add_tag(url.id, 'live')
+        # Tagging twice links once
+        assert service.add_tag(url.id, 'live')
+        assert sorted(tag.name for tag in url.tags) == ['live', 'music']
+        assert not service.add_tag(url.id + 1, 'live')
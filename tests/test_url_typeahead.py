@@ -0,0 +1,89 @@
+"""In-memory URL suggestions."""
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+import main
+from app.db.database import engine
+from app.models.url_history import URLHistory
+from app.services.url_typeahead import MAX_KEY_LENGTH, URLTypeahead, url_typeahead
+
+def add_history(db: Session, *entries) -> list:
+    """Add (url, title, access_count) entries, all last accessed at the same time."""
+    accessed = datetime(2024, 1, 1)
+    url_entries = [
+        URLHistory(url=url, title=title, access_count=access_count, last_accessed=accessed)
+        for url, title, access_count in entries
+    ]
+    db.add_all(url_entries)
+    db.commit()
+    return url_entries
+
+def urls(suggestions: list) -> list:
+    return [suggestion['url'] for suggestion in suggestions]
+
+@pytest.fixture
+def db(database):
+    with Session(engine) as db:
+        yield db
+
+def test_matches_the_start_of_any_word_best_first(db):
+    add_history(
+        db,
+        ('https://www.youtube.com/@guitarlessons', 'Guitar lessons', 1),
+        ('https://www.youtube.com/watch?v=abc', 'Live guitar session', 5),
+        ('https://www.youtube.com/@cooking', 'Cooking', 9)
+    )
+    typeahead = URLTypeahead()
+    typeahead.build(db)
+
+    assert urls(typeahead.suggest('guit')) == [
+        'https://www.youtube.com/watch?v=abc',
+        'https://www.youtube.com/@guitarlessons'
+    ]
+    assert urls(typeahead.suggest('youtube.com/@c')) == ['https://www.youtube.com/@cooking']
+    # Words are matched from their start, unlike the database's substring search
+    assert typeahead.suggest('tube') == []
+
+def test_long_queries_match_in_full(db):
+    shared = 'youtube.com/watch?v=abcdefgh'
+    assert len(shared) > MAX_KEY_LENGTH
+    add_history(db, (f'https://{shared}111', None, 1), (f'https://{shared}222', None, 2))
+    typeahead = URLTypeahead()
+    typeahead.build(db)
+
+    assert urls(typeahead.suggest(shared + '1')) == [f'https://{shared}111']
+
+    # A URL added later enters the remembered matches only if it matches in full
+    for url_entry in add_history(db, (f'https://{shared}113', None, 3), (f'https://{shared}223', None, 4)):
+        typeahead.add(url_entry)
+    assert urls(typeahead.suggest(shared + '1')) == [f'https://{shared}113', f'https://{shared}111']
+
+def test_evicts_the_lowest_scores_past_the_limit(db):
+    typeahead = URLTypeahead(max_entries=100)
+    typeahead.build(db)
+
+    for url_entry in add_history(db, *[(f'https://youtube.com/@c{i}', None, i + 1) for i in range(150)]):
+        typeahead.add(url_entry)
+
+    stats = typeahead.stats()
+    assert stats['entries'] <= 100
+    assert urls(typeahead.suggest('youtube', limit=1)) == ['https://youtube.com/@c149']
+    assert typeahead.suggest('youtube.com/@c0') == []
+
+def test_suggestion_endpoints(db, monkeypatch):
+    add_history(db, ('https://www.youtube.com/@guitarlessons', 'Guitar lessons', 1))
+    monkeypatch.setattr(url_typeahead, 'ready', False)
+    url_typeahead.build(db)
+    client = TestClient(main.app)
+
+    response = client.get('/urls/suggestions/', params={'q': 'guitar'})
+    assert urls(response.json()) == ['https://www.youtube.com/@guitarlessons']
+
+    stats = client.get('/urls/suggestions/stats/').json()
+    assert stats['entries'] == 1
+    assert stats['max_entries'] == url_typeahead.max_entries
+    assert stats['keys'] > 0
+    assert stats['bytes'] > 0
@@ -0,0 +1,72 @@
+"""Paging through the feed of cached videos."""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+import main
+from app.db.database import engine
+from app.models.models import Channel, Video
+from app.services.youtube_service import YouTubeService, decode_feed_cursor, encode_feed_cursor
+
+def add_videos(count: int):
+    """Add videos published two at a time, so pages split between equal timestamps."""
+    with Session(engine) as db:
+        db.add(Channel(id='UC1', title='Channel', description='', thumbnail_url='', url=''))
+        for i in range(count):
+            db.add(Video(
+                id=f'video{i:02}', title=f'Video {i}', description='', thumbnail_url='', url='',
+                published_at=datetime(2024, 1, 1) + timedelta(days=i // 2), channel_id='UC1'
+            ))
+        db.commit()
+
+def read_feed(limit: int) -> list:
+    """Get the IDs on each page of the feed."""
+    pages = []
+    cursor = None
+    with Session(engine) as db:
+        service = YouTubeService(db)
+        while True:
+            page = service.get_feed_page(cursor, limit=limit)
+            pages.append([video.id for video in page.videos])
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+@pytest.mark.parametrize('count', [9, 8])
+def test_pages_cover_the_feed_once(database, count):
+    add_videos(count)
+    pages = read_feed(limit=4)
+
+    # No empty last page when the feed ends on a page boundary
+    assert [len(page) for page in pages] == ([4, 4, 1] if count == 9 else [4, 4])
+    newest_first = sorted((f'video{i:02}' for i in range(count)), reverse=True)
+    assert [video_id for page in pages for video_id in page] == newest_first
+
+def test_cursor_round_trip():
+    video = Video(id='abc|def', published_at=datetime(2024, 1, 2, 3, 4, 5))
+    assert decode_feed_cursor(encode_feed_cursor(video)) == (video.published_at, 'abc|def')
+
+def test_invalid_cursor(database):
+    with Session(engine) as db:
+        with pytest.raises(ValueError, match='Invalid feed cursor'):
+            YouTubeService(db).get_feed_page('not a cursor')
+
+    response = TestClient(main.app).get('/api/videos', params={'cursor': 'not a cursor'})
+    assert response.status_code == 400
+
+def test_feed_route_renders_the_next_page(database):
+    add_videos(30)
+    client = TestClient(main.app)
+
+    # The first page, on the index page, links to the second
+    index = client.get('/').text
+    assert 'Video 29' in index and 'Video 5' not in index
+    assert 'hx-get="/api/videos?cursor=' in index
+
+    with Session(engine) as db:
+        cursor = YouTubeService(db).get_feed_page().next_cursor
+    page = client.get('/api/videos', params={'cursor': cursor}).text
+    assert 'Video 5' in page and 'Video 29' not in page
+    assert 'hx-get' not in page
@@ -0,0 +1,94 @@
+"""YouTubeClient against a local server standing in for the YouTube Data API."""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from googleapiclient.discovery import build_from_document
+
+from app.services.youtube_client import YouTubeClient, load_discovery_document
+from tests.support import EventLoopTicks
+
+# Time the fake API takes to answer each request
+RESPONSE_DELAY = 0.2
+
+REQUESTS = 8
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    """Answers every request with an empty list after ``RESPONSE_DELAY``."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(RESPONSE_DELAY)
+        with server.lock:
+            server.in_flight -= 1
+
+        body = json.dumps({'etag': 'etag', 'items': []}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def fake_api():
+    """A fake YouTube Data API server that counts requests in flight."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeAPIHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def client(fake_api, tmp_path):
+    """A YouTubeClient whose API resource talks to the fake server."""
+    client = YouTubeClient(max_workers=REQUESTS)
+    client.youtube = build_from_document(
+        load_discovery_document(tmp_path / 'youtube.v3.json'),
+        developerKey='test',
+        client_options={'api_endpoint': f'http://127.0.0.1:{fake_api.server_port}/youtube/v3/'}
+    )
+    yield client
+    client.shutdown()
+
+def test_concurrent_requests_overlap(client, fake_api):
+    async def run():
+        async with EventLoopTicks() as ticks:
+            started = time.perf_counter()
+            responses = await asyncio.gather(*[
+                client.execute(client.youtube.channels().list(part='snippet', id=f'UC{i}'))
+                for i in range(REQUESTS)
+            ])
+            elapsed = time.perf_counter() - started
+        return responses, elapsed, ticks
+
+    responses, elapsed, ticks = asyncio.run(run())
+
+    assert all(response['items'] == [] for response in responses)
+    # Every request was at the server at the same time
+    assert fake_api.max_in_flight == REQUESTS
+    # Far less than the requests one after another would take
+    assert elapsed < RESPONSE_DELAY * REQUESTS / 2
+    # The event loop kept running while the requests were waited on
+    assert ticks.kept_running(RESPONSE_DELAY)
+
+def test_requests_are_charged_to_the_quota(client):
+    async def run():
+        await client.execute(client.youtube.channels().list(part='snippet', id='UC1'))
+        await client.execute(client.youtube.search().list(part='snippet', q='name'))
+
+    asyncio.run(run())
+
+    assert client.quota_used == 101